@@ -0,0 +1,4 @@
+import os
+
+if os.environ.get('HEXAGONS_INSTRUMENT'):
+    from hexagons import instrument  # noqa: F401 -- enables itself
@@ -0,0 +1,697 @@
+"""
+.. module:: arrays
+    :synopsis: Batches of axial and cube coordinates stored as columns
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Coordinates are stored as contiguous columns instead of one object
+per hexagon, so whole batches are processed at once.
+NumPy is used when available, otherwise the standard :mod:`array`
+module is used as a (slower) fallback.
+"""
+
+
+import array
+import operator
+from itertools import repeat
+from hexagons.coordinate import (Cube, Axial, PACK_BITS, pack, unpack,
+                                 OFFSET_LAYOUTS, DOUBLED_LAYOUTS)
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+
+def _column(values, copy=False):
+    """Creates a contiguous column from an iterable of numbers
+
+    :param values: the numbers in the column
+    :type values: iterable of int or float
+    :param copy: copies an existing array instead of sharing its memory,
+                 so later changes to it do not reach the column
+    :type copy: bool
+    :returns: numpy.ndarray or array.array -- the column
+    """
+    if numpy is not None:
+        shared = isinstance(values, (numpy.ndarray, array.array))
+        if not shared:
+            values = list(values)
+        column = numpy.asarray(values)
+        dtype = numpy.int64 if column.dtype.kind in 'iub' else numpy.float64
+        return column.astype(dtype, copy=copy and shared)
+    values = list(values)
+    if all(isinstance(v, int) for v in values):
+        return array.array('q', values)
+    return array.array('d', values)
+
+
+def _apply(ufunc, pyfunc, *columns):
+    """Applies an element-wise operation to columns (or scalars)
+
+    :param ufunc: vectorized NumPy function
+    :type ufunc: callable
+    :param pyfunc: equivalent function on a single element
+    :type pyfunc: callable
+    :returns: column -- the result of the operation
+    """
+    if numpy is not None:
+        return ufunc(*columns)
+    size = max(len(c) for c in columns if not _is_scalar(c))
+    iterables = (repeat(c, size) if _is_scalar(c) else c for c in columns)
+    return _column(map(pyfunc, *iterables))
+
+
+def _is_scalar(value):
+    return isinstance(value, (int, float))
+
+
+def _check_length(batch, other):
+    """Rejects batches of different lengths
+
+    NumPy would broadcast a length-1 batch and the fallback would truncate
+    to the shortest one, so mismatches are reported explicitly instead.
+
+    :raises: ValueError -- if the lengths differ
+    """
+    if len(batch) != len(other):
+        raise ValueError(f'{type(other).__name__} of length {len(other)} does '
+                         f'not match {type(batch).__name__} of length '
+                         f'{len(batch)}')
+
+
+def _readonly(column):
+    """Read-only view of a column
+
+    The array fallback has no read-only views, so a copy is returned.
+
+    :returns: column -- a column that cannot modify the batch
+    """
+    if numpy is not None:
+        view = column.view()
+        view.setflags(write=False)
+        return view
+    return array.array(column.typecode, column)
+
+
+def _to_list(column):
+    """Python list of the elements of a column
+
+    :returns: list of int or float
+    """
+    return column.tolist()
+
+
+def _item(column, index):
+    """Single element of a column, as a Python number
+
+    :returns: int or float
+    """
+    value = column[index]
+    if numpy is not None:
+        return value.item()
+    return value
+
+
+def _max(column):
+    """Largest element of a non-empty column
+
+    :returns: int or float
+    """
+    if numpy is not None:
+        return column.max().item()
+    return max(column)
+
+
+def _round(x, y, z):
+    """Cube rounding of three columns, see :func:`Cube.round`
+
+    :returns: tuple of column -- the rounded x, y and z columns
+    """
+    if numpy is None:
+        rounded = [tuple(Cube(*c).round()) for c in zip(x, y, z)]
+        return tuple(_column(c[i] for c in rounded) for i in range(3))
+    rx, ry, rz = numpy.rint(x), numpy.rint(y), numpy.rint(z)
+    dx, dy, dz = numpy.abs(rx - x), numpy.abs(ry - y), numpy.abs(rz - z)
+    fix_x = (dx > dy) & (dx > dz)
+    fix_y = ~fix_x & (dy > dz)
+    fix_z = ~(fix_x | fix_y)
+    rx = numpy.where(fix_x, -(ry + rz), rx)
+    ry = numpy.where(fix_y, -(rx + rz), ry)
+    rz = numpy.where(fix_z, -(rx + ry), rz)
+    return (rx.astype(numpy.int64), ry.astype(numpy.int64),
+            rz.astype(numpy.int64))
+
+
+def _int_column(column, kind):
+    """Rejects columns of float coordinates, which cannot be shifted
+
+    :param kind: name of the coordinates, for the error message
+    :type kind: str
+    :returns: column -- the same column, as int if it is empty
+    :raises: ValueError -- if the column has float coordinates
+    """
+    is_int = (column.dtype.kind in 'iu' if numpy is not None
+              else column.typecode == 'q')
+    if not is_int:
+        if len(column) > 0:
+            raise ValueError(f'{kind} must have int coordinates')
+        if numpy is not None:
+            return column.astype(numpy.int64)
+        return array.array('q')
+    return column
+
+
+def _half(column, shift):
+    """(column + shift) >> 1, rounding toward negative infinity
+
+    :returns: column of int
+    """
+    shifted = _apply(operator.add, operator.add, column, shift)
+    return _apply(operator.rshift, operator.rshift, shifted, 1)
+
+
+def _check_layout(layout, layouts):
+    """Rejects unknown layouts
+
+    :raises: ValueError -- if layout is not one of layouts
+    """
+    if layout not in layouts:
+        raise ValueError(f'Unknown layout {layout!r}')
+
+
+def _pack(q, r):
+    """Packs columns of axial coordinates, see :func:`hexagons.coordinate.pack`
+
+    :returns: column of int -- the packed keys (unsigned 64 bits)
+    """
+    q = _int_column(q, 'Packed batches')
+    r = _int_column(r, 'Packed batches')
+    if numpy is None:
+        return array.array('Q', map(pack, q, r))
+    limit = 1 << (PACK_BITS - 1)
+    if len(q) > 0 and (min(q.min(), r.min()) < -limit or
+                       max(q.max(), r.max()) >= limit):
+        raise ValueError('AxialArray is out of the packing range')
+    zq = ((q << 1) ^ (q >> PACK_BITS)).astype(numpy.uint64)
+    zr = ((r << 1) ^ (r >> PACK_BITS)).astype(numpy.uint64)
+    return zq | (zr << numpy.uint64(PACK_BITS))
+
+
+def _unpack(keys):
+    """Inverse of :func:`_pack`
+
+    :returns: tuple of column -- the q and r columns
+    """
+    if numpy is None:
+        q, r = zip(*map(unpack, keys)) if len(keys) > 0 else ((), ())
+        return _column(q), _column(r)
+    keys = numpy.asarray(keys)
+    if keys.dtype.kind not in 'iu' or (keys.dtype.kind == 'i' and
+                                       len(keys) > 0 and keys.min() < 0):
+        raise ValueError('keys are not packed coordinates')
+    keys = keys.astype(numpy.uint64, copy=False)
+    zq = (keys & numpy.uint64((1 << PACK_BITS) - 1)).astype(numpy.int64)
+    zr = (keys >> numpy.uint64(PACK_BITS)).astype(numpy.int64)
+    return (zq >> 1) ^ -(zq & 1), (zr >> 1) ^ -(zr & 1)
+
+
+class CubeArray:
+    """Batch of cube coordinates, stored as x, y and z columns
+
+    Mirrors the arithmetic of :class:`Cube`, but every operation
+    acts on the whole batch at once.
+    """
+
+    def __init__(self, x, y, z, validate=True):
+        """Creates a new batch of cube coordinates
+
+        :param x: X coordinates
+        :type x: iterable of int or float
+        :param y: Y coordinates
+        :type y: iterable of int or float
+        :param z: Z coordinates
+        :type z: iterable of int or float
+        :param validate: checks the x+y+z=0 restriction on every element
+        :type validate: bool
+        """
+        self._x = _column(x, copy=True)
+        self._y = _column(y, copy=True)
+        self._z = _column(z, copy=True)
+        if not len(self._x) == len(self._y) == len(self._z):
+            raise ValueError('CubeArray columns must have the same length')
+        if validate:
+            total = _apply(operator.abs, abs,
+                           _apply(operator.add, operator.add,
+                                  _apply(operator.add, operator.add,
+                                         self._x, self._y), self._z))
+            if len(self) > 0 and _max(total) > Cube.TOLERANCE:
+                raise ValueError('CubeArray has coordinates that do not '
+                                 'slice the x+y+z=0 plane')
+
+    @classmethod
+    def _trusted(cls, x, y, z):
+        """Creates a batch from columns known to be valid, of the same
+        length and not shared with the caller
+        """
+        batch = cls.__new__(cls)
+        batch._x, batch._y, batch._z = _column(x), _column(y), _column(z)
+        return batch
+
+    @classmethod
+    def from_cubes(cls, cubes):
+        """Creates a batch from a collection of cube coordinates
+
+        :param cubes: the coordinates
+        :type cubes: iterable of Cube
+        :returns: CubeArray -- the batch
+        """
+        cubes = list(cubes)
+        return cls._trusted([c.x for c in cubes], [c.y for c in cubes],
+                            [c.z for c in cubes])
+
+    @property
+    def x(self):
+        """Read-only X column
+        """
+        return _readonly(self._x)
+
+    @property
+    def y(self):
+        """Read-only Y column
+        """
+        return _readonly(self._y)
+
+    @property
+    def z(self):
+        """Read-only Z column
+        """
+        return _readonly(self._z)
+
+    def to_cubes(self):
+        """Converts the batch to a list of cube coordinates
+
+        :returns: list of Cube
+        """
+        return [Cube(*c) for c in zip(_to_list(self._x), _to_list(self._y),
+                                      _to_list(self._z))]
+
+    def to_axial(self):
+        """Converts the batch to axial coordinates
+
+        :returns: AxialArray -- the corresponding axial coordinates
+        """
+        return AxialArray._trusted(self._x, self._z)
+
+    def pack(self):
+        """Packs every (integer) coordinate into a single int
+
+        See :func:`hexagons.coordinate.pack`
+
+        :returns: column of int -- the packed keys
+        """
+        return _pack(self._x, self._z)
+
+    @classmethod
+    def unpack(cls, keys):
+        """Creates a batch from packed ints
+
+        :param keys: values returned by :func:`CubeArray.pack`
+        :type keys: iterable of int
+        :returns: CubeArray -- the unpacked coordinates
+        """
+        return AxialArray.unpack(keys).to_cube()
+
+    def distance(self, other):
+        """Calculates the distance between every pair of hexagons
+
+        :param other: a single coordinate or a batch with the same length
+        :type other: Cube or CubeArray
+        :returns: column of int or float -- the distances
+        """
+        dx, dy, dz = (_apply(operator.abs, abs, c)
+                      for c in (self - other)._columns())
+        if numpy is not None:
+            return numpy.maximum(numpy.maximum(dx, dy), dz)
+        return _column(map(max, dx, dy, dz))
+
+    def round(self):
+        """Rounds every coordinate to the nearest hexagon
+
+        See :func:`Cube.round`
+
+        :returns: CubeArray -- a new batch with int values
+        """
+        return CubeArray._trusted(*_round(self._x, self._y, self._z))
+
+    def neighbors(self):
+        """The neighbors of every hexagon in the batch
+
+        Same order as :func:`Cube.neighbors`
+
+        :returns: tuple of CubeArray -- one batch per direction
+        """
+        return tuple(self + d for d in Cube._neighbor_directions)
+
+    def _columns(self):
+        return (self._x, self._y, self._z)
+
+    def _binary(self, other, ufunc, pyfunc):
+        if isinstance(other, Cube):
+            others = tuple(other)
+        else:
+            _check_length(self, other)
+            others = other._columns()
+        return CubeArray._trusted(*(_apply(ufunc, pyfunc, a, b)
+                                    for a, b in zip(self._columns(), others)))
+
+    def __add__(self, other):
+        """Coordinate-wise addition
+
+        :param other: a single coordinate or a batch with the same length
+        :type other: Cube or CubeArray
+        :returns: CubeArray -- the resulting addition
+        """
+        return self._binary(other, operator.add, operator.add)
+
+    def __sub__(self, other):
+        """Coordinate-wise subtraction
+
+        :param other: a single coordinate or a batch with the same length
+        :type other: Cube or CubeArray
+        :returns: CubeArray -- the resulting subtraction
+        """
+        return self._binary(other, operator.sub, operator.sub)
+
+    def __neg__(self):
+        """Negates all coordinates
+
+        :returns: CubeArray -- the opposing cubes
+        """
+        return CubeArray._trusted(*(_apply(operator.neg, operator.neg, c)
+                                    for c in self._columns()))
+
+    def __mul__(self, scalar):
+        """Scalar multiplication
+
+        :param scalar: the scalar value
+        :type scalar: int or float
+        :returns: CubeArray -- scaled coordinates
+        """
+        return CubeArray._trusted(*(_apply(operator.mul, operator.mul,
+                                           c, scalar)
+                                    for c in self._columns()))
+
+    def __len__(self):
+        """Number of coordinates in the batch
+
+        :returns: int
+        """
+        return len(self._x)
+
+    def __getitem__(self, index):
+        """A single coordinate, or a sub-batch for slices
+
+        :param index: position or slice
+        :type index: int or slice
+        :returns: Cube or CubeArray
+        """
+        if isinstance(index, slice):
+            return CubeArray._trusted(self._x[index], self._y[index],
+                                      self._z[index])
+        return Cube(_item(self._x, index), _item(self._y, index),
+                    _item(self._z, index))
+
+    def __iter__(self):
+        return iter(self.to_cubes())
+
+    def __repr__(self):
+        return 'CubeArray({x}, {y}, {z})'.format(x=_to_list(self._x),
+                                                 y=_to_list(self._y),
+                                                 z=_to_list(self._z))
+
+
+class AxialArray:
+    """Batch of axial coordinates, stored as q and r columns
+
+    Delegates most operations to :class:`CubeArray`,
+    convert when needed.
+    """
+
+    def __init__(self, q, r):
+        """Creates a new batch of axial coordinates
+
+        :param q: column coordinates
+        :type q: iterable of int or float
+        :param r: row coordinates
+        :type r: iterable of int or float
+        """
+        self._q = _column(q, copy=True)
+        self._r = _column(r, copy=True)
+        if len(self._q) != len(self._r):
+            raise ValueError('AxialArray columns must have the same length')
+
+    @classmethod
+    def _trusted(cls, q, r):
+        """Creates a batch from columns of the same length,
+        not shared with the caller
+        """
+        batch = cls.__new__(cls)
+        batch._q, batch._r = _column(q), _column(r)
+        return batch
+
+    @classmethod
+    def from_axials(cls, axials):
+        """Creates a batch from a collection of axial coordinates
+
+        :param axials: the coordinates
+        :type axials: iterable of Axial
+        :returns: AxialArray -- the batch
+        """
+        axials = list(axials)
+        return cls._trusted([a.q for a in axials], [a.r for a in axials])
+
+    @property
+    def q(self):
+        """Read-only column coordinates
+        """
+        return _readonly(self._q)
+
+    @property
+    def r(self):
+        """Read-only row coordinates
+        """
+        return _readonly(self._r)
+
+    def to_axials(self):
+        """Converts the batch to a list of axial coordinates
+
+        :returns: list of Axial
+        """
+        return [Axial(*a) for a in zip(_to_list(self._q), _to_list(self._r))]
+
+    def to_cube(self):
+        """Converts the batch to cube coordinates
+
+        :returns: CubeArray -- equivalent cube coordinates
+        """
+        y = _apply(operator.neg, operator.neg,
+                   _apply(operator.add, operator.add, self._q, self._r))
+        return CubeArray._trusted(self._q, y, self._r)
+
+    def pack(self):
+        """Packs every (integer) coordinate into a single int
+
+        See :func:`hexagons.coordinate.pack`
+
+        :returns: column of int -- the packed keys
+        """
+        return _pack(self._q, self._r)
+
+    @classmethod
+    def unpack(cls, keys):
+        """Creates a batch from packed ints
+
+        :param keys: values returned by :func:`AxialArray.pack`
+        :type keys: iterable of int
+        :returns: AxialArray -- the unpacked coordinates
+        """
+        return cls._trusted(*_unpack(keys))
+
+    def to_offset(self, layout='odd-r'):
+        """Converts every (integer) coordinate to offset coordinates
+
+        Gives the same results as :func:`Axial.to_offset`.
+
+        :param layout: one of :data:`hexagons.coordinate.OFFSET_LAYOUTS`
+        :type layout: str
+        :returns: tuple of column of int -- the col and row columns
+        :raises: ValueError -- for unknown layouts and float coordinates
+        """
+        _check_layout(layout, OFFSET_LAYOUTS)
+        q = _int_column(self._q, 'AxialArray')
+        r = _int_column(self._r, 'AxialArray')
+        shift = 1 if layout.startswith('even') else 0
+        if layout.endswith('r'):
+            return (_apply(operator.add, operator.add, q, _half(r, shift)),
+                    _apply(operator.pos, operator.pos, r))
+        return (_apply(operator.pos, operator.pos, q),
+                _apply(operator.add, operator.add, r, _half(q, shift)))
+
+    @classmethod
+    def from_offset(cls, col, row, layout='odd-r'):
+        """Creates a batch from offset coordinates
+
+        Gives the same results as :func:`Offset.to_axial`.
+
+        :param col: column coordinates
+        :type col: iterable of int
+        :param row: row coordinates
+        :type row: iterable of int
+        :param layout: one of :data:`hexagons.coordinate.OFFSET_LAYOUTS`
+        :type layout: str
+        :returns: AxialArray -- the converted coordinates
+        :raises: ValueError -- for unknown layouts, float coordinates
+                 and columns of different lengths
+        """
+        _check_layout(layout, OFFSET_LAYOUTS)
+        col = _int_column(_column(col), 'Offset')
+        row = _int_column(_column(row), 'Offset')
+        if len(col) != len(row):
+            raise ValueError('Offset columns must have the same length')
+        shift = 1 if layout.startswith('even') else 0
+        if layout.endswith('r'):
+            return cls(_apply(operator.sub, operator.sub, col,
+                              _half(row, shift)), row)
+        return cls(col, _apply(operator.sub, operator.sub, row,
+                               _half(col, shift)))
+
+    def to_doubled(self, layout='width'):
+        """Converts every (integer) coordinate to doubled coordinates
+
+        Gives the same results as :func:`Axial.to_doubled`.
+
+        :param layout: one of :data:`hexagons.coordinate.DOUBLED_LAYOUTS`
+        :type layout: str
+        :returns: tuple of column of int -- the col and row columns
+        :raises: ValueError -- for unknown layouts and float coordinates
+        """
+        _check_layout(layout, DOUBLED_LAYOUTS)
+        q = _int_column(self._q, 'AxialArray')
+        r = _int_column(self._r, 'AxialArray')
+        if layout == 'width':
+            return (_apply(operator.add, operator.add,
+                           _apply(operator.mul, operator.mul, q, 2), r),
+                    _apply(operator.pos, operator.pos, r))
+        return (_apply(operator.pos, operator.pos, q),
+                _apply(operator.add, operator.add,
+                       _apply(operator.mul, operator.mul, r, 2), q))
+
+    @classmethod
+    def from_doubled(cls, col, row, layout='width'):
+        """Creates a batch from doubled coordinates
+
+        Gives the same results as :func:`Doubled.to_axial`.
+
+        :param col: column coordinates
+        :type col: iterable of int
+        :param row: row coordinates
+        :type row: iterable of int
+        :param layout: one of :data:`hexagons.coordinate.DOUBLED_LAYOUTS`
+        :type layout: str
+        :returns: AxialArray -- the converted coordinates
+        :raises: ValueError -- for unknown layouts, float coordinates,
+                 columns of different lengths and odd col + row
+        """
+        _check_layout(layout, DOUBLED_LAYOUTS)
+        col = _int_column(_column(col), 'Doubled')
+        row = _int_column(_column(row), 'Doubled')
+        if len(col) != len(row):
+            raise ValueError('Doubled columns must have the same length')
+        total = _apply(operator.add, operator.add, col, row)
+        if len(total) > 0 and _max(_apply(operator.and_, operator.and_,
+                                          total, 1)):
+            raise ValueError('Doubled coordinates must have an even col + row')
+        if layout == 'width':
+            return cls(_half(_apply(operator.sub, operator.sub, col, row), 0),
+                       row)
+        return cls(col, _half(_apply(operator.sub, operator.sub, row, col), 0))
+
+    def neighbors(self):
+        """The neighbors of every hexagon in the batch
+
+        :returns: tuple of AxialArray -- one batch per direction
+        """
+        return tuple(self + d for d in Axial._neighbor_directions)
+
+    def _binary(self, other, ufunc, pyfunc):
+        if isinstance(other, Axial):
+            others = tuple(other)
+        else:
+            _check_length(self, other)
+            others = (other._q, other._r)
+        return AxialArray._trusted(*(_apply(ufunc, pyfunc, a, b) for a, b
+                                     in zip((self._q, self._r), others)))
+
+    def __add__(self, other):
+        """Coordinate-wise addition
+
+        :param other: a single coordinate or a batch with the same length
+        :type other: Axial or AxialArray
+        :returns: AxialArray -- the resulting addition
+        """
+        return self._binary(other, operator.add, operator.add)
+
+    def __sub__(self, other):
+        """Coordinate-wise subtraction
+
+        :param other: a single coordinate or a batch with the same length
+        :type other: Axial or AxialArray
+        :returns: AxialArray -- the resulting subtraction
+        """
+        return self._binary(other, operator.sub, operator.sub)
+
+    def __neg__(self):
+        """Negates all coordinates
+
+        :returns: AxialArray -- the opposing coordinates
+        """
+        return AxialArray._trusted(
+            _apply(operator.neg, operator.neg, self._q),
+            _apply(operator.neg, operator.neg, self._r))
+
+    def __mul__(self, scalar):
+        """Scalar multiplication
+
+        :param scalar: the scalar value
+        :type scalar: int or float
+        :returns: AxialArray -- scaled coordinates
+        """
+        return AxialArray._trusted(
+            _apply(operator.mul, operator.mul, self._q, scalar),
+            _apply(operator.mul, operator.mul, self._r, scalar))
+
+    def __len__(self):
+        """Number of coordinates in the batch
+
+        :returns: int
+        """
+        return len(self._q)
+
+    def __getitem__(self, index):
+        """A single coordinate, or a sub-batch for slices
+
+        :param index: position or slice
+        :type index: int or slice
+        :returns: Axial or AxialArray
+        """
+        if isinstance(index, slice):
+            return AxialArray._trusted(self._q[index], self._r[index])
+        return Axial(_item(self._q, index), _item(self._r, index))
+
+    def __iter__(self):
+        return iter(self.to_axials())
+
+    def __repr__(self):
+        return 'AxialArray({q}, {r})'.format(q=_to_list(self._q),
+                                             r=_to_list(self._r))
@@ -5,6 +5,7 @@ import random
 import pygame
 from hexagons.grid import HexagonGrid
 from hexagons.coordinate import Axial
+from hexagons.render import HexRenderer
 
 
 def main():
@@ -30,6 +31,9 @@ def main():
                     grid_size=grid_size)
     display = pygame.display.set_mode((window_size, window_size),
                                       pygame.HWSURFACE)
+    renderer = HexRenderer(display, g, lambda ax: white,
+                           text=letter_mapping.get, font=font,
+                           text_color=black, outline=black)
     running = True
 
     while running:
@@ -42,19 +46,11 @@ def main():
                 if clicked is not None:
                     #if clicked == g.center_hex:
                     letter_mapping[clicked] = next_letter(letter_mapping[clicked])
+                    renderer.mark_dirty(clicked)
 
-        for ax, c, cn in g.hexagon_list():
-            pygame.draw.polygon(display, white, cn)
-            pygame.draw.polygon(display, black, cn, 1)
-            letter = letter_mapping[ax]
-            if letter != ' ':
-                letterdisplay = font.render(letter, True, black)
-                textwidth, textheight = font.size(letter)
-                x = c[0] - (textwidth / 2)
-                y = c[1] - (textheight / 2)
-                display.blit(letterdisplay, (x, y))
-
-        pygame.display.flip()
+        changed = renderer.draw()
+        if changed:
+            pygame.display.update(changed)
 
     pygame.quit()
 
@@ -0,0 +1,207 @@
+"""
+.. module:: batch
+    :synopsis: Many independent queries run across worker processes
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+The cost map is copied once into a :mod:`multiprocessing.shared_memory`
+block, which the workers of a long-lived process pool attach to the first
+time they see it. Each batch only sends the queries and receives compact
+results: hexagons as packed keys (see :func:`Cube.pack`) in
+``array.array('Q')`` columns.
+
+Queries are tuples, with Cube arguments:
+
+* ``('floodfill', origin, steps)`` -- the hexagons reachable in at most
+  steps steps, as :func:`Cube.floodfill` (in order of discovery);
+* ``('line', start, end)`` -- the hexagons of :func:`Cube.line_to`,
+  stopped at the first impassable one (included), as
+  :func:`hexagons.visibility.ray_fan`;
+* ``('range', origin, radius)`` -- the passable hexagons of
+  :func:`Cube.circle_around`;
+* ``('path', start, goal)`` -- the cheapest path as
+  :func:`hexagons.pathfinding.astar`, giving (keys, cost) or None.
+
+Hexagons outside the map, or with an infinite or negative cost,
+are impassable.
+"""
+
+
+import array
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+from multiprocessing import shared_memory
+from hexagons.maps import HexMap
+from hexagons.pathfinding import astar
+
+QUERY_KINDS = ('floodfill', 'line', 'range', 'path')
+
+# The map attached by this (worker) process:
+# (name, shared memory, its views, HexMap)
+_attached = None
+
+
+def _passable_checks(costs):
+    """Obstacle and step cost functions of a cost map"""
+    index, data = costs.index, costs.data
+
+    def cost(cube):
+        position = index(cube)
+        if position is None:
+            return None
+        value = data[position]
+        if value < 0 or value == inf:
+            return None
+        return value
+
+    def blocked(cube):
+        return cost(cube) is None
+
+    return blocked, cost
+
+
+def _keys(cubes):
+    return array.array('Q', (cube.pack() for cube in cubes))
+
+
+def _answer(costs, min_step_cost, query):
+    """Runs a single query over a cost map"""
+    blocked, cost = _passable_checks(costs)
+    kind, first, second = query
+    if kind == 'floodfill':
+        return _keys(first.distance_map(second, blocked))
+    if kind == 'range':
+        return _keys(cube for cube in first.circle_around(second)
+                     if not blocked(cube))
+    if kind == 'line':
+        cells = []
+        for index, cube in enumerate(first.line_to(second)):
+            cells.append(cube)
+            if index > 0 and blocked(cube):
+                break
+        return _keys(cells)
+    found = astar(first, second, cost=cost, min_step_cost=min_step_cost)
+    if found is None:
+        return None
+    path, total = found
+    return _keys(path), total
+
+
+def _share(memory, size):
+    """Float column of the first size values of a shared memory block
+
+    :returns: tuple of memoryview -- the column, and the whole block view
+              it was sliced from (both must be released before closing)
+    """
+    whole = memory.buf.cast('d')
+    return whole[:size], whole
+
+
+def _attach(name, spec, size):
+    """The shared cost map, attaching to it on its first use"""
+    global _attached
+    if _attached is None or _attached[0] != name:
+        if _attached is not None:
+            _, memory, views, _ = _attached
+            for view in views:
+                view.release()
+            memory.close()
+        memory = shared_memory.SharedMemory(name=name)
+        views = _share(memory, size)
+        _attached = (name, memory, views, HexMap(spec, data=views[0]))
+    return _attached[3]
+
+
+def _run_chunk(name, spec, size, min_step_cost, queries):
+    """Runs some queries in a worker process"""
+    costs = _attach(name, spec, size)
+    return [_answer(costs, min_step_cost, query) for query in queries]
+
+
+class BatchExecutor:
+    """Runs batches of queries over a cost map in a process pool"""
+
+    def __init__(self, costs, processes=None):
+        """Shares a cost map with a new pool of worker processes
+
+        :param costs: cost of entering each hexagon
+        :type costs: HexMap
+        :param processes: the number of worker processes, the number of
+                          CPUs if None; 0 runs the queries in this process
+        :type processes: int
+        """
+        self.processes = processes
+        self._pool = None
+        self._memory = None
+        self.version = 0
+        self.update_map(costs)
+
+    def update_map(self, costs):
+        """Shares a new version of the cost map with the workers
+
+        :param costs: cost of entering each hexagon
+        :type costs: HexMap
+        """
+        self._release()
+        memory = shared_memory.SharedMemory(create=True,
+                                            size=max(len(costs), 1) * 8)
+        self._views = _share(memory, len(costs))
+        self._views[0][:] = array.array('d', costs.data.tolist())
+        self._memory = memory
+        self.costs = HexMap(costs.spec, data=self._views[0])
+        passable = [value for value in self._views[0] if 0 <= value < inf]
+        self._min_step_cost = min(passable, default=1)
+        self.version += 1
+
+    def run(self, queries, chunksize=64):
+        """Answers a batch of queries
+
+        :param queries: the queries, see the module documentation
+        :type queries: iterable of tuple
+        :param chunksize: queries sent to a worker at once
+        :type chunksize: int
+        :returns: list -- the result of each query, in order
+        :raises: ValueError -- for unknown query kinds
+        """
+        queries = list(queries)
+        for query in queries:
+            if query[0] not in QUERY_KINDS:
+                raise ValueError(f'Unknown query kind {query[0]!r}')
+        if self.processes == 0:
+            return [_answer(self.costs, self._min_step_cost, query)
+                    for query in queries]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes)
+        chunks = [queries[i:i + chunksize]
+                  for i in range(0, len(queries), chunksize)]
+        count = len(chunks)
+        results = []
+        for answers in self._pool.map(_run_chunk, [self._memory.name] * count,
+                                      [self.costs.spec] * count,
+                                      [len(self.costs)] * count,
+                                      [self._min_step_cost] * count, chunks):
+            results.extend(answers)
+        return results
+
+    def _release(self):
+        """Frees the shared memory of the current map version"""
+        if self._memory is None:
+            return
+        for view in self._views:
+            view.release()
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+    def close(self):
+        """Stops the workers and frees the shared memory"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,235 @@
+#! /usr/bin/env python
+"""
+.. module:: benchmarks
+    :synopsis: Performance measurements of the coordinate and grid hot paths
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Run every benchmark and save the results::
+
+    python -m hexagons.benchmarks --output results.json
+
+Run them again later and flag the ones slower than the saved baseline::
+
+    python -m hexagons.benchmarks --compare results.json
+
+Each benchmark reports its operations per second (best of a few runs),
+the memory blocks still allocated by the result of one operation,
+and the peak memory used during one operation.
+"""
+
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from itertools import cycle
+from hexagons.coordinate import Axial, Cube
+from hexagons.grid import HexagonGrid
+
+
+RADII = (1, 5, 20)
+QUICK_RADII = (1, 5)
+GRID_SIZES = (4, 16, 32)
+QUICK_GRID_SIZES = (4,)
+
+
+def _walls(radius):
+    """Obstacles for the floodfill benchmark: every third ring, with gaps"""
+    walls = set()
+    for r in range(3, radius + 1, 3):
+        walls.update(list(Cube.origin.ring(r))[1:])
+    return walls
+
+
+def _clicks(grid):
+    """Endless window positions, cycling over the hexagon centers"""
+    points = [center for _, center, _ in grid.hexagon_list()]
+    points += [(0, 0), (grid.window_size, grid.window_size)]
+    return cycle(points)
+
+
+def cases(quick=False):
+    """The benchmarks, as (name, operation) pairs
+
+    :param quick: uses smaller sweeps
+    :type quick: bool
+    :returns: iterable of tuple -- the name and a callable doing
+              one operation
+    """
+    a, b = Cube(3, -5, 2), Cube(-1, 4, -3)
+    yield 'cube_add', lambda: a + b
+    yield 'cube_sub', lambda: a - b
+    yield 'cube_mul', lambda: a * 3
+    yield 'cube_distance', lambda: a.distance(b)
+    yield 'cube_new', lambda: Cube(3, -5, 2)
+    yield 'axial_to_cube', lambda: Axial(3, -5).to_cube()
+
+    for radius in QUICK_RADII if quick else RADII:
+        target = Cube(radius, -radius - radius // 2, radius // 2)
+        walls = _walls(radius)
+        yield (f'circle_around[{radius}]',
+               lambda radius=radius: list(Cube.origin.circle_around(radius)))
+        yield (f'floodfill[{radius}]',
+               lambda radius=radius, walls=walls:
+               Cube.origin.floodfill(radius, walls))
+        yield (f'line_to[{radius}]',
+               lambda target=target: list(Cube.origin.line_to(target)))
+        yield (f'circumference[{radius}]',
+               lambda radius=radius: Cube.origin.circumference(radius))
+
+    for size in QUICK_GRID_SIZES if quick else GRID_SIZES:
+        grid = HexagonGrid(800, Axial(0, 0), grid_size=size)
+        centers = cycle([Axial(0, 0), Axial(1, 0)])
+
+        def rebuild(grid=grid, centers=centers):
+            grid.move_center(next(centers))
+            return grid.hexagon_list()
+
+        clicks = _clicks(grid)
+        yield f'hexagon_list[{size}]', rebuild
+        yield f'hexagon_list_cached[{size}]', grid.hexagon_list
+        yield (f'clicked_hex[{size}]',
+               lambda grid=grid, clicks=clicks: grid.clicked_hex(next(clicks)))
+
+
+def measure(operation, min_time=0.2, repeat=3):
+    """Measures a single benchmark
+
+    :param operation: callable doing one operation
+    :type operation: callable
+    :param min_time: minimum duration of each timing run, in seconds
+    :type min_time: float
+    :param repeat: timing runs, the fastest one is kept
+    :type repeat: int
+    :returns: dict -- ops_per_sec, allocated_blocks and peak_bytes
+    """
+    timer = timeit.Timer(operation)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed < min_time / 10 else 1 + int(min_time / elapsed)
+    best = min([elapsed] + timer.repeat(repeat - 1, number))
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        result = operation()
+        peak = tracemalloc.get_traced_memory()[1] - start_bytes
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__),
+               tracemalloc.Filter(False, __file__)]
+    after = after.filter_traces(ignored)
+    blocks = sum(stat.count_diff for stat in
+                 after.compare_to(before.filter_traces(ignored), 'filename')
+                 if stat.count_diff > 0)
+    del result
+    return {'ops_per_sec': number / best if best > 0 else float('inf'),
+            'allocated_blocks': blocks, 'peak_bytes': peak}
+
+
+def run(quick=False, only=None, min_time=0.2, report=None):
+    """Runs the benchmarks
+
+    :param quick: uses smaller sweeps
+    :type quick: bool
+    :param only: runs only the benchmarks with this text in their names
+    :type only: str
+    :param min_time: see :func:`measure`
+    :type min_time: float
+    :param report: function receiving each name and result as they finish
+    :type report: callable
+    :returns: dict -- the meta information and the results by name
+    """
+    results = {}
+    for name, operation in cases(quick):
+        if only is not None and only not in name:
+            continue
+        results[name] = measure(operation, min_time)
+        if report is not None:
+            report(name, results[name])
+    return {'meta': {'python': platform.python_version(),
+                     'implementation': platform.python_implementation(),
+                     'machine': platform.machine(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def compare(baseline, current, threshold=0.1):
+    """Compares two runs of the benchmarks
+
+    :param baseline: results of :func:`run` used as reference
+    :type baseline: dict
+    :param current: results of :func:`run` to be checked
+    :type current: dict
+    :param threshold: relative loss of ops/sec flagged as a regression
+    :type threshold: float
+    :returns: list of tuple -- (name, baseline ops/sec, current ops/sec,
+              relative change, True if it is a regression), for the
+              benchmarks in both runs
+    """
+    rows = []
+    for name, result in current['results'].items():
+        reference = baseline['results'].get(name)
+        if reference is None:
+            continue
+        old, new = reference['ops_per_sec'], result['ops_per_sec']
+        change = new / old - 1
+        rows.append((name, old, new, change, change < -threshold))
+    return rows
+
+
+def main(argv=None):
+    """Command line entry point
+
+    :param argv: the arguments, those of the command line if None
+    :type argv: list of str
+    :returns: int -- the exit status, 1 if a regression was flagged
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m hexagons.benchmarks',
+        description='Benchmarks of the coordinate and grid hot paths')
+    parser.add_argument('--output', help='saves the results to a JSON file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='flags regressions against a saved JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown flagged as a regression')
+    parser.add_argument('--only', help='runs only the matching benchmarks')
+    parser.add_argument('--quick', action='store_true',
+                        help='smaller sweeps and shorter timings')
+    args = parser.parse_args(argv)
+
+    def report(name, result):
+        print(f"{name:28} {result['ops_per_sec']:14,.0f} ops/s "
+              f"{result['allocated_blocks']:8} blocks "
+              f"{result['peak_bytes']:10} peak bytes")
+
+    current = run(args.quick, args.only, 0.05 if args.quick else 0.2, report)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump(current, stream, indent=2)
+    if not args.compare:
+        return 0
+    with open(args.compare) as stream:
+        baseline = json.load(stream)
+    regressions = 0
+    print()
+    for name, old, new, change, regressed in compare(baseline, current,
+                                                     args.threshold):
+        flag = 'REGRESSION' if regressed else ''
+        print(f'{name:28} {old:14,.0f} -> {new:14,.0f} {change:+8.1%} {flag}')
+        regressions += regressed
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
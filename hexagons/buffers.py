@@ -0,0 +1,150 @@
+"""
+.. module:: buffers
+    :synopsis: Vertex and index buffers of a grid, for GPU renderers
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Every hexagon is exported as VERTICES_PER_HEX interleaved vertices:
+its center followed by its six corners, each vertex being
+(x, y, attribute0, attribute1, ...) as float32.
+Buffers support the buffer protocol, so they can be uploaded directly
+(e.g. with moderngl's ``ctx.buffer(data)``) or refilled in place.
+"""
+
+
+from array import array
+from struct import Struct
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+
+VERTICES_PER_HEX = 7
+
+_TOPOLOGIES = {
+    # Six triangles per hexagon, fanning out of the center
+    'triangles': tuple(i for k in range(6)
+                       for i in (0, k + 1, (k + 1) % 6 + 1)),
+    # Six line segments per hexagon, around the corners
+    'outline': tuple(i for k in range(6) for i in (k + 1, (k + 1) % 6 + 1)),
+}
+
+
+def _typecode(size):
+    """Array typecode of an unsigned int with the given size in bytes"""
+    for code in 'IL':
+        if array(code).itemsize == size:
+            return code
+    raise RuntimeError(f'No unsigned {size * 8} bits array type')
+
+
+def _writable_view(out, size, itemformat):
+    """Writable view of a caller-provided buffer
+
+    :raises: ValueError -- if the buffer has the wrong type or size
+    """
+    view = memoryview(out)
+    if view.readonly:
+        raise ValueError('The output buffer is read-only')
+    if view.format not in ('B', 'b', 'c'):
+        if view.format.lstrip('<=@') != itemformat:
+            raise ValueError(f'The output buffer has format {view.format}, '
+                             f'expected {itemformat}')
+    view = view.cast('B').cast(itemformat)
+    if len(view) != size:
+        raise ValueError(f'The output buffer has {len(view)} items, '
+                         f'expected {size}')
+    return view
+
+
+def vertex_buffer(grid, attributes=None, out=None):
+    """Interleaved float32 vertices of every hexagon in a grid
+
+    Hexagons are in the order of :func:`HexagonGrid.hexagon_list`.
+    The vertices are written straight into the buffer from
+    :func:`HexagonGrid.relative_geometry`, all at once with NumPy.
+
+    :param grid: the grid
+    :type grid: HexagonGrid or Viewport
+    :param attributes: function receiving the axial coordinate of a
+                       hexagon and returning its extra floats (always the
+                       same amount), repeated on its seven vertices
+    :type attributes: callable
+    :param out: buffer to be refilled in place instead of allocating one
+    :type out: writable float32 (or bytes) buffer
+    :returns: array.array or out -- the filled buffer
+    :raises: ValueError -- if out has the wrong type or size
+    """
+    origin, centers, corners = grid.relative_geometry()
+    extras = [()] * len(centers)
+    if attributes is not None:
+        extras = [tuple(attributes(coord))
+                  for coord, _, _ in grid.hexagon_list()]
+    stride = 2 + (len(extras[0]) if extras else 0)
+    size = len(centers) * VERTICES_PER_HEX * stride
+    data = array('f', bytes(4 * size)) if out is None else out
+    view = _writable_view(data, size, 'f')
+    if numpy is not None:
+        _fill_numpy(view, origin, centers, corners, extras, stride)
+    else:
+        _fill_python(view, origin, centers, corners, extras, stride)
+    return data
+
+
+def _fill_numpy(view, origin, centers, corners, extras, stride):
+    """Broadcasts the center and corner offsets into the vertices"""
+    vertices = numpy.asarray(view).reshape(-1, VERTICES_PER_HEX, stride)
+    if len(vertices) == 0:
+        return
+    absolute = numpy.array(centers, dtype=numpy.float64)
+    absolute += origin
+    vertices[:, 0, :2] = absolute
+    vertices[:, 1:, :2] = (absolute[:, numpy.newaxis, :] +
+                           numpy.array(corners, dtype=numpy.float64))
+    if stride > 2:
+        vertices[:, :, 2:] = numpy.array(extras, dtype=numpy.float32)[
+            :, numpy.newaxis, :]
+
+
+def _fill_python(view, origin, centers, corners, extras, stride):
+    """Packs the vertices of each hexagon in turn"""
+    record = Struct(f'{VERTICES_PER_HEX * stride}f')
+    target = view.cast('B')
+    originx, originy = origin
+    for index, ((dx, dy), extra) in enumerate(zip(centers, extras)):
+        x, y = originx + dx, originy + dy
+        vertices = [x, y, *extra]
+        for cx, cy in corners:
+            vertices += (x + cx, y + cy, *extra)
+        record.pack_into(target, index * record.size, *vertices)
+
+
+def index_buffer(hex_count, topology='triangles', out=None):
+    """Shared uint32 indexes of the vertices in :func:`vertex_buffer`
+
+    The indexes only depend on the amount of hexagons, so the buffer
+    can be uploaded once and reused while the grid does not change size.
+
+    :param hex_count: amount of hexagons in the vertex buffer
+    :type hex_count: int
+    :param topology: 'triangles' for a triangle list filling each hexagon,
+                     'outline' for a line list around each hexagon
+    :type topology: str
+    :param out: buffer to be refilled in place instead of allocating one
+    :type out: writable uint32 (or bytes) buffer
+    :returns: array.array or out -- the filled buffer
+    :raises: ValueError -- for unknown topologies, or if out has the
+             wrong type or size
+    """
+    if topology not in _TOPOLOGIES:
+        raise ValueError(f'Unknown topology {topology!r}')
+    pattern = _TOPOLOGIES[topology]
+    typecode = _typecode(4)
+    data = array(typecode, (VERTICES_PER_HEX * h + i
+                            for h in range(hex_count) for i in pattern))
+    if out is None:
+        return data
+    _writable_view(out, len(data), typecode)[:] = data
+    return out
@@ -9,19 +9,228 @@ Special thanks to Amit and his post: http://www.redblobgames.com/grids/hexagons
 
 
 import sys
-from itertools import permutations
+from collections.abc import Set
+from functools import lru_cache, wraps
+from itertools import chain
+from operator import itemgetter
 
 
-class Cube:
+_new = tuple.__new__
+_tuple_eq = tuple.__eq__
+
+
+def obstacle_function(obstacle):
+    """Normalizes the accepted obstacle arguments into a callable
+
+    The obstacles can be given as a function returning True for obstacle
+    coordinates, as a set of obstacles (any :class:`collections.abc.Set`,
+    such as a set of Cube) or as a bitmap: an object with an
+    ``obstacle_test`` method, such as a bool :class:`hexagons.maps.HexMap`
+    (see :func:`hexagons.maps.HexMap.obstacle_test`) or a
+    :class:`hexagons.shapes.Shape`.
+
+    :param obstacle: the obstacles, or None for no obstacles
+    :type obstacle: callable, set or bitmap
+    :returns: callable or None -- returns True for obstacles
+    :raises: TypeError -- for other containers, as their ``in`` may not
+             mean "is an obstacle" (a HexMap tells the hexagons inside
+             the map, for example)
+    """
+    if obstacle is None:
+        return None
+    obstacle_test = getattr(obstacle, 'obstacle_test', None)
+    if obstacle_test is not None:
+        return obstacle_test()
+    if callable(obstacle):
+        return obstacle
+    if isinstance(obstacle, Set):
+        return obstacle.__contains__
+    raise TypeError(f'{type(obstacle).__name__} cannot be used as obstacles, '
+                    'give a function, a set or a bitmap')
+
+
+def _round(x, y, z):
+    """Cube rounding of loose coordinates, see :func:`Cube.round`
+
+    :returns: Cube -- the nearest hexagon
+    """
+    rx, ry, rz = round(x), round(y), round(z)
+    dx, dy, dz = abs(rx - x), abs(ry - y), abs(rz - z)
+    if dx > dy and dx > dz:
+        rx = -(ry + rz)
+    elif dy > dz:
+        ry = -(rx + rz)
+    else:
+        rz = -(rx + ry)
+    return Cube._trusted(rx, ry, rz)
+
+
+# Offset tables of up to SHAPE_CACHE_SIZE radii are kept, as long as the
+# radius is at most SHAPE_CACHE_RADIUS: bigger tables are built on each call
+# (they cost O(radius ** 2) to build, about as much as using them)
+SHAPE_CACHE_SIZE = 32
+SHAPE_CACHE_RADIUS = 64
+
+
+def _shape_cache(build):
+    """Caches the offset tables of the small radii
+
+    :param build: function building the table of a radius
+    :type build: callable
+    :returns: callable -- same results as build, cached when the radius
+              is at most SHAPE_CACHE_RADIUS
+    """
+    cached = lru_cache(maxsize=SHAPE_CACHE_SIZE)(build)
+
+    @wraps(build)
+    def offsets(radius):
+        if radius > SHAPE_CACHE_RADIUS:
+            return build(radius)
+        return cached(radius)
+
+    offsets.cache_info = cached.cache_info
+    offsets.cache_clear = cached.cache_clear
+    return offsets
+
+
+@_shape_cache
+def _disk_offsets(radius):
+    """Offsets of every hexagon within radius of the origin
+
+    Ordered by x, then y, like :func:`Cube.circle_around`
+
+    :returns: tuple of tuple of int -- the (x, y, z) offsets
+    """
+    offsets = []
+    for x in range(-radius, radius + 1):
+        start = max(-radius, -x - radius)
+        end = min(radius, -x + radius)
+        for y in range(start, end + 1):
+            offsets.append((x, y, -(x + y)))
+    return tuple(offsets)
+
+
+def _build_ring(radius):
+    """Offsets of the hexagons at exactly radius from the origin
+
+    Ordered like :func:`Cube.ring`
+
+    :returns: tuple of tuple of int -- the (x, y, z) offsets
+    """
+    if radius == 0:
+        return ((0, 0, 0),)
+    directions = Cube._neighbor_directions
+    offsets = []
+    for side in range(6):
+        cx, cy, cz = directions[side]
+        sx, sy, sz = directions[(side + 2) % 6]
+        for i in range(radius):
+            offsets.append((radius * cx + i * sx, radius * cy + i * sy,
+                            radius * cz + i * sz))
+    return tuple(offsets)
+
+
+_ring_offsets = _shape_cache(_build_ring)
+
+
+@_shape_cache
+def _spiral_offsets(radius):
+    """Offsets of the rings 0 to radius, one after the other
+
+    The rings are built without going through the cache,
+    so only the requested spiral is kept.
+
+    :returns: tuple of tuple of int -- the (x, y, z) offsets
+    """
+    return tuple(chain.from_iterable(_build_ring(k)
+                                     for k in range(radius + 1)))
+
+
+# Result of 0 to 5 rotations to the right, as (indexes, sign):
+# the rotated point is sign * (p[i0], p[i1], p[i2])
+_ROTATIONS = (((0, 1, 2), 1), ((2, 0, 1), -1), ((1, 2, 0), 1),
+              ((0, 1, 2), -1), ((2, 0, 1), 1), ((1, 2, 0), -1))
+
+# Reflections keep the named axis and swap the other two
+_REFLECTIONS = {'x': (0, 2, 1), 'y': (2, 1, 0), 'z': (1, 0, 2)}
+
+
+def _translate(center, offsets):
+    """Moves a table of offsets to be relative to center
+
+    :returns: iterable of Cube -- the translated hexagons
+    """
+    x, y, z = center
+    trusted = Cube._trusted
+    return (trusted(x + ox, y + oy, z + oz) for ox, oy, oz in offsets)
+
+
+def _unordered(self, other):
+    """Replaces the tuple ordering, coordinates cannot be sorted
+
+    :raises: TypeError
+    """
+    raise TypeError(f'{type(self).__name__} coordinates have no ordering')
+
+
+PACK_BITS = 32
+_PACK_MASK = (1 << PACK_BITS) - 1
+_PACK_LIMIT = 1 << (PACK_BITS - 1)
+_KEY_LIMIT = 1 << (2 * PACK_BITS)
+
+
+def pack(q, r):
+    """Packs an integer axial coordinate into a single int
+
+    Each coordinate is zigzag-encoded (0, -1, 1, -2, 2, ... become
+    0, 1, 2, 3, 4, ...) into PACK_BITS bits, with q in the low half
+    and r in the high half. The result is a non-negative int
+    smaller than 2 ** (2 * PACK_BITS), usable as a cheap dict/set key.
+
+    :param q: column coordinate
+    :type q: int
+    :param r: row coordinate
+    :type r: int
+    :returns: int -- the packed coordinate
+    """
+    if not (isinstance(q, int) and isinstance(r, int)):
+        raise ValueError(f'Axial ({q}, {r}) must have int coordinates to be packed')
+    if not (-_PACK_LIMIT <= q < _PACK_LIMIT and -_PACK_LIMIT <= r < _PACK_LIMIT):
+        raise ValueError(f'Axial ({q}, {r}) is out of the packing range')
+    return (((q << 1) ^ (q >> PACK_BITS)) |
+            (((r << 1) ^ (r >> PACK_BITS)) << PACK_BITS))
+
+
+def unpack(key):
+    """Inverse of :func:`pack`
+
+    :param key: a packed coordinate
+    :type key: int
+    :returns: tuple of int -- the (q, r) axial coordinate
+    """
+    if not (isinstance(key, int) and 0 <= key < _KEY_LIMIT):
+        raise ValueError(f'{key} is not a packed coordinate')
+    zq = key & _PACK_MASK
+    zr = key >> PACK_BITS
+    return ((zq >> 1) ^ -(zq & 1), (zr >> 1) ^ -(zr & 1))
+
+
+class Cube(tuple):
     """Cube coordinates for a hexagon
 
     The coordinates (x, y, z) represent an unique hexagon
     .. note:: x + y + z = 0 (or very close to it, there's some tolerance)
+
+    Cubes are immutable and behave like a 3-tuple (x, y, z) for unpacking,
+    indexing and len(), but they only compare equal to other cubes
+    and have no ordering.
     """
 
+    __slots__ = ()
+
     TOLERANCE = 0.5
 
-    def __init__(self, x, y, z):
+    def __new__(cls, x, y, z):
         """Creates a new immutable cube coordinate from points x, y, z
 
         :param x: X coordinate
@@ -37,36 +246,76 @@ class Cube:
         """
         if abs(x + y + z) > Cube.TOLERANCE:
             raise ValueError(f'Cube ({x}, {y}, {z}) does not slice the x+y+z=0 plane')
-        self._x = x
-        self._y = y
-        self._z = z
+        return _new(cls, (x, y, z))
 
-    @property
-    def x(self):
-        """Read-only X coordinate of the cube
-        :returns: int or float -- the X coordinate
+    @classmethod
+    def _trusted(cls, x, y, z):
+        """Creates a cube coordinate without checking the x+y+z=0 restriction
+
+        Used internally where the restriction holds by construction,
+        such as the results of arithmetic between valid cubes.
+
+        :returns: Cube -- the new coordinate
         """
-        return self._x
+        return _new(cls, (x, y, z))
 
-    @property
-    def y(self):
-        """Read-only Y coordinate of the cube
+    x = property(itemgetter(0), doc="""Read-only X coordinate of the cube
+        :returns: int or float -- the X coordinate
+        """)
+
+    y = property(itemgetter(1), doc="""Read-only Y coordinate of the cube
         :returns: int or float -- the Y coordinate
-        """
-        return self._y
+        """)
 
-    @property
-    def z(self):
-        """Read-only Z coordinate of the cube
+    z = property(itemgetter(2), doc="""Read-only Z coordinate of the cube
         :returns: int or float -- the Z coordinate
-        """
-        return self._z
+        """)
 
     def to_axial(self):
         """Converts the cube coordinate to an axial coordinate
         :returns: Axial -- the unique corresponding axial coordinate
         """
-        return Axial(self.x, self.z)
+        return Axial._trusted(self[0], self[2])
+
+    def to_offset(self, layout='odd-r'):
+        """Converts the (integer) cube coordinate to offset coordinates
+
+        :param layout: one of :data:`OFFSET_LAYOUTS`
+        :type layout: str
+        :returns: Offset -- the coordinate in that layout
+        :raises: ValueError -- for unknown layouts
+        """
+        return self.to_axial().to_offset(layout)
+
+    def to_doubled(self, layout='width'):
+        """Converts the (integer) cube coordinate to doubled coordinates
+
+        :param layout: one of :data:`DOUBLED_LAYOUTS`
+        :type layout: str
+        :returns: Doubled -- the coordinate in that layout
+        :raises: ValueError -- for unknown layouts
+        """
+        return self.to_axial().to_doubled(layout)
+
+    def pack(self):
+        """Packs the (integer) coordinate into a single int
+
+        See :func:`pack`, the key is the same as the axial coordinate's.
+
+        :returns: int -- the packed coordinate
+        """
+        return pack(self[0], self[2])
+
+    @staticmethod
+    def unpack(key):
+        """Creates the cube coordinate from a packed int
+
+        :param key: value returned by :func:`Cube.pack`
+        :type key: int
+        :returns: Cube -- the unpacked coordinate
+        """
+        q, r = unpack(key)
+        return Cube._trusted(q, -(q + r), r)
 
     def neighbors(self):
         """The neighbor cubes of the cube, assuming infinite grid
@@ -76,7 +325,9 @@ class Cube:
 
         :returns: iterable of Cube -- the neighbors
         """
-        return map(lambda d: self + d, Cube._neighbor_directions)
+        x, y, z = self
+        return (Cube._trusted(x + dx, y + dy, z + dz)
+                for dx, dy, dz in Cube._neighbor_directions)
 
     def diagonals(self):
         """The coordinates of the six diagonal hexagons
@@ -86,7 +337,9 @@ class Cube:
 
         :returns: iterable of Cube -- the diagonals
         """
-        return map(lambda d: self + d, Cube._diagonal_directions)
+        x, y, z = self
+        return (Cube._trusted(x + dx, y + dy, z + dz)
+                for dx, dy, dz in Cube._diagonal_directions)
 
     def distance(self, other):
         """Calculates the distance between two hexagons
@@ -96,8 +349,9 @@ class Cube:
 
         :returns: int or float
         """
-        return max(abs(self.x - other.x), abs(self.y - other.y),
-                   abs(self.z - other.z))
+        x, y, z = self
+        ox, oy, oz = other
+        return max(abs(x - ox), abs(y - oy), abs(z - oz))
 
     def round(self):
         """Rounds a floating point to the nearest hexagon
@@ -110,15 +364,7 @@ class Cube:
 
         :returns: Cube -- a new Cube coordinate with int values
         """
-        rx, ry, rz = map(round, self)
-        dx, dy, dz = [abs(d - o) for (d, o) in zip((rx, ry, rz), self)]
-        if dx > dy and dx > dz:
-            rx = -(ry + rz)
-        elif dy > dz:
-            ry = -(rx + rz)
-        else:
-            rz = -(rx + ry)
-        return Cube(rx, ry, rz)
+        return _round(*self)
 
     def line_to(self, target):
         """Returns all hexes in a straight-line
@@ -126,19 +372,45 @@ class Cube:
         The result is in order from self to target,
         both extremes included.
 
+        The interpolation is done on plain floats, only the
+        resulting hexagons are created as Cube objects.
+
         :param target: end of the line
         :type target: Cube
         :returns: iterable of Cube -- points in the line
         """
-        def lerp(a, b, t):
-            return a + (b - a) * t
+        n = self.distance(target)
+        if n == 0:
+            yield self
+            return
+        ax, ay, az = self
+        dx, dy, dz = target[0] - ax, target[1] - ay, target[2] - az
+        ex, ey, ez = Cube._epsilon
+        for i in range(n + 1):
+            t = i / n
+            yield _round(ax + dx * t + ex, ay + dy * t + ey, az + dz * t + ez)
+
+    def line_point(self, target, index):
+        """The hexagon at a position of :func:`Cube.line_to`
 
-        def cube_lerp(a, b, t):
-            return Cube(*(lerp(ax, bx, t) for (ax, bx) in zip(a, b)))
+        The hexagon at position index is index steps away from self,
+        so testing if a hexagon is in a line only needs this one point.
 
+        :param target: end of the line
+        :type target: Cube
+        :param index: the position, from 0 (self) to the line length
+        :type index: int
+        :returns: Cube -- the same as list(self.line_to(target))[index]
+        """
         n = self.distance(target)
-        for i in range(n + 1):
-            yield (cube_lerp(self, target, i / n) + Cube._epsilon).round()
+        if n == 0:
+            return self
+        ax, ay, az = self
+        ex, ey, ez = Cube._epsilon
+        t = index / n
+        return _round(ax + (target[0] - ax) * t + ex,
+                      ay + (target[1] - ay) * t + ey,
+                      az + (target[2] - az) * t + ez)
 
     def circle_around(self, size, obstacles=None):
         """The collection of hexagons in a circle around this
@@ -152,13 +424,8 @@ class Cube:
         """
         if obstacles is not None:
             yield from self.floodfill(size, obstacles)
-        else:
-            for x in range(-size, size + 1):
-                start = max(-size, -x - size)
-                end = min(size, -x + size)
-                for y in range(start, end + 1):
-                    z = -(x + y)
-                    yield self + Cube(x, y, z)
+        elif size >= 0:
+            yield from _translate(self, _disk_offsets(size))
 
     def floodfill(self, size, obstacle):
         """The collection of hexagons reachable in a finite amount of steps
@@ -169,22 +436,63 @@ class Cube:
 
         :param size: the maximum number of steps from the origin
         :type size: int
-        :param obstacle: function returning True for obstacle coordinates
-        :type obstacle: callable
+        :param obstacle: function returning True for obstacle coordinates,
+                         a set of obstacles or a bitmap, see
+                         :func:`obstacle_function`
+        :type obstacle: callable, set or bitmap
         :returns: iterable of Cube -- collection of reachable hexagons
         """
-        visited = set([self])
-        reachable = [[self]]
+        return set(self.distance_map(size, obstacle))
+
+    def distance_map(self, size, obstacle=None, target=None, max_cells=None):
+        """The number of steps needed to reach each hexagon
+
+        Performs the same flood-fill as :func:`Cube.floodfill`,
+        but keeps the step count of every reachable hexagon.
+        Each hexagon is tested against the obstacles at most once.
+
+        :param size: the maximum number of steps from the origin
+        :type size: int
+        :param obstacle: function returning True for obstacle coordinates,
+                         a set of obstacles (such as a set of Cube) or a
+                         bitmap, see :func:`obstacle_function`
+        :type obstacle: callable, set or bitmap
+        :param target: stops as soon as this hexagon is reached
+        :type target: Cube
+        :param max_cells: stops as soon as this many hexagons are reached
+                          (the origin included)
+        :type max_cells: int
+        :returns: dict -- maps each reached Cube to its number of steps,
+                  in order of discovery
+        """
+        blocked = obstacle_function(obstacle)
+        trusted = Cube._trusted
+        directions = Cube._neighbor_directions
+        distances = {self: 0}
+        rejected = set()
+        if self == target or max_cells is not None and max_cells <= 1:
+            return distances
+        frontier = [self]
 
         for k in range(1, size + 1):
-            reachable.append([])
-            for cube in reachable[k - 1]:
-                neighbors = cube.neighbors()
-                for neighbor in neighbors:
-                    if neighbor not in visited and not obstacle(neighbor):
-                        visited.add(neighbor)
-                        reachable[k].append(neighbor)
-        return visited
+            next_frontier = []
+            for x, y, z in frontier:
+                for dx, dy, dz in directions:
+                    neighbor = trusted(x + dx, y + dy, z + dz)
+                    if neighbor in distances or neighbor in rejected:
+                        continue
+                    if blocked is not None and blocked(neighbor):
+                        rejected.add(neighbor)
+                        continue
+                    distances[neighbor] = k
+                    if neighbor == target or (max_cells is not None and
+                                              len(distances) >= max_cells):
+                        return distances
+                    next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return distances
 
     def rotate_right(self, center=None, amount=1):
         """Returns the point after rotating to the right
@@ -194,17 +502,18 @@ class Cube:
 
         :param center: rotation center
         :type center: Cube
-        :param amount: amount of 60 degree rotations
+        :param amount: amount of 60 degree rotations,
+                       negative amounts rotate to the left
         :type amount: int
         :returns: Cube -- point after rotation
         """
         if center is None:
             center = Cube.origin
-        point = self - center
-        for i in range(amount):
-            x, y, z = point
-            point = Cube(-z, -x, -y)
-        return point + center
+        cx, cy, cz = center
+        point = (self[0] - cx, self[1] - cy, self[2] - cz)
+        (i0, i1, i2), sign = _ROTATIONS[amount % 6]
+        return Cube._trusted(sign * point[i0] + cx, sign * point[i1] + cy,
+                             sign * point[i2] + cz)
 
     def rotate_left(self, center=None, amount=1):
         """Returns the point after rotating to the left
@@ -214,17 +523,34 @@ class Cube:
 
         :param center: rotation center
         :type center: Cube
-        :param amount: amount of 60 degree rotations
+        :param amount: amount of 60 degree rotations,
+                       negative amounts rotate to the right
         :type amount: int
         :returns: Cube -- point after rotation
         """
+        return self.rotate_right(center, -amount)
+
+    def reflect(self, axis='x', center=None):
+        """Returns the point after reflecting across an axis
+
+        The reflection keeps the coordinate of the axis (relative to
+        the center) and swaps the other two.
+
+        :param axis: the axis of reflection, 'x', 'y' or 'z'
+        :type axis: str
+        :param center: a point in the axis of reflection
+                       (defaults to origin)
+        :type center: Cube
+        :returns: Cube -- point after reflection
+        """
+        if axis not in _REFLECTIONS:
+            raise ValueError(f'Invalid axis {axis!r}, use x, y or z')
         if center is None:
             center = Cube.origin
-        point = self - center
-        for i in range(amount):
-            x, y, z = point
-            point = Cube(-y, -z, -x)
-        return point + center
+        cx, cy, cz = center
+        point = (self[0] - cx, self[1] - cy, self[2] - cz)
+        i0, i1, i2 = _REFLECTIONS[axis]
+        return Cube._trusted(point[i0] + cx, point[i1] + cy, point[i2] + cz)
 
     def circumference(self, radius):
         """Returns the circumference around this point
@@ -233,18 +559,32 @@ class Cube:
         :type radius: int
         :returns: iterable of Cube -- the ring
         """
-        current = set()
-        first = radius
-        for second in range(-radius, 1):
-            third = -(first + second)
-            for perm in permutations([first, second, third]):
-                current.add(self + Cube(*perm))
-        first = -radius
-        for second in range(0, radius + 1):
-            third = -(first + second)
-            for perm in permutations([first, second, third]):
-                current.add(self + Cube(*perm))
-        return current
+        return set(self.ring(radius))
+
+    def ring(self, radius):
+        """The hexagons at a fixed distance from this point, in order
+
+        Starts at the hexagon radius steps in the direction of the
+        first neighbor, then walks counterclock-wise around the ring,
+        so ring(1) has the same order as :func:`Cube.neighbors`.
+
+        :param radius: the fixed distance from the center
+        :type radius: int
+        :returns: iterable of Cube -- the ring
+        """
+        return _translate(self, _ring_offsets(radius))
+
+    def spiral(self, radius):
+        """The hexagons within a distance from this point, ring by ring
+
+        Starts with this point, followed by :func:`Cube.ring`
+        with radius 1, 2, and so on.
+
+        :param radius: the maximum distance from the center
+        :type radius: int
+        :returns: iterable of Cube -- the spiral
+        """
+        return _translate(self, _spiral_offsets(radius))
 
     def arc(self, direction, size):
         """Returns the arc within a 120 degree vision
@@ -269,14 +609,17 @@ class Cube:
         :type other: Cube
         :returns: Cube -- the resulting addition
         """
-        return Cube(self.x + other.x, self.y + other.y, self.z + other.z)
+        x, y, z = self
+        ox, oy, oz = other
+        return Cube._trusted(x + ox, y + oy, z + oz)
 
     def __neg__(self):
         """Negates all coordinates
 
         :returns: Cube -- the opposing cube
         """
-        return Cube(-self.x, -self.y, -self.z)
+        x, y, z = self
+        return Cube._trusted(-x, -y, -z)
 
     def __sub__(self, other):
         """Coordinate-wise subtraction
@@ -285,7 +628,9 @@ class Cube:
         :type other: Cube
         :returns: Cube -- the resulting subtraction
         """
-        return self + (-other)
+        x, y, z = self
+        ox, oy, oz = other
+        return Cube._trusted(x - ox, y - oy, z - oz)
 
     def __mul__(self, scalar):
         """Scalar multiplication
@@ -294,39 +639,43 @@ class Cube:
         :type scalar: int or float
         :returns: Cube -- scaled coordinate
         """
-        return Cube(self.x * scalar, self.y * scalar, self.z * scalar)
+        x, y, z = self
+        return Cube._trusted(x * scalar, y * scalar, z * scalar)
+
+    __rmul__ = __mul__
 
     def __eq__(self, other):
         """Determines equality
 
+        Cubes are never equal to plain tuples or other coordinate types.
+
         :param other: object to be compared
         :type other: Cube
         :returns: bool -- True if equal and False otherwise
         """
-        return (self.x, self.y, self.z) == (other.x, other.y, other.z)
+        if isinstance(other, Cube):
+            return _tuple_eq(self, other)
+        if isinstance(other, tuple):
+            return False
+        return NotImplemented
 
-    def __hash__(self):
-        """Hash value
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
 
-        :returns: int -- hash value
-        """
-        return hash(tuple(self.__iter__()))
+    __hash__ = tuple.__hash__
+
+    __lt__ = __le__ = __gt__ = __ge__ = _unordered
 
     def __repr__(self):
         """Debugging representation
 
         :returns: str -- readable representation
         """
-        return 'Cube({x}, {y}, {z})'.format(x=self.x, y=self.y, z=self.z)
+        return 'Cube({x}, {y}, {z})'.format(x=self[0], y=self[1], z=self[2])
 
-    def __iter__(self):
-        """Iterable of the coordinates
-
-        :returns: iterable of int or float -- the coordinates
-        """
-        yield self.x
-        yield self.y
-        yield self.z
+    def __getnewargs__(self):
+        return tuple(self)
 
 Cube.origin = Cube(0, 0, 0)
 Cube._neighbor_directions = (Cube(1, -1, 0), Cube(1, 0, -1), Cube(0, 1, -1),
@@ -337,66 +686,476 @@ Cube._epsilon = Cube(sys.float_info.epsilon, sys.float_info.epsilon,
                      -2 * sys.float_info.epsilon)
 
 
-class Axial:
+class Axial(tuple):
     """Axial coordinates for a hexagon
 
     Delegates most operations to :class:`Cube`,
     convert when needed. Axial coordinates are better
     for storage and pixel conversions
+
+    Axial coordinates are immutable and behave like a 2-tuple (q, r)
+    for unpacking, indexing and len(), but they only compare equal
+    to other axial coordinates and have no ordering.
     """
 
-    def __init__(self, q, r):
-        self._q = q
-        self._r = r
+    __slots__ = ()
 
-    @property
-    def q(self):
-        """Column coordinate
-        """
-        return self._q
+    def __new__(cls, q, r):
+        return _new(cls, (q, r))
 
-    @property
-    def r(self):
-        """Row coordinate
+    @classmethod
+    def _trusted(cls, q, r):
+        """Creates an axial coordinate, used internally by the arithmetic
+
+        :returns: Axial -- the new coordinate
         """
-        return self._r
+        return _new(cls, (q, r))
+
+    q = property(itemgetter(0), doc="""Column coordinate
+        """)
+
+    r = property(itemgetter(1), doc="""Row coordinate
+        """)
 
     def to_cube(self):
         """Converts the axial coordinate to a cube coordinate
 
         :returns: Cube -- equivalent unique cube coordinate representation
         """
-        return Cube(self.q, -(self.q + self.r), self.r)
+        q, r = self
+        return Cube._trusted(q, -(q + r), r)
+
+    def to_offset(self, layout='odd-r'):
+        """Converts the (integer) axial coordinate to offset coordinates
+
+        :param layout: one of :data:`OFFSET_LAYOUTS`
+        :type layout: str
+        :returns: Offset -- the coordinate in that layout
+        :raises: ValueError -- for unknown layouts
+        """
+        cls = _layout_type(_OFFSET_TYPES, layout)
+        q, r = self
+        if cls._rows:
+            return _new(cls, (q + ((r + cls._shift) >> 1), r))
+        return _new(cls, (q, r + ((q + cls._shift) >> 1)))
+
+    def to_doubled(self, layout='width'):
+        """Converts the (integer) axial coordinate to doubled coordinates
+
+        :param layout: one of :data:`DOUBLED_LAYOUTS`
+        :type layout: str
+        :returns: Doubled -- the coordinate in that layout
+        :raises: ValueError -- for unknown layouts
+        """
+        cls = _layout_type(_DOUBLED_TYPES, layout)
+        q, r = self
+        if cls._rows:
+            return _new(cls, (2 * q + r, r))
+        return _new(cls, (q, 2 * r + q))
+
+    def pack(self):
+        """Packs the (integer) coordinate into a single int
+
+        See :func:`pack`
+
+        :returns: int -- the packed coordinate
+        """
+        return pack(self[0], self[1])
+
+    @staticmethod
+    def unpack(key):
+        """Creates the axial coordinate from a packed int
+
+        :param key: value returned by :func:`Axial.pack`
+        :type key: int
+        :returns: Axial -- the unpacked coordinate
+        """
+        return Axial._trusted(*unpack(key))
 
     def neighbors(self):
         """The neighbor hexagons, assuming infinite grid
 
         :returns: iterable of Axial -- the neighbors
         """
-        return(map(lambda d: Axial(self.q + d.q, self.r + d.r),
-                   Axial._neighbor_directions))
-
-    def __eq__(self, other):
-        return (self.q, self.r) == (other.q, other.r)
+        q, r = self
+        return (Axial._trusted(q + dq, r + dr)
+                for dq, dr in Axial._neighbor_directions)
 
     def __add__(self, other):
-        return Axial(self.q + other.q, self.r + other.r)
+        q, r = self
+        dq, dr = other
+        return Axial._trusted(q + dq, r + dr)
 
     def __neg__(self):
-        return Axial(-self.q, -self.r)
+        q, r = self
+        return Axial._trusted(-q, -r)
 
     def __sub__(self, other):
-        return self + (-other)
+        q, r = self
+        dq, dr = other
+        return Axial._trusted(q - dq, r - dr)
 
-    def __repr__(self):
-        return 'Axial({q}, {r})'.format(q=self.q, r=self.r)
+    def __mul__(self, scalar):
+        """Axial coordinates have no scalar multiplication,
+        this prevents the tuple repetition from being used instead
+        """
+        return NotImplemented
 
-    def __iter__(self):
-        yield self.q
-        yield self.r
+    __rmul__ = __mul__
 
-    def __hash__(self):
-        return hash(self.to_cube())
+    def __eq__(self, other):
+        if isinstance(other, Axial):
+            return _tuple_eq(self, other)
+        if isinstance(other, tuple):
+            return False
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = tuple.__hash__
+
+    __lt__ = __le__ = __gt__ = __ge__ = _unordered
+
+    def __repr__(self):
+        return 'Axial({q}, {r})'.format(q=self[0], r=self[1])
+
+    def __getnewargs__(self):
+        return tuple(self)
 
 Axial._neighbor_directions = tuple(map(Cube.to_axial,
                                        Cube._neighbor_directions))
+
+
+OFFSET_LAYOUTS = ('odd-r', 'even-r', 'odd-q', 'even-q')
+DOUBLED_LAYOUTS = ('width', 'height')
+
+
+def _layout_type(types, layout):
+    """The coordinate class of a layout
+
+    :raises: ValueError -- for unknown layouts
+    """
+    try:
+        return types[layout]
+    except KeyError:
+        raise ValueError(f'Unknown layout {layout!r}') from None
+
+
+def _no_arithmetic(self, other):
+    """Grid coordinates have no arithmetic, convert them to Axial or Cube;
+    this also prevents the tuple concatenation and repetition
+    """
+    return NotImplemented
+
+
+class _GridCoordinate(tuple):
+    """Common behavior of the rectangular (col, row) coordinate systems
+
+    Each layout has its own subclass, so the layout is known without
+    storing it in every coordinate.
+    """
+
+    __slots__ = ()
+
+    # Name of the layout, whether it is a rows layout (pointy hexagons),
+    # and the public class of the coordinate system
+    layout = None
+    _rows = True
+    _base = None
+
+    col = property(itemgetter(0), doc="""Column coordinate
+        """)
+
+    row = property(itemgetter(1), doc="""Row coordinate
+        """)
+
+    def to_cube(self):
+        """Converts the coordinate to a cube coordinate
+
+        :returns: Cube -- equivalent unique cube coordinate representation
+        """
+        return self.to_axial().to_cube()
+
+    def __eq__(self, other):
+        if type(other) is type(self):
+            return _tuple_eq(self, other)
+        if isinstance(other, tuple):
+            return False
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = tuple.__hash__
+
+    __lt__ = __le__ = __gt__ = __ge__ = _unordered
+
+    __add__ = __radd__ = __mul__ = __rmul__ = _no_arithmetic
+
+    def __repr__(self):
+        return '{name}({col}, {row}, {layout!r})'.format(
+            name=self._base.__name__, col=self[0], row=self[1],
+            layout=self.layout)
+
+    def __reduce__(self):
+        return (self._base, (self[0], self[1], self.layout))
+
+
+class Offset(_GridCoordinate):
+    """Offset coordinates for a hexagon, as used by rectangular maps
+
+    The (col, row) of a rectangle of hexagons, as in tile editors.
+    In the 'odd-r' and 'even-r' layouts (pointy hexagons) the odd or even
+    rows are shoved half a hexagon right; in the 'odd-q' and 'even-q'
+    layouts (flat hexagons) the odd or even columns are shoved half
+    a hexagon down.
+
+    Offset coordinates are immutable and behave like a 2-tuple (col, row)
+    for unpacking, indexing and len(), but they only compare equal to
+    offset coordinates of the same layout, have no ordering and no
+    arithmetic: convert them to :class:`Axial` or :class:`Cube` first.
+    Conversions need int coordinates.
+    """
+
+    __slots__ = ()
+
+    _shift = 0
+
+    def __new__(cls, col, row, layout='odd-r'):
+        """Creates a new immutable offset coordinate
+
+        :param col: column coordinate
+        :type col: int
+        :param row: row coordinate
+        :type row: int
+        :param layout: one of :data:`OFFSET_LAYOUTS`
+        :type layout: str
+        :raises: ValueError -- for unknown layouts
+        """
+        return _new(_layout_type(_OFFSET_TYPES, layout), (col, row))
+
+    def to_axial(self):
+        """Converts the offset coordinate to an axial coordinate
+
+        :returns: Axial -- the unique corresponding axial coordinate
+        """
+        col, row = self
+        if self._rows:
+            return Axial._trusted(col - ((row + self._shift) >> 1), row)
+        return Axial._trusted(col, row - ((col + self._shift) >> 1))
+
+
+class Doubled(_GridCoordinate):
+    """Doubled coordinates for a hexagon
+
+    In the 'width' layout (pointy hexagons) the column advances by 2
+    between horizontal neighbors, in the 'height' layout (flat hexagons)
+    the row advances by 2 between vertical neighbors; so col + row
+    is always even.
+
+    Doubled coordinates are immutable and behave like a 2-tuple
+    (col, row), with the same restrictions as :class:`Offset`.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, col, row, layout='width'):
+        """Creates a new immutable doubled coordinate
+
+        :param col: column coordinate
+        :type col: int
+        :param row: row coordinate
+        :type row: int
+        :param layout: one of :data:`DOUBLED_LAYOUTS`
+        :type layout: str
+        :raises: ValueError -- for unknown layouts, and if col + row is odd
+        """
+        if (col + row) % 2 != 0:
+            raise ValueError(f'Doubled ({col}, {row}) must have an even '
+                             f'col + row')
+        return _new(_layout_type(_DOUBLED_TYPES, layout), (col, row))
+
+    def to_axial(self):
+        """Converts the doubled coordinate to an axial coordinate
+
+        :returns: Axial -- the unique corresponding axial coordinate
+        """
+        col, row = self
+        if self._rows:
+            return Axial._trusted((col - row) >> 1, row)
+        return Axial._trusted(col, (row - col) >> 1)
+
+
+def _layout_types(base, layouts):
+    """One subclass of a grid coordinate class per layout"""
+    types = {}
+    for layout in layouts:
+        attributes = {'__slots__': (), 'layout': layout,
+                      '_rows': layout.endswith('r') or layout == 'width',
+                      '_shift': 1 if layout.startswith('even') else 0,
+                      '_base': base,
+                      '__module__': __name__}
+        types[layout] = type(base.__name__, (base,), attributes)
+    return types
+
+
+_OFFSET_TYPES = _layout_types(Offset, OFFSET_LAYOUTS)
+_DOUBLED_TYPES = _layout_types(Doubled, DOUBLED_LAYOUTS)
+
+
+class Transform:
+    """Composition of rotations, reflections and translations
+
+    Every transform is stored in closed form, as a signed permutation
+    of the coordinates followed by a translation, so applying it costs
+    the same no matter how many operations were composed.
+    Transforms are immutable, the builder methods return new transforms.
+    """
+
+    def __init__(self, permutation=(0, 1, 2), sign=1, offset=(0, 0, 0)):
+        """Creates a new transform, the identity by default
+
+        The transform maps a point p to
+        sign * (p[permutation[0]], p[permutation[1]], p[permutation[2]])
+        + offset
+
+        :param permutation: indexes of the coordinates
+        :type permutation: tuple of int
+        :param sign: 1 or -1
+        :type sign: int
+        :param offset: translation applied last
+        :type offset: Cube or tuple of int
+        """
+        self._permutation = tuple(permutation)
+        self._sign = sign
+        self._offset = Cube(*offset)
+
+    @classmethod
+    def rotation(cls, amount=1, center=None):
+        """Rotation of amount 60 degree steps to the right
+
+        See :func:`Cube.rotate_right`
+
+        :returns: Transform
+        """
+        permutation, sign = _ROTATIONS[amount % 6]
+        return cls._around(permutation, sign, center)
+
+    @classmethod
+    def reflection(cls, axis='x', center=None):
+        """Reflection across an axis
+
+        See :func:`Cube.reflect`
+
+        :returns: Transform
+        """
+        if axis not in _REFLECTIONS:
+            raise ValueError(f'Invalid axis {axis!r}, use x, y or z')
+        return cls._around(_REFLECTIONS[axis], 1, center)
+
+    @classmethod
+    def translation(cls, offset):
+        """Translation by a fixed offset
+
+        :returns: Transform
+        """
+        return cls(offset=offset)
+
+    @classmethod
+    def _around(cls, permutation, sign, center):
+        """Linear transform moved to keep center fixed"""
+        linear = cls(permutation, sign)
+        if center is None:
+            return linear
+        return linear.then(cls(offset=center - linear(center)))
+
+    def then(self, other):
+        """Composition, applying self first and other afterwards
+
+        :param other: transform applied to the result of self
+        :type other: Transform
+        :returns: Transform
+        """
+        permutation = tuple(self._permutation[i] for i in other._permutation)
+        return Transform(permutation, self._sign * other._sign,
+                         other(self._offset))
+
+    def rotate(self, amount=1, center=None):
+        """This transform followed by a rotation to the right
+
+        :returns: Transform
+        """
+        return self.then(Transform.rotation(amount, center))
+
+    def reflect(self, axis='x', center=None):
+        """This transform followed by a reflection
+
+        :returns: Transform
+        """
+        return self.then(Transform.reflection(axis, center))
+
+    def translate(self, offset):
+        """This transform followed by a translation
+
+        :returns: Transform
+        """
+        return self.then(Transform.translation(offset))
+
+    def __call__(self, cube):
+        """Applies the transform to a single point
+
+        :param cube: the point
+        :type cube: Cube
+        :returns: Cube -- the transformed point
+        """
+        i0, i1, i2 = self._permutation
+        sign = self._sign
+        ox, oy, oz = self._offset
+        return Cube._trusted(sign * cube[i0] + ox, sign * cube[i1] + oy,
+                             sign * cube[i2] + oz)
+
+    def apply(self, shape):
+        """Applies the transform to every point of a shape
+
+        :param shape: the points
+        :type shape: iterable of Cube
+        :returns: list of Cube -- the transformed points, in the same order
+        """
+        i0, i1, i2 = self._permutation
+        sign = self._sign
+        ox, oy, oz = self._offset
+        trusted = Cube._trusted
+        return [trusted(sign * c[i0] + ox, sign * c[i1] + oy,
+                        sign * c[i2] + oz) for c in shape]
+
+    def apply_array(self, batch):
+        """Applies the transform to a whole batch at once
+
+        :param batch: the points
+        :type batch: hexagons.arrays.CubeArray
+        :returns: hexagons.arrays.CubeArray -- the transformed points
+        """
+        columns = (batch.x, batch.y, batch.z)
+        i0, i1, i2 = self._permutation
+        permuted = type(batch)(columns[i0], columns[i1], columns[i2],
+                               validate=False)
+        if self._sign != 1:
+            permuted = -permuted
+        return permuted + self._offset
+
+    def __eq__(self, other):
+        if not isinstance(other, Transform):
+            return NotImplemented
+        return ((self._permutation, self._sign, self._offset) ==
+                (other._permutation, other._sign, other._offset))
+
+    def __hash__(self):
+        return hash((self._permutation, self._sign, self._offset))
+
+    def __repr__(self):
+        return 'Transform({p}, {s}, {o})'.format(p=self._permutation,
+                                                 s=self._sign,
+                                                 o=tuple(self._offset))
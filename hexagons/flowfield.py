@@ -0,0 +1,166 @@
+"""
+.. module:: flowfield
+    :synopsis: Distance and direction fields toward many goals
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+A flow field is computed once by a multi-source Dijkstra from the goals,
+over every hexagon of a :class:`hexagons.maps.HexMap` of costs. Then any
+number of units find their next step with a single lookup, instead of
+searching a path each.
+"""
+
+
+import array
+from heapq import heappush, heappop
+from math import inf
+from hexagons.arrays import AxialArray
+from hexagons.coordinate import Axial, Cube
+from hexagons.maps import HexMap
+
+
+class FlowField:
+    """Cheapest cost to the nearest goal, and the step toward it,
+    for every hexagon of a bounded map
+
+    :attr:`distance` and :attr:`direction` are HexMaps with the shape of
+    the costs, backed by :mod:`array` columns. A direction is the index
+    of the neighbor to step into, in the order of
+    ``Cube._neighbor_directions`` (and :func:`Cube.neighbors`), or -1 for
+    goals and for hexagons that cannot reach any goal.
+    """
+
+    def __init__(self, costs, goals):
+        """Computes the field
+
+        :param costs: cost of entering each hexagon; hexagons with an
+                      infinite or negative cost are impassable
+        :type costs: HexMap
+        :param goals: the hexagons to be reached, outside ones are ignored
+        :type goals: iterable of Axial or Cube
+        """
+        self.costs = costs
+        size = len(costs)
+        coords = AxialArray.from_axials(list(costs.coords()))
+        self._neighbors = [array.array('q', costs.indexes(coords + step))
+                           for step in Axial._neighbor_directions]
+        self.distance = HexMap(costs.spec, data=array.array('d', [inf]) * size)
+        self.direction = HexMap(costs.spec, data=array.array('b', [-1]) * size)
+        self.regenerate(goals)
+
+    def regenerate(self, goals=None):
+        """Computes the whole field again
+
+        :param goals: the new goals, the same ones if None
+        :type goals: iterable of Axial or Cube
+        """
+        if goals is not None:
+            indexes = (self.costs.index(goal) for goal in goals)
+            self.goals = {index for index in indexes if index is not None}
+        self._cost = self.costs.data.tolist()
+        distance, direction = self.distance.data, self.direction.data
+        distance[:] = array.array('d', [inf]) * len(distance)
+        direction[:] = array.array('b', [-1]) * len(direction)
+        frontier = []
+        for goal in self.goals:
+            distance[goal] = 0
+            heappush(frontier, (0, goal))
+        self._spread(frontier)
+
+    def _blocked(self, index):
+        cost = self._cost[index]
+        return cost < 0 or cost == inf
+
+    def _spread(self, frontier):
+        """Dijkstra from the hexagons in the frontier, toward their
+        neighbors (the opposite way units walk)
+        """
+        distance, direction = self.distance.data, self.direction.data
+        neighbors = self._neighbors
+        cost = self._cost
+        while frontier:
+            steps, index = heappop(frontier)
+            if steps > distance[index] or self._blocked(index):
+                continue
+            total = steps + cost[index]
+            for side in range(6):
+                neighbor = neighbors[side][index]
+                if neighbor < 0 or total >= distance[neighbor]:
+                    continue
+                if self._blocked(neighbor) and neighbor not in self.goals:
+                    continue
+                distance[neighbor] = total
+                direction[neighbor] = (side + 3) % 6
+                heappush(frontier, (total, neighbor))
+
+    def update(self, changed):
+        """Recomputes the field around hexagons whose cost changed
+
+        Only the hexagons whose cheapest path entered a hexagon that got
+        more expensive, and the ones that can now get cheaper,
+        are searched again.
+
+        :param changed: the hexagons whose cost changed in the costs map
+        :type changed: iterable of Axial or Cube
+        """
+        distance, direction = self.distance.data, self.direction.data
+        neighbors = self._neighbors
+        changed = {index for index in map(self.costs.index, changed)
+                   if index is not None}
+        # Hexagons that entered a more expensive hexagon, and the ones that
+        # entered those, and so on, no longer have a valid distance
+        pending = []
+        for index in changed:
+            before = self._cost[index]
+            self._cost[index] = self.costs.data[index]
+            if self._blocked(index) and index not in self.goals:
+                distance[index] = inf
+                direction[index] = -1
+            if self._blocked(index) or self._cost[index] > before:
+                pending.append(index)
+        invalid = set()
+        while pending:
+            index = pending.pop()
+            for side in range(6):
+                neighbor = neighbors[side][index]
+                if (neighbor >= 0 and neighbor not in invalid and
+                        direction[neighbor] == (side + 3) % 6):
+                    invalid.add(neighbor)
+                    pending.append(neighbor)
+        for index in invalid:
+            distance[index] = inf
+            direction[index] = -1
+
+        # Every reachable neighbor of an invalid or changed hexagon
+        # may now give it (or the changed hexagon itself) a better path
+        frontier = []
+        for index in invalid | changed:
+            for side in range(6):
+                neighbor = neighbors[side][index]
+                if neighbor >= 0 and distance[neighbor] < inf:
+                    heappush(frontier, (distance[neighbor], neighbor))
+            if distance[index] < inf:
+                heappush(frontier, (distance[index], index))
+        self._spread(frontier)
+
+    def next_step(self, coord):
+        """The neighbor to step into, toward the nearest goal
+
+        :param coord: the current hexagon
+        :type coord: Axial or Cube
+        :returns: Axial or Cube (same type as coord), or None for goals,
+                  for hexagons that cannot reach a goal and for hexagons
+                  outside the map
+        """
+        index = self.costs.index(coord)
+        if index is None:
+            return None
+        side = self.direction.data[index]
+        if side < 0:
+            return None
+        steps = (Cube._neighbor_directions if len(coord) == 3
+                 else Axial._neighbor_directions)
+        return coord + steps[side]
+
+    def __repr__(self):
+        return f'FlowField({self.costs.spec}, {len(self.goals)} goals)'
@@ -6,14 +6,72 @@
 """
 
 
+from array import array
 from collections import namedtuple
+from functools import lru_cache
 from math import sqrt, floor, pi, cos, sin
-from hexagons.coordinate import Axial
+from hexagons.coordinate import Axial, Cube
+from hexagons.arrays import AxialArray
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
 
 
 Hex = namedtuple('Hex', ['axiscoord', 'pixelcenter', 'pixelcorners'])
 
 
+def _pixel_offset(hex_format, hex_size, qcoord, rcoord):
+    """Pixel distance from the hexagon (0, 0) to the hexagon (q, r)
+
+    Works on single coordinates or on NumPy arrays.
+
+    :returns: 2-tuple of float
+    """
+    if hex_format == 'flat':
+        return (hex_size * 3 / 2 * qcoord,
+                hex_size * sqrt(3) * (rcoord + qcoord / 2))
+    return (hex_size * sqrt(3) * (qcoord + rcoord / 2),
+            hex_size * 3 / 2 * rcoord)
+
+
+def _fractional_axial(hex_format, hex_size, pixelx, pixely):
+    """Inverse of :func:`_pixel_offset`, before rounding to a hexagon
+
+    Works on single floats or on NumPy arrays.
+
+    :returns: 2-tuple of float -- the fractional (q, r)
+    """
+    if hex_format == 'flat':
+        hexq = pixelx * (2 / 3) / hex_size
+        hexr = ((-pixelx / 3) + (sqrt(3) / 3) * pixely) / hex_size
+    else:
+        hexq = (pixelx * (sqrt(3) / 3) - (pixely / 3)) / hex_size
+        hexr = pixely * ((2 / 3) / hex_size)
+    return hexq, hexr
+
+
+@lru_cache(maxsize=32)
+def _hexagon_geometry(size, hex_size, hex_format):
+    """Geometry of a grid relative to its center hexagon
+
+    Only depends on the grid and hexagon sizes and the format,
+    so it is shared by every position of the grid.
+
+    :returns: tuple -- the axial offsets of the hexagons (in the order of
+              :func:`Cube.circle_around`), their pixel center offsets and
+              the six pixel corner offsets shared by every hexagon
+    """
+    axial = tuple(p.to_axial() for p in Cube.origin.circle_around(size))
+    centers = tuple(_pixel_offset(hex_format, hex_size, q, r)
+                    for q, r in axial)
+    corner_function = (HexagonGrid._flat_corners if hex_format == 'flat'
+                       else HexagonGrid._pointy_corners)
+    corners = tuple(corner_function((0, 0), hex_size))
+    return axial, centers, corners
+
+
 class HexagonGrid:
     """Hexagonal grid of hexagonal tiles
 
@@ -118,6 +176,7 @@ class HexagonGrid:
         self.window_size = window_size
         self.hex_format = hex_format
         self.topleft_corner = Axial(-self.size, -self.size)
+        self._hexagons = None
         self.move_center(center_hex)
 
     def move_center(self, new_center):
@@ -129,12 +188,8 @@ class HexagonGrid:
         self.center_hex = new_center
         window_x = window_y = self.window_size / 2
         offset_center = new_center - self.topleft_corner
-        if self.hex_format == 'flat':
-            pixelx = self.hex_size * 3 / 2 * offset_center.q
-            pixely = self.hex_size * sqrt(3) * (offset_center.r + offset_center.q / 2)
-        else:
-            pixelx = self.hex_size * sqrt(3) * (offset_center.q + offset_center.r / 2)
-            pixely = self.hex_size * 3 / 2 * offset_center.r
+        pixelx, pixely = _pixel_offset(self.hex_format, self.hex_size,
+                                       *offset_center)
         self.xoffset = window_x - pixelx
         self.yoffset = window_y - pixely
 
@@ -155,13 +210,47 @@ class HexagonGrid:
 
         Hexagons are represented by triplets containing the axial coordinate,
         the center pixel (a 2-tuple), and the corner pixels (a 6-tuple of 2-tuples)
+
+        The list is cached until the grid is moved or resized. The geometry
+        relative to the center is shared by every position of the grid,
+        so moving only translates it.
+        """
+        key = (self.center_hex, self.size, self.hex_size, self.hex_format,
+               self.xoffset, self.yoffset)
+        if self._hexagons is None or self._hexagons[0] != key:
+            self._hexagons = (key, self._build_hexagons())
+        return list(self._hexagons[1])
+
+    def _build_hexagons(self):
+        """Translates the relative geometry to the current position
+
+        :returns: list of Hex
         """
-        axial = tuple(p.to_axial()
-                      for p in self.center_hex.to_cube().circle_around(self.size))
-        centers = tuple(self.get_center(coord) for coord in axial)
-        corners = tuple(tuple(self.center_to_corners(center))
-                        for center in centers)
-        return list(map(Hex, axial, centers, corners))
+        axial, centers, corners = _hexagon_geometry(self.size, self.hex_size,
+                                                    self.hex_format)
+        center = self.center_hex
+        centerx, centery = self.get_center(center)
+        hexagons = []
+        for coord, (dx, dy) in zip(axial, centers):
+            x, y = centerx + dx, centery + dy
+            hexagons.append(Hex(center + coord, (x, y),
+                                tuple((x + cx, y + cy) for cx, cy in corners)))
+        return hexagons
+
+    def relative_geometry(self):
+        """The pixel geometry of the hexagons, relative to the center hexagon
+
+        Only the returned origin depends on the position of the grid,
+        the offsets are computed once per size and format.
+
+        :returns: tuple -- the pixel center of the center hexagon, the
+                  pixel center offsets of the hexagons (in the order of
+                  :func:`HexagonGrid.hexagon_list`) and the six pixel
+                  corner offsets shared by every hexagon
+        """
+        _, centers, corners = _hexagon_geometry(self.size, self.hex_size,
+                                                self.hex_format)
+        return self.get_center(self.center_hex), centers, corners
 
     def all_centers(self, axial_points):
         """Returns the pixel centers of the axial coordinates given
@@ -177,14 +266,28 @@ class HexagonGrid:
         :returns: 2-tuple of float
         """
         offset_point = axial - self.topleft_corner
-        qcoord, rcoord = offset_point
-        if self.hex_format == 'flat':
-            centerx = self.hex_size * 3 / 2 * qcoord + self.xoffset
-            centery = self.hex_size * sqrt(3) * (rcoord + qcoord / 2) + self.yoffset
-        else:
-            centerx = self.hex_size * sqrt(3) * (qcoord + rcoord / 2) + self.xoffset
-            centery = self.hex_size * 3 / 2 * rcoord + self.yoffset
-        return (centerx, centery)
+        pixelx, pixely = _pixel_offset(self.hex_format, self.hex_size,
+                                       *offset_point)
+        return (pixelx + self.xoffset, pixely + self.yoffset)
+
+    def get_centers(self, axials):
+        """Converts a batch of axial coordinates to their pixel centers
+
+        Gives the same results as :func:`HexagonGrid.get_center`,
+        vectorized when NumPy is available.
+
+        :param axials: the coordinates
+        :type axials: AxialArray
+        :returns: tuple of column of float -- the x and y pixel columns
+        """
+        if numpy is None:
+            centers = [self.get_center(a) for a in axials]
+            return (array('d', (c[0] for c in centers)),
+                    array('d', (c[1] for c in centers)))
+        offset_points = axials - self.topleft_corner
+        pixelx, pixely = _pixel_offset(self.hex_format, self.hex_size,
+                                       offset_points.q, offset_points.r)
+        return (pixelx + self.xoffset, pixely + self.yoffset)
 
     def center_to_corners(self, center):
         """Converts the pixel center of a hexagon to it's pixel corners
@@ -208,18 +311,274 @@ class HexagonGrid:
         :type mousepos: tuple of float
         :returns: Axial or None
         """
-        mousex, mousey = mousepos
-        mousex = mousex - self.xoffset
-        mousey = mousey - self.yoffset
-        size = self.hex_size
-        if self.hex_format == 'flat':
-            hexq = mousex * (2 / 3) / size
-            hexr = ((-mousex / 3) + (sqrt(3) / 3) * mousey) / size
-        else:
-            hexq = (mousex * (sqrt(3) / 3) - (mousey / 3)) / size
-            hexr = mousey * ((2 / 3) / size)
-        absolute_hex = Axial(hexq, hexr).to_cube().round().to_axial()
-        offset_hex = absolute_hex + self.topleft_corner
+        offset_hex = self._nearest_hex(mousepos)
         if self.inside_boundary(offset_hex):
             return offset_hex
         return None
+
+    def _nearest_hex(self, mousepos):
+        """The hexagon in a window position, inside the grid or not
+
+        :returns: Axial
+        """
+        mousex, mousey = mousepos
+        hexq, hexr = _fractional_axial(self.hex_format, self.hex_size,
+                                       mousex - self.xoffset,
+                                       mousey - self.yoffset)
+        absolute_hex = Axial(hexq, hexr).to_cube().round().to_axial()
+        return absolute_hex + self.topleft_corner
+
+    def clicked_hexes(self, mousex, mousey):
+        """Gets the hexagons in a batch of window positions
+
+        Gives the same results as :func:`HexagonGrid.clicked_hex`,
+        vectorized when NumPy is available. Positions outside the grid
+        still get their (outside) hexagon, with False in the mask.
+
+        :param mousex: x of the positions
+        :type mousex: column of float
+        :param mousey: y of the positions
+        :type mousey: column of float
+        :returns: tuple -- the AxialArray of hexagons and a column of bool,
+                  True for the positions inside the grid
+        """
+        if numpy is None:
+            hexes = [self._nearest_hex(p) for p in zip(mousex, mousey)]
+            return (AxialArray.from_axials(hexes),
+                    array('b', map(self.inside_boundary, hexes)))
+        hexq, hexr = _fractional_axial(self.hex_format, self.hex_size,
+                                       numpy.asarray(mousex) - self.xoffset,
+                                       numpy.asarray(mousey) - self.yoffset)
+        absolute_hexes = AxialArray(hexq, hexr).to_cube().round().to_axial()
+        hexes = absolute_hexes + self.topleft_corner
+        offsets = hexes - self.center_hex
+        coordq, coordr = offsets.q, offsets.r
+        inside = ((numpy.abs(coordq + coordr) <= self.size) &
+                  (numpy.abs(coordq) <= self.size) &
+                  (numpy.abs(coordr) <= self.size))
+        return hexes, inside
+
+
+class Viewport:
+    """Rectangular window over an unbounded grid of hexagonal tiles
+
+    Unlike :class:`HexagonGrid`, the window can have any width and height,
+    and the hexagons can be zoomed in and out. Only the hexagons
+    intersecting the window are visible; they are computed from the pixel
+    bounds of the window, so the work is proportional to the visible
+    hexagons however big the map is.
+    """
+
+    def __init__(self, width, height, center_hex, hex_format='pointy',
+                 hex_size=20, zoom=1, contains=None):
+        """Creates a new viewport
+
+        :param width: pixels in the window width
+        :type width: float
+        :param height: pixels in the window height
+        :type height: float
+        :param center_hex: axial coordinate of the hex in the window center
+        :type center_hex: Axial
+        :param hex_format: either 'flat' or 'pointy'
+        :type hex_format: str
+        :param hex_size: size of the hexagons at zoom 1, in pixels
+        :type hex_size: float
+        :param zoom: scale of the hexagons
+        :type zoom: float
+        :param contains: function returning False for the axial coordinates
+                         outside the map, which are never visible
+        :type contains: callable
+        """
+        self.width = width
+        self.height = height
+        self.hex_format = hex_format
+        self.hex_size = hex_size
+        self.zoom = zoom
+        self.contains = contains
+        self._hexagons = None
+        self.move_center(center_hex)
+
+    @property
+    def scaled_size(self):
+        """Size of the hexagons on the screen, in pixels"""
+        return self.hex_size * self.zoom
+
+    def move_center(self, new_center):
+        """Sets the hex in the center of the window
+
+        :param new_center: coordinate of the center of the window
+        :type new_center: Axial
+        """
+        self.center_hex = new_center
+
+    def _origin(self):
+        """Pixel center of the hexagon (0, 0)
+
+        :returns: 2-tuple of float
+        """
+        pixelx, pixely = _pixel_offset(self.hex_format, self.scaled_size,
+                                       *self.center_hex)
+        return (self.width / 2 - pixelx, self.height / 2 - pixely)
+
+    def _intersects(self, pixelx, pixely):
+        """Checks if the hexagon centered in a pixel overlaps the window
+
+        Separating axis test between the window and the hexagon,
+        in the pointy orientation (flat hexagons are mirrored
+        over the diagonal before calling it). Only touching
+        the border of the window does not count as overlapping.
+        """
+        size = self.scaled_size
+        width, height = self.width, self.height
+        if self.hex_format == 'flat':
+            pixelx, pixely, width, height = pixely, pixelx, height, width
+        apothem = size * sqrt(3) / 2
+        if not (-apothem < pixelx < width + apothem and
+                -size < pixely < height + size):
+            return False
+        slanted = pixely * sqrt(3) / 2
+        rising = pixelx / 2 + slanted
+        falling = -pixelx / 2 + slanted
+        return (-apothem < rising < width / 2 + height * sqrt(3) / 2 + apothem
+                and -width / 2 - apothem < falling < height * sqrt(3) / 2 +
+                apothem)
+
+    def visible_hexes(self):
+        """The axial coordinates of the hexagons intersecting the window
+
+        Only the rows (columns, for flat hexagons) crossing the window
+        are walked, and in each one only the hexagons between its
+        left and right (top and bottom) borders.
+
+        :returns: list of Axial -- row by row (column by column)
+        """
+        size = self.scaled_size
+        originx, originy = self._origin()
+        width, height = self.width, self.height
+        flat = self.hex_format == 'flat'
+        if flat:
+            originx, originy, width, height = originy, originx, height, width
+        step = size * 3 / 2
+        across = size * sqrt(3)
+        trusted = Axial._trusted
+        contains = self.contains
+        visible = []
+        for major in range(floor((-size - originy) / step),
+                           floor((height + size - originy) / step) + 1):
+            pixely = originy + step * major
+            base = originx + across * major / 2
+            for minor in range(floor((-across / 2 - base) / across),
+                               floor((width + across / 2 - base) / across) + 1):
+                pixelx = base + across * minor
+                if flat:
+                    if not self._intersects(pixely, pixelx):
+                        continue
+                    coord = trusted(major, minor)
+                else:
+                    if not self._intersects(pixelx, pixely):
+                        continue
+                    coord = trusted(minor, major)
+                if contains is None or contains(coord):
+                    visible.append(coord)
+        return visible
+
+    def inside_boundary(self, coord):
+        """Checks if a given axial coordinate is visible in the window
+
+        :param coord: coordinate to be tested against the window
+        :type coord: Axial
+        :returns: bool - True if visible, False otherwise
+        """
+        if self.contains is not None and not self.contains(coord):
+            return False
+        return self._intersects(*self.get_center(coord))
+
+    def hexagon_list(self):
+        """A sequence of the visible hexagons
+
+        Same representation as :func:`HexagonGrid.hexagon_list`,
+        in the order of :func:`Viewport.visible_hexes`.
+        The list is cached until the viewport is moved, resized or zoomed.
+        """
+        key = (self.center_hex, self.width, self.height, self.hex_size,
+               self.zoom, self.hex_format, self.contains)
+        if self._hexagons is None or self._hexagons[0] != key:
+            self._hexagons = (key, self._build_hexagons())
+        return list(self._hexagons[1])
+
+    def _build_hexagons(self):
+        """Places the visible hexagons on the window
+
+        :returns: list of Hex
+        """
+        corners = tuple(self.center_to_corners((0, 0)))
+        hexagons = []
+        for coord in self.visible_hexes():
+            x, y = self.get_center(coord)
+            hexagons.append(Hex(coord, (x, y),
+                                tuple((x + cx, y + cy) for cx, cy in corners)))
+        return hexagons
+
+    def relative_geometry(self):
+        """The pixel geometry of the visible hexagons,
+        see :func:`HexagonGrid.relative_geometry`
+
+        The centers are given relative to the top left of the window.
+
+        :returns: tuple -- the origin (0, 0), the pixel centers of the
+                  hexagons (in the order of :func:`Viewport.hexagon_list`)
+                  and the six pixel corner offsets shared by every hexagon
+        """
+        centers = tuple(center for _, center, _ in self.hexagon_list())
+        return (0.0, 0.0), centers, tuple(self.center_to_corners((0, 0)))
+
+    def all_centers(self, axial_points):
+        """Returns the pixel centers of the axial coordinates given
+
+        Each center is represented as a 2-tuple of floats (pixels)
+        """
+        for point in axial_points:
+            yield self.get_center(point)
+
+    def get_center(self, axial):
+        """Converts an axial coordinate to it's pixel center
+
+        :returns: 2-tuple of float
+        """
+        originx, originy = self._origin()
+        pixelx, pixely = _pixel_offset(self.hex_format, self.scaled_size,
+                                       *axial)
+        return (pixelx + originx, pixely + originy)
+
+    def center_to_corners(self, center):
+        """Converts the pixel center of a hexagon to it's pixel corners
+        """
+        corner_function = (HexagonGrid._flat_corners if self.hex_format == 'flat'
+                           else HexagonGrid._pointy_corners)
+        return corner_function(center, self.scaled_size)
+
+    def coord_to_corners(self, axial):
+        """Converts an axial coordinate to it's pixel corners
+        """
+        return self.center_to_corners(self.get_center(axial))
+
+    def clicked_hex(self, mousepos):
+        """Gets the hexagon clicked
+
+        Returns None if the position is outside the window
+        or on a hexagon outside the map.
+
+        :param mousepos: point clicked in the window
+        :type mousepos: tuple of float
+        :returns: Axial or None
+        """
+        mousex, mousey = mousepos
+        if not (0 <= mousex < self.width and 0 <= mousey < self.height):
+            return None
+        originx, originy = self._origin()
+        hexq, hexr = _fractional_axial(self.hex_format, self.scaled_size,
+                                       mousex - originx, mousey - originy)
+        coord = Axial(hexq, hexr).to_cube().round().to_axial()
+        if self.contains is not None and not self.contains(coord):
+            return None
+        return coord
@@ -0,0 +1,235 @@
+"""
+.. module:: instrument
+    :synopsis: Opt-in counters and timers for the hot paths
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Instrumentation is switched on by :func:`enable`, or by setting the
+``HEXAGONS_INSTRUMENT`` environment variable before importing
+:mod:`hexagons`. It replaces the instrumented methods and functions
+with counting and timing wrappers, and :func:`disable` puts the
+originals back: while disabled, the library runs its own code
+untouched, so instrumentation costs nothing.
+
+:func:`snapshot` gives the statistics gathered so far:
+
+* constructions of Cube and Axial (checked or trusted), and the
+  x+y+z=0 validations of Cube, with their failures;
+* cache hits and misses of :func:`HexagonGrid.hexagon_list` and
+  :func:`Viewport.hexagon_list`;
+* calls to the obstacle (impassable, opaque) callbacks given to the
+  searches, per search and in total;
+* number of calls and total time of the major public methods, such as
+  :func:`Cube.floodfill`, :func:`HexagonGrid.clicked_hex` or
+  :func:`hexagons.pathfinding.astar`.
+
+Functions are also replaced where other modules of the package imported
+them by name, but references held elsewhere before enabling are not.
+"""
+
+
+import inspect
+import os
+import sys
+from collections import Counter
+from functools import wraps
+from time import perf_counter
+from hexagons import pathfinding, visibility
+from hexagons.coordinate import Axial, Cube, obstacle_function
+from hexagons.flowfield import FlowField
+from hexagons.grid import HexagonGrid, Viewport
+from hexagons.reachability import Reachability
+from hexagons.spatial import SpatialIndex
+
+ENVIRONMENT_VARIABLE = 'HEXAGONS_INSTRUMENT'
+
+# Major public methods and functions, timed when enabled
+TIMED = ((Cube, 'floodfill'), (Cube, 'distance_map'), (Cube, 'circumference'),
+         (HexagonGrid, 'hexagon_list'), (HexagonGrid, 'clicked_hex'),
+         (Viewport, 'hexagon_list'), (Viewport, 'visible_hexes'),
+         (Viewport, 'clicked_hex'),
+         (Reachability, 'move_origin'), (Reachability, 'changed'),
+         (FlowField, 'regenerate'), (FlowField, 'update'),
+         (SpatialIndex, 'within'), (SpatialIndex, 'nearest'),
+         (pathfinding, 'astar'), (pathfinding, 'dijkstra'),
+         (visibility, 'field_of_view'), (visibility, 'ray_fan'))
+
+# Obstacle callback arguments, counted when enabled
+CALLBACKS = ((Cube, 'distance_map', 'obstacle'),
+             (Reachability, '__init__', 'obstacle'),
+             (pathfinding, 'astar', 'impassable'),
+             (pathfinding, 'dijkstra', 'impassable'),
+             (visibility, 'field_of_view', 'opaque'),
+             (visibility, 'ray_fan', 'opaque'))
+
+_counters = Counter()
+_timers = {}
+# (owner, name, original, wrapper) of every replaced attribute
+_replaced = []
+
+
+def enabled():
+    """Checks if the instrumentation is switched on
+
+    :returns: bool
+    """
+    return bool(_replaced)
+
+
+def enable():
+    """Switches the instrumentation on, keeping the statistics so far"""
+    if enabled():
+        return
+    wrappers = {}
+    for owner, name, parameter in CALLBACKS:
+        wrappers[owner, name] = _counting_callback(
+            _original(owner, name, wrappers), parameter)
+    for owner, name in TIMED:
+        wrappers[owner, name] = _timed(_original(owner, name, wrappers))
+    for owner in (HexagonGrid, Viewport):
+        wrappers[owner, 'hexagon_list'] = _cached(
+            _original(owner, 'hexagon_list', wrappers), owner.__name__)
+        wrappers[owner, '_build_hexagons'] = _counted(
+            owner._build_hexagons, f'{owner.__name__}.hexagon_list.misses')
+    wrappers[Cube, '__new__'] = staticmethod(_validated(Cube.__new__))
+    wrappers[Axial, '__new__'] = staticmethod(_counted(
+        Axial.__new__, 'Axial.constructions'))
+    for owner in (Cube, Axial):
+        wrappers[owner, '_trusted'] = classmethod(_counted(
+            owner._trusted.__func__, f'{owner.__name__}.constructions',
+            f'{owner.__name__}.trusted_constructions'))
+    for (owner, name), wrapper in wrappers.items():
+        _replace(owner, name, wrapper)
+
+
+def disable():
+    """Switches the instrumentation off, keeping the statistics so far"""
+    while _replaced:
+        owner, name, original, wrapper = _replaced.pop()
+        owners = [owner]
+        if inspect.ismodule(owner):
+            owners = _package_modules(name, wrapper)
+        for each in owners:
+            setattr(each, name, original)
+
+
+def reset():
+    """Clears the statistics"""
+    _counters.clear()
+    _timers.clear()
+
+
+def snapshot():
+    """The statistics gathered so far
+
+    :returns: dict -- 'enabled' (bool), 'counters' (maps names to int)
+              and 'timers' (maps names of methods and functions to a dict
+              with their 'calls' and total 'seconds')
+    """
+    return {'enabled': enabled(),
+            'counters': dict(_counters),
+            'timers': {name: {'calls': calls, 'seconds': seconds}
+                       for name, (calls, seconds) in _timers.items()}}
+
+
+def _original(owner, name, wrappers):
+    """The attribute to be wrapped, possibly already wrapped once"""
+    return wrappers.get((owner, name), getattr(owner, name))
+
+
+def _package_modules(name, value):
+    """The modules of the package with an attribute set to a value"""
+    return [module for module_name, module in list(sys.modules.items())
+            if module_name.split('.')[0] == 'hexagons' and
+            module is not None and getattr(module, name, None) is value]
+
+
+def _replace(owner, name, wrapper):
+    """Replaces an attribute, and the same function imported by name
+    in the other modules of the package
+    """
+    original = owner.__dict__[name]
+    _replaced.append((owner, name, original, wrapper))
+    owners = [owner]
+    if inspect.ismodule(owner):
+        owners = _package_modules(name, original)
+    for each in owners:
+        setattr(each, name, wrapper)
+
+
+def _counted(function, *names):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        for name in names:
+            _counters[name] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def _validated(new):
+    @wraps(new)
+    def wrapper(cls, *args, **kwargs):
+        _counters['Cube.validations'] += 1
+        try:
+            cube = new(cls, *args, **kwargs)
+        except ValueError:
+            _counters['Cube.validation_failures'] += 1
+            raise
+        _counters['Cube.constructions'] += 1
+        return cube
+    return wrapper
+
+
+def _cached(hexagon_list, owner_name):
+    """Counts the hits of a hexagon_list: calls without a rebuild"""
+    misses = f'{owner_name}.hexagon_list.misses'
+    hits = f'{owner_name}.hexagon_list.hits'
+
+    @wraps(hexagon_list)
+    def wrapper(self):
+        before = _counters[misses]
+        hexagons = hexagon_list(self)
+        if _counters[misses] == before:
+            _counters[hits] += 1
+        return hexagons
+    return wrapper
+
+
+def _timed(function):
+    name = function.__qualname__
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            timer = _timers.setdefault(name, [0, 0.0])
+            timer[0] += 1
+            timer[1] += elapsed
+    return wrapper
+
+
+def _counting_callback(function, parameter):
+    """Wraps the obstacle argument of a function with a counting one"""
+    signature = inspect.signature(function)
+    name = f'{function.__qualname__}.{parameter}'
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        test = obstacle_function(bound.arguments.get(parameter))
+        if test is not None:
+
+            def counting(coord, test=test):
+                _counters[name] += 1
+                _counters['obstacle_callbacks'] += 1
+                return test(coord)
+            bound.arguments[parameter] = counting
+        return function(*bound.args, **bound.kwargs)
+    return wrapper
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    enable()
@@ -0,0 +1,648 @@
+"""
+.. module:: maps
+    :synopsis: Dense per-hexagon storage for bounded grids
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+A map stores one value per hexagon of a bounded shape in a single flat
+column, and finds the position of a coordinate with an O(1) formula
+instead of hashing coordinate objects. Unbounded worlds are tiled into
+such maps, allocated only where something is written.
+NumPy is used when available, otherwise the standard :mod:`array`
+module is used as a (slower) fallback.
+"""
+
+
+import array
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
+from hexagons.coordinate import Axial, Doubled, Offset, OFFSET_LAYOUTS
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+
+def _split(coord):
+    """The axial (q, r) of an Axial, Cube, Offset or Doubled coordinate
+
+    :returns: 2-tuple of int
+    """
+    if len(coord) == 3:
+        return coord[0], coord[2]
+    if isinstance(coord, (Offset, Doubled)):
+        coord = coord.to_axial()
+    return coord[0], coord[1]
+
+
+def _is_ndarray(column):
+    """Checks if a column is stored in NumPy (or in a Python buffer)"""
+    return numpy is not None and isinstance(column, numpy.ndarray)
+
+
+def _typecode(column):
+    """The :mod:`array` typecode of an array.array or memoryview column"""
+    return getattr(column, 'typecode', None) or column.format
+
+
+class _HexagonIndex:
+    """Hexagon of a given radius around a center, stored row by row"""
+
+    def __init__(self, radius, center):
+        self.radius = radius
+        self.center = Axial(*center)
+        self.spec = ('hexagon', radius, *self.center)
+        self.row_start = []
+        start = 0
+        for dr in range(-radius, radius + 1):
+            self.row_start.append(start)
+            start += 2 * radius + 1 - abs(dr)
+        self.size = start
+        cq, cr = self.center
+        self.bounds = (cq - radius, cr - radius, cq + radius, cr + radius)
+
+    def index(self, q, r):
+        radius = self.radius
+        dq, dr = q - self.center[0], r - self.center[1]
+        if abs(dq) > radius or abs(dr) > radius or abs(dq + dr) > radius:
+            return None
+        return self.row_start[dr + radius] + dq - max(-radius, -radius - dr)
+
+    def indexes(self, q, r):
+        radius = self.radius
+        dq, dr = q - self.center[0], r - self.center[1]
+        inside = ((numpy.abs(dq) <= radius) & (numpy.abs(dr) <= radius) &
+                  (numpy.abs(dq + dr) <= radius))
+        rows = numpy.clip(dr + radius, 0, 2 * radius)
+        found = (numpy.asarray(self.row_start)[rows] + dq -
+                 numpy.maximum(-radius, -radius - dr))
+        return numpy.where(inside, found, -1)
+
+    def coord(self, index):
+        row = bisect_right(self.row_start, index) - 1
+        dr = row - self.radius
+        dq = index - self.row_start[row] + max(-self.radius, -self.radius - dr)
+        return Axial._trusted(self.center[0] + dq, self.center[1] + dr)
+
+    def coords(self):
+        radius = self.radius
+        cq, cr = self.center
+        trusted = Axial._trusted
+        for dr in range(-radius, radius + 1):
+            r = cr + dr
+            for dq in range(max(-radius, -radius - dr),
+                            min(radius, radius - dr) + 1):
+                yield trusted(cq + dq, r)
+
+
+class _ParallelogramIndex:
+    """Parallelogram of width by height hexagons, stored row by row"""
+
+    def __init__(self, width, height, origin):
+        self.width = width
+        self.height = height
+        self.origin = Axial(*origin)
+        self.spec = ('parallelogram', width, height, *self.origin)
+        self.size = width * height
+        oq, orow = self.origin
+        self.bounds = (oq, orow, oq + width - 1, orow + height - 1)
+
+    def index(self, q, r):
+        dq, dr = q - self.origin[0], r - self.origin[1]
+        if 0 <= dq < self.width and 0 <= dr < self.height:
+            return dr * self.width + dq
+        return None
+
+    def indexes(self, q, r):
+        dq, dr = q - self.origin[0], r - self.origin[1]
+        inside = (dq >= 0) & (dq < self.width) & (dr >= 0) & (dr < self.height)
+        return numpy.where(inside, dr * self.width + dq, -1)
+
+    def coord(self, index):
+        dr, dq = divmod(index, self.width)
+        return Axial._trusted(self.origin[0] + dq, self.origin[1] + dr)
+
+    def coords(self):
+        oq, orow = self.origin
+        trusted = Axial._trusted
+        for r in range(orow, orow + self.height):
+            for q in range(oq, oq + self.width):
+                yield trusted(q, r)
+
+
+class _RectangleIndex:
+    """Rectangle of width columns by height rows in an offset layout
+
+    Columns and rows start at 0, and are stored row by row.
+    The 'odd-r'/'even-r' layouts shove odd/even rows of pointy hexagons
+    right, the 'odd-q'/'even-q' layouts shove odd/even columns
+    of flat hexagons down.
+    """
+
+    def __init__(self, width, height, layout):
+        if layout not in OFFSET_LAYOUTS:
+            raise ValueError(f'Unknown offset layout {layout!r}')
+        self.width = width
+        self.height = height
+        self.layout = layout
+        self.spec = ('rectangle', width, height, layout)
+        self.size = width * height
+        self.shift = 1 if layout.startswith('even') else 0
+        if layout.endswith('r'):
+            last = (height - 1 + self.shift) >> 1
+            self.bounds = (-last, 0, width - 1, height - 1)
+        else:
+            last = (width - 1 + self.shift) >> 1
+            self.bounds = (0, -last, width - 1, height - 1)
+
+    def _offset(self, q, r):
+        """Column and row of an axial coordinate (ints or NumPy arrays)"""
+        if self.layout.endswith('r'):
+            return q + ((r + self.shift) >> 1), r
+        return q, r + ((q + self.shift) >> 1)
+
+    def index(self, q, r):
+        col, row = self._offset(q, r)
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return row * self.width + col
+        return None
+
+    def indexes(self, q, r):
+        col, row = self._offset(q, r)
+        inside = ((col >= 0) & (col < self.width) &
+                  (row >= 0) & (row < self.height))
+        return numpy.where(inside, row * self.width + col, -1)
+
+    def coord(self, index):
+        row, col = divmod(index, self.width)
+        if self.layout.endswith('r'):
+            return Axial._trusted(col - ((row + self.shift) >> 1), row)
+        return Axial._trusted(col, row - ((col + self.shift) >> 1))
+
+    def coords(self):
+        trusted = Axial._trusted
+        shift = self.shift
+        columns = range(self.width)
+        if self.layout.endswith('r'):
+            for row in range(self.height):
+                start = (row + shift) >> 1
+                for col in columns:
+                    yield trusted(col - start, row)
+        else:
+            starts = [(col + shift) >> 1 for col in columns]
+            for row in range(self.height):
+                for col in columns:
+                    yield trusted(col, row - starts[col])
+
+
+_INDEXES = {
+    'hexagon': _HexagonIndex,
+    'parallelogram': _ParallelogramIndex,
+    'rectangle': _RectangleIndex,
+}
+
+
+class HexMap:
+    """One value per hexagon of a bounded grid
+
+    Values are stored in a single flat column (:attr:`data`) in the order
+    of :func:`HexMap.coords`. Coordinates can be Axial or Cube, and also
+    Offset or Doubled (converted to Axial). A rectangle map is stored row
+    by row, so the :class:`hexagons.coordinate.Offset` (col, row) of its
+    layout is at row * width + col. Use the :func:`HexMap.hexagon`, :func:`HexMap.parallelogram`
+    and :func:`HexMap.rectangle` constructors.
+    """
+
+    def __init__(self, spec, dtype='d', fill=0, data=None):
+        """Creates a new map
+
+        :param spec: shape of the map, as in :attr:`HexMap.spec`
+        :type spec: tuple
+        :param dtype: type of the values, an :mod:`array` typecode
+                      (or any NumPy dtype, when NumPy is available)
+        :type dtype: str
+        :param fill: initial value of every hexagon
+        :type fill: int or float
+        :param data: existing column to be used as the storage, without
+                     copying (dtype and fill are then ignored)
+        :type data: numpy.ndarray, array.array or memoryview
+        :raises: ValueError -- if data does not have one item per hexagon
+        """
+        kind, *arguments = spec
+        if kind not in _INDEXES:
+            raise ValueError(f'Unknown map shape {kind!r}')
+        if kind != 'rectangle':
+            arguments = (*arguments[:-2], arguments[-2:])
+        self._index = _INDEXES[kind](*arguments)
+        if data is not None:
+            if len(data) != self._index.size:
+                raise ValueError(f'{len(data)} values given for a map of '
+                                 f'{self._index.size} hexagons')
+            self.data = data
+        elif numpy is not None:
+            self.data = numpy.full(self._index.size, fill, dtype=dtype)
+        else:
+            self.data = array.array(dtype, [fill]) * self._index.size
+
+    @classmethod
+    def hexagon(cls, radius, center=Axial(0, 0), dtype='d', fill=0):
+        """Map of the hexagons at most radius away from center
+
+        Same shape as :class:`hexagons.grid.HexagonGrid`.
+
+        :param radius: the radius of the map
+        :type radius: int
+        :param center: the central hexagon
+        :type center: Axial
+        :returns: HexMap
+        """
+        return cls(('hexagon', radius, *center), dtype, fill)
+
+    @classmethod
+    def parallelogram(cls, width, height, origin=Axial(0, 0), dtype='d',
+                      fill=0):
+        """Map of the hexagons with origin.q <= q < origin.q + width
+        and origin.r <= r < origin.r + height
+
+        :param width: amount of q coordinates
+        :type width: int
+        :param height: amount of r coordinates
+        :type height: int
+        :param origin: the hexagon with the smallest q and r
+        :type origin: Axial
+        :returns: HexMap
+        """
+        return cls(('parallelogram', width, height, *origin), dtype, fill)
+
+    @classmethod
+    def rectangle(cls, width, height, layout='odd-r', dtype='d', fill=0):
+        """Map of the hexagons in a rectangle of an offset layout
+
+        :param width: amount of columns
+        :type width: int
+        :param height: amount of rows
+        :type height: int
+        :param layout: one of 'odd-r', 'even-r' (pointy hexagons),
+                       'odd-q' or 'even-q' (flat hexagons), see
+                       :class:`hexagons.coordinate.Offset`
+        :type layout: str
+        :returns: HexMap
+        """
+        return cls(('rectangle', width, height, layout), dtype, fill)
+
+    @property
+    def spec(self):
+        """The shape of the map, enough to create an equal empty map
+
+        :returns: tuple -- the name of the shape and its arguments
+        """
+        return self._index.spec
+
+    @property
+    def bounds(self):
+        """Smallest and largest axial coordinates in the map
+
+        :returns: 4-tuple of int -- (min q, min r, max q, max r)
+        """
+        return self._index.bounds
+
+    def index(self, coord):
+        """Position of a coordinate in :attr:`data`
+
+        :param coord: the coordinate
+        :type coord: Axial or Cube
+        :returns: int or None -- None if the coordinate is outside the map
+        """
+        return self._index.index(*_split(coord))
+
+    def indexes(self, axials):
+        """Positions of a batch of coordinates in :attr:`data`
+
+        :param axials: the coordinates
+        :type axials: AxialArray
+        :returns: column of int -- -1 for the coordinates outside the map
+        """
+        if numpy is None:
+            return array.array('q', (-1 if i is None else i for i in
+                                     map(self._index.index, axials.q, axials.r)))
+        return self._index.indexes(axials.q, axials.r)
+
+    def coord(self, index):
+        """Inverse of :func:`HexMap.index`
+
+        :param index: position in :attr:`data`
+        :type index: int
+        :returns: Axial
+        :raises: IndexError -- if the position is outside the map
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f'{index} is outside the map')
+        return self._index.coord(index)
+
+    def coords(self):
+        """All coordinates in the map, in the order of :attr:`data`
+
+        :returns: iterable of Axial
+        """
+        return self._index.coords()
+
+    def items(self):
+        """All hexagons of the map and their values
+
+        :returns: iterable of tuple -- (Axial, value) pairs
+        """
+        return zip(self._index.coords(), self.data.tolist())
+
+    def get(self, coord, default=None):
+        """Value of a coordinate, or default if it is outside the map"""
+        index = self._index.index(*_split(coord))
+        if index is None:
+            return default
+        return self.data[index]
+
+    def fill(self, value, coords=None):
+        """Sets the value of many hexagons
+
+        :param value: the new value
+        :type value: int or float
+        :param coords: the hexagons to be changed, every hexagon if None
+        :type coords: iterable of Axial or Cube
+        :raises: KeyError -- if a coordinate is outside the map
+        """
+        if coords is None:
+            if _is_ndarray(self.data):
+                self.data.fill(value)
+            else:
+                self.data[:] = array.array(_typecode(self.data),
+                                           [value]) * len(self.data)
+            return
+        for coord in coords:
+            self[coord] = value
+
+    def where(self, condition):
+        """Coordinates of the hexagons satisfying a condition
+
+        :param condition: either a value to be compared with, or a function
+                          receiving a value and returning a bool; for NumPy
+                          data it receives the whole column instead, so it
+                          must be made of element-wise operations (like
+                          ``lambda v: v > 3``)
+        :type condition: callable or int or float
+        :returns: list of Axial -- in the order of :attr:`data`
+        """
+        coord = self._index.coord
+        if _is_ndarray(self.data):
+            mask = (condition(self.data) if callable(condition)
+                    else self.data == condition)
+            return [coord(i) for i in numpy.flatnonzero(mask).tolist()]
+        if not callable(condition):
+            value = condition
+
+            def condition(element):
+                return element == value
+        return [coord(i) for i, v in enumerate(self.data) if condition(v)]
+
+    def copy(self):
+        """Map with the same shape and a copy of the values
+
+        :returns: HexMap
+        """
+        result = HexMap.__new__(HexMap)
+        result._index = self._index
+        if _is_ndarray(self.data):
+            result.data = self.data.copy()
+        else:
+            result.data = array.array(_typecode(self.data), self.data)
+        return result
+
+    def obstacle_test(self):
+        """Uses the map as a bitmap of obstacles
+
+        Makes the map usable wherever obstacles are accepted, see
+        :func:`hexagons.coordinate.obstacle_function`. Note that ``in``
+        tells the hexagons inside the map, not the obstacles.
+
+        :returns: callable -- returns True for the hexagons with a true
+                  value, and for the hexagons outside the map
+        """
+        index, data = self._index.index, self.data
+
+        def test(coord):
+            position = index(*_split(coord))
+            return position is None or bool(data[position])
+        return test
+
+    def __contains__(self, coord):
+        return self._index.index(*_split(coord)) is not None
+
+    def __getitem__(self, coord):
+        index = self._index.index(*_split(coord))
+        if index is None:
+            raise KeyError(coord)
+        return self.data[index]
+
+    def __setitem__(self, coord, value):
+        index = self._index.index(*_split(coord))
+        if index is None:
+            raise KeyError(coord)
+        self.data[index] = value
+
+    def __len__(self):
+        return self._index.size
+
+    def __iter__(self):
+        return self._index.coords()
+
+    def __repr__(self):
+        return f'HexMap{self.spec}'
+
+
+class ChunkedMap:
+    """One value per hexagon of an unbounded grid, stored in chunks
+
+    The axial plane is tiled into parallelograms of chunk_size by
+    chunk_size hexagons, each one a :class:`HexMap` allocated on the first
+    write inside it. Hexagons of chunks never written have the fill value.
+
+    When max_chunks is set, the least recently used chunks are evicted
+    (handed to spill, if given) to keep at most that many in memory,
+    and load is asked for a chunk before a new one is allocated.
+    """
+
+    def __init__(self, chunk_size=32, dtype='d', fill=0, max_chunks=None,
+                 spill=None, load=None):
+        """Creates a new empty map
+
+        :param chunk_size: hexagons in each side of a chunk
+        :type chunk_size: int
+        :param dtype: type of the values, see :class:`HexMap`
+        :type dtype: str
+        :param fill: value of the hexagons never written
+        :type fill: int or float
+        :param max_chunks: most chunks kept in memory, unlimited if None
+        :type max_chunks: int
+        :param spill: function receiving the key and the HexMap of each
+                      evicted chunk, to save it elsewhere
+        :type spill: callable
+        :param load: function receiving the key of a chunk not in memory,
+                     and returning its HexMap or None if it has none
+        :type load: callable
+        :raises: ValueError -- if max_chunks is less than 1, as the chunk
+                 being written must stay in memory
+        """
+        if max_chunks is not None and max_chunks < 1:
+            raise ValueError('max_chunks must be at least 1, '
+                             f'not {max_chunks}')
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+        self.fill_value = fill
+        self.max_chunks = max_chunks
+        self.spill = spill
+        self.load = load
+        self._chunks = OrderedDict()
+
+    def chunk_key(self, coord):
+        """Key of the chunk containing a coordinate
+
+        :param coord: the coordinate
+        :type coord: Axial or Cube
+        :returns: 2-tuple of int -- the chunk column and row
+        """
+        q, r = _split(coord)
+        return (q // self.chunk_size, r // self.chunk_size)
+
+    def resident_chunks(self):
+        """Keys of the chunks in memory, least recently used first
+
+        :returns: list of 2-tuple of int
+        """
+        return list(self._chunks)
+
+    def chunk(self, key, create=False):
+        """The HexMap of a chunk, loading or allocating it if needed
+
+        :param key: the chunk key, see :func:`ChunkedMap.chunk_key`
+        :type key: 2-tuple of int
+        :param create: allocates the chunk if it is not found
+        :type create: bool
+        :returns: HexMap or None -- None if the chunk has never been written
+        """
+        chunks = self._chunks
+        found = chunks.get(key)
+        if found is not None:
+            chunks.move_to_end(key)
+            return found
+        if self.load is not None:
+            found = self.load(key)
+        if found is None:
+            if not create:
+                return None
+            size = self.chunk_size
+            found = HexMap.parallelogram(
+                size, size, Axial._trusted(key[0] * size, key[1] * size),
+                self.dtype, self.fill_value)
+        chunks[key] = found
+        self._evict()
+        return found
+
+    def _evict(self):
+        """Drops the least recently used chunks over max_chunks"""
+        if self.max_chunks is None:
+            return
+        while len(self._chunks) > self.max_chunks:
+            key, evicted = self._chunks.popitem(last=False)
+            if self.spill is not None:
+                self.spill(key, evicted)
+
+    def evict(self, key):
+        """Removes a chunk from memory, handing it to spill
+
+        :param key: the chunk key
+        :type key: 2-tuple of int
+        """
+        evicted = self._chunks.pop(key, None)
+        if evicted is not None and self.spill is not None:
+            self.spill(key, evicted)
+
+    def _locate(self, coords):
+        """Groups coordinates by chunk
+
+        :returns: dict -- chunk key to a list of (position in coords,
+                  index in the chunk) pairs
+        """
+        size = self.chunk_size
+        groups = defaultdict(list)
+        for position, coord in enumerate(coords):
+            q, r = _split(coord)
+            groups[(q // size, r // size)].append(
+                (position, (r % size) * size + q % size))
+        return groups
+
+    def __getitem__(self, coord):
+        q, r = _split(coord)
+        size = self.chunk_size
+        found = self.chunk((q // size, r // size))
+        if found is None:
+            return self.fill_value
+        return found.data[(r % size) * size + q % size]
+
+    get = __getitem__
+
+    def obstacle_test(self):
+        """Uses the map as a bitmap of obstacles,
+        see :func:`HexMap.obstacle_test`
+
+        :returns: callable -- returns True for the hexagons with a true value
+        """
+        return lambda coord: bool(self[coord])
+
+    def __setitem__(self, coord, value):
+        q, r = _split(coord)
+        size = self.chunk_size
+        found = self.chunk((q // size, r // size), create=True)
+        found.data[(r % size) * size + q % size] = value
+
+    def values(self, coords):
+        """Values of a region, looked up chunk by chunk
+
+        :param coords: the hexagons in the region, for example
+                       the result of :func:`Cube.circle_around`
+        :type coords: iterable of Axial or Cube
+        :returns: list -- the values, in the order of coords
+        """
+        coords = list(coords)
+        result = [self.fill_value] * len(coords)
+        for key, entries in self._locate(coords).items():
+            found = self.chunk(key)
+            if found is None:
+                continue
+            data = found.data
+            for position, index in entries:
+                result[position] = data[index]
+        return result
+
+    def fill(self, value, coords):
+        """Sets the value of a region, chunk by chunk
+
+        :param value: the new value
+        :type value: int or float
+        :param coords: the hexagons in the region
+        :type coords: iterable of Axial or Cube
+        """
+        for key, entries in self._locate(coords).items():
+            data = self.chunk(key, create=True).data
+            for _, index in entries:
+                data[index] = value
+
+    def items(self):
+        """All hexagons of the chunks in memory and their values
+
+        :returns: iterable of tuple -- (Axial, value) pairs
+        """
+        for found in list(self._chunks.values()):
+            yield from found.items()
+
+    def __repr__(self):
+        return (f'ChunkedMap(chunk_size={self.chunk_size}, '
+                f'{len(self._chunks)} chunks)')
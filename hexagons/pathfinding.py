@@ -0,0 +1,158 @@
+"""
+.. module:: pathfinding
+    :synopsis: Weighted shortest paths between cube coordinates
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Neighbors are built with the unchecked cube constructor and used
+directly as (x, y, z) tuple keys, so no validation or conversion
+happens in the inner loop.
+"""
+
+
+from heapq import heappush, heappop
+from itertools import count
+from hexagons.coordinate import Cube
+
+
+def _step_function(cost):
+    """Normalizes the accepted cost arguments into a callable
+
+    :param cost: None (every step costs 1), a mapping from Cube to the cost
+                 of entering it (missing cells are impassable) or a callable
+                 receiving the Cube entered
+    :returns: callable -- returns the cost of entering a cube, or None
+              if the cube cannot be entered
+    """
+    if cost is None:
+        return None
+    if callable(cost):
+        return cost
+    return cost.get
+
+
+def _search(start, is_goal, heuristic, cost, impassable, max_cost, max_nodes,
+            min_step_cost):
+    """Best-first search shared by :func:`astar` and :func:`dijkstra`
+
+    :returns: tuple or None -- (path, cost) to the first goal reached
+    :raises: ValueError -- if a step costs less than min_step_cost
+    """
+    step = _step_function(cost)
+    trusted = Cube._trusted
+    directions = Cube._neighbor_directions
+    counter = count()
+    best = {start: 0}
+    came_from = {start: None}
+    closed = set()
+    frontier = [(heuristic(start), next(counter), 0, start)]
+    expanded = 0
+
+    while frontier:
+        _, _, current_cost, current = heappop(frontier)
+        if current in closed:
+            continue
+        if is_goal(current):
+            path = []
+            while current is not None:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            return path, current_cost
+        if max_nodes is not None and expanded >= max_nodes:
+            return None
+        closed.add(current)
+        expanded += 1
+
+        x, y, z = current
+        for dx, dy, dz in directions:
+            neighbor = trusted(x + dx, y + dy, z + dz)
+            if neighbor in closed:
+                continue
+            if impassable is not None and impassable(neighbor):
+                continue
+            if step is None:
+                new_cost = current_cost + 1
+            else:
+                step_cost = step(neighbor)
+                if step_cost is None:
+                    continue
+                if step_cost < min_step_cost:
+                    raise ValueError(f'Step into {neighbor} costs {step_cost}, '
+                                     f'less than the minimum {min_step_cost}')
+                new_cost = current_cost + step_cost
+            if max_cost is not None and new_cost > max_cost:
+                continue
+            if new_cost < best.get(neighbor, new_cost + 1):
+                best[neighbor] = new_cost
+                came_from[neighbor] = current
+                heappush(frontier, (new_cost + heuristic(neighbor),
+                                    next(counter), new_cost, neighbor))
+    return None
+
+
+def astar(start, goal, cost=None, impassable=None, max_cost=None,
+          max_nodes=None, min_step_cost=1):
+    """Finds the cheapest path between two hexagons using A*
+
+    The heuristic is :func:`Cube.distance` scaled by min_step_cost,
+    so the path is optimal as long as no step is cheaper than it.
+
+    .. note:: The grid is infinite, so an unreachable goal is only
+              detected when the search is bounded, either by the cost
+              argument (a mapping) or by max_cost/max_nodes.
+
+    :param start: first hexagon of the path
+    :type start: Cube
+    :param goal: last hexagon of the path
+    :type goal: Cube
+    :param cost: cost of entering each hexagon, either a mapping from Cube
+                 to cost (missing hexagons are impassable) or a callable
+                 receiving the Cube (returning None means impassable);
+                 defaults to 1 for every step
+    :type cost: callable or mapping
+    :param impassable: function returning True for hexagons that cannot
+                       be entered
+    :type impassable: callable
+    :param max_cost: paths costing more than this are not considered
+    :type max_cost: int or float
+    :param max_nodes: gives up instead of expanding more than this
+                      many hexagons
+    :type max_nodes: int
+    :param min_step_cost: lower bound of the cost of a single step
+    :type min_step_cost: int or float
+    :raises: ValueError -- if a step costs less than min_step_cost
+    :returns: tuple or None -- (path, cost) where path is a list of Cube
+              from start to goal (both included), or None if there is
+              no path within the budget
+    """
+    gx, gy, gz = goal
+
+    def heuristic(cube):
+        x, y, z = cube
+        return max(abs(x - gx), abs(y - gy), abs(z - gz)) * min_step_cost
+
+    return _search(Cube._trusted(*start), goal.__eq__, heuristic, cost,
+                   impassable, max_cost, max_nodes, min_step_cost)
+
+
+def dijkstra(start, goals, cost=None, impassable=None, max_cost=None,
+             max_nodes=None):
+    """Finds the cheapest path from a hexagon to the nearest of many goals
+
+    Same arguments as :func:`astar`, but without a heuristic,
+    so any number of goals can be searched at once.
+
+    :param start: first hexagon of the path
+    :type start: Cube
+    :param goals: acceptable last hexagons of the path
+    :type goals: iterable of Cube
+    :returns: tuple or None -- (path, cost) to the cheapest goal,
+              or None if no goal is reachable within the budget
+    :raises: ValueError -- if a step has a negative cost
+    """
+    goals = frozenset(goals)
+    if not goals:
+        return None
+    return _search(Cube._trusted(*start), goals.__contains__,
+                   lambda cube: 0, cost, impassable, max_cost, max_nodes, 0)
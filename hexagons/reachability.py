@@ -0,0 +1,215 @@
+"""
+.. module:: reachability
+    :synopsis: Movement ranges kept up to date as obstacles change
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Dynamic breadth-first search: when cells are blocked, only the cells
+whose every shortest path went through them are taken out and searched
+again; when cells are unblocked, only the cells that got closer are
+visited. Both cost time proportional to the affected area.
+"""
+
+
+from hexagons.coordinate import Cube, obstacle_function
+
+
+class Reachability:
+    """The hexagons reachable from an origin within a budget of steps
+
+    Holds the same distances as :func:`Cube.distance_map` without target
+    or max_cells. The obstacle function is asked about each hexagon only
+    once: when obstacles change, the changed hexagons must be given
+    to :func:`Reachability.changed`.
+    """
+
+    def __init__(self, origin, budget, obstacle=None):
+        """Computes the reachable hexagons
+
+        :param origin: the starting hexagon, never considered an obstacle
+        :type origin: Cube
+        :param budget: the maximum number of steps from the origin
+        :type budget: int
+        :param obstacle: function returning True for obstacle coordinates,
+                         a set of obstacles (such as a set of Cube) or a
+                         bitmap, see
+                         :func:`hexagons.coordinate.obstacle_function`
+        :type obstacle: callable, set or bitmap
+        """
+        self.budget = budget
+        self._obstacle = obstacle_function(obstacle)
+        self._known = {}
+        self._distances = {}
+        self.move_origin(origin)
+
+    def distance(self, cube):
+        """Steps needed to reach a hexagon
+
+        :returns: int or None -- None if it is not reachable
+        """
+        return self._distances.get(cube)
+
+    def distances(self):
+        """Every reachable hexagon and its number of steps
+
+        :returns: dict -- a copy, maps Cube to int
+        """
+        return dict(self._distances)
+
+    def reachable(self):
+        """The reachable hexagons, as :func:`Cube.floodfill`
+
+        :returns: set of Cube
+        """
+        return set(self._distances)
+
+    def __contains__(self, cube):
+        return cube in self._distances
+
+    def __len__(self):
+        return len(self._distances)
+
+    def __iter__(self):
+        return iter(self._distances)
+
+    def _is_blocked(self, cube):
+        """Obstacle test, asking the obstacle function once per hexagon"""
+        blocked = self._known.get(cube)
+        if blocked is None:
+            blocked = self._known[cube] = (self._obstacle is not None and
+                                           bool(self._obstacle(cube)))
+        return blocked
+
+    def move_origin(self, origin):
+        """Moves the origin and recomputes the distances
+
+        Every distance may change, so the search is done again, but the
+        obstacle function is only asked about hexagons it was never
+        asked about before.
+
+        :param origin: the new origin
+        :type origin: Cube
+        :returns: set of Cube -- the hexagons whose distance changed
+                  (including the ones that became or stopped being
+                  reachable)
+        """
+        before = self._distances
+        self.origin = origin
+        reach = self.budget + 1
+        self._known = {cube: blocked for cube, blocked in self._known.items()
+                       if origin.distance(cube) <= reach}
+        self._distances = {origin: 0}
+        if self.budget > 0:
+            self._relax(origin.neighbors())
+        return _differences(before, self._distances)
+
+    def changed(self, cubes):
+        """Updates the distances after the obstacles changed
+
+        :param cubes: the hexagons that were blocked or unblocked
+        :type cubes: iterable of Cube
+        :returns: set of Cube -- the hexagons whose distance changed
+                  (including the ones that became or stopped being
+                  reachable)
+        """
+        distances = self._distances
+        removed, opened = [], []
+        for cube in set(cubes):
+            self._known.pop(cube, None)
+            if cube == self.origin:
+                continue
+            if self._is_blocked(cube):
+                if cube in distances:
+                    removed.append(cube)
+            elif cube not in distances:
+                opened.append(cube)
+        affected = self._affected(removed)
+        before = {cube: distances.pop(cube) for cube in affected}
+        seeds = [cube for cube in affected if not self._known.get(cube)]
+        for cube in self._relax(seeds + opened):
+            before.setdefault(cube, None)
+        return {cube for cube, old in before.items()
+                if distances.get(cube) != old}
+
+    def _affected(self, removed):
+        """The hexagons that lose every shortest path when some are removed
+
+        A hexagon keeps its distance d as long as a neighbor at distance
+        d - 1 keeps its own, so candidates are checked in increasing
+        order of distance, starting next to the removed hexagons.
+
+        :returns: set of Cube -- the removed and affected hexagons
+        """
+        distances = self._distances
+        directions = Cube._neighbor_directions
+        trusted = Cube._trusted
+        affected = set(removed)
+        if not removed:
+            return affected
+        buckets = [[] for _ in range(self.budget + 2)]
+        for cube in removed:
+            buckets[distances[cube]].append(cube)
+        for depth in range(min(map(distances.get, removed)), self.budget + 1):
+            for cube in buckets[depth]:
+                x, y, z = cube
+                neighbors = [trusted(x + dx, y + dy, z + dz)
+                             for dx, dy, dz in directions]
+                if cube not in affected:
+                    if any(distances.get(n) == depth - 1 and n not in affected
+                           for n in neighbors):
+                        continue
+                    affected.add(cube)
+                for neighbor in neighbors:
+                    if distances.get(neighbor) == depth + 1:
+                        buckets[depth + 1].append(neighbor)
+        return affected
+
+    def _relax(self, seeds):
+        """Lowers distances starting from some unblocked hexagons
+
+        Each seed starts one step after its closest reachable neighbor,
+        then improvements spread in increasing order of distance.
+
+        :returns: list of Cube -- the hexagons whose distance was lowered
+        """
+        distances = self._distances
+        directions = Cube._neighbor_directions
+        trusted = Cube._trusted
+        budget = self.budget
+        buckets = [[] for _ in range(budget + 1)]
+        for cube in seeds:
+            if self._is_blocked(cube):
+                continue
+            x, y, z = cube
+            steps = [distances[n] for n in
+                     (trusted(x + dx, y + dy, z + dz)
+                      for dx, dy, dz in directions) if n in distances]
+            if steps and min(steps) < budget:
+                buckets[min(steps) + 1].append(cube)
+        lowered = []
+        for depth in range(1, budget + 1):
+            for cube in buckets[depth]:
+                if distances.get(cube, budget + 1) <= depth:
+                    continue
+                distances[cube] = depth
+                lowered.append(cube)
+                if depth == budget:
+                    continue
+                x, y, z = cube
+                for dx, dy, dz in directions:
+                    neighbor = trusted(x + dx, y + dy, z + dz)
+                    if (distances.get(neighbor, budget + 1) > depth + 1 and
+                            not self._is_blocked(neighbor)):
+                        buckets[depth + 1].append(neighbor)
+        return lowered
+
+    def __repr__(self):
+        return (f'Reachability({self.origin!r}, {self.budget}, '
+                f'{len(self._distances)} hexagons)')
+
+
+def _differences(before, after):
+    """The keys with a different value (or missing) in two dicts"""
+    return ({cube for cube, steps in after.items()
+             if before.get(cube) != steps} |
+            {cube for cube in before if cube not in after})
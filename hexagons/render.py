@@ -0,0 +1,168 @@
+"""
+.. module:: render
+    :synopsis: Pygame drawing of a HexagonGrid, redrawing only what changed
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Each hexagon is drawn by blitting a sprite baked once per fill color,
+outline and hexagon size, and its text by blitting a glyph rendered once
+per text and color. After the first frame, only the hexagons marked
+dirty are drawn again, and :func:`HexRenderer.draw` returns the
+rectangles to be given to ``pygame.display.update``. Moving the grid
+redraws everything.
+"""
+
+
+from math import ceil, floor
+import pygame
+
+
+class HexRenderer:
+    """Draws the hexagons of a :class:`hexagons.grid.HexagonGrid`
+    on a pygame surface
+
+    The look of each hexagon comes from the fill and text functions;
+    when what they return changes, the hexagon must be given to
+    :func:`HexRenderer.mark_dirty`.
+    """
+
+    def __init__(self, surface, grid, fill, text=None, font=None,
+                 text_color=(0, 0, 0), outline=None, background=(0, 0, 0)):
+        """Creates a new renderer
+
+        :param surface: where the grid is drawn, such as the display
+        :type surface: pygame.Surface
+        :param grid: the grid drawn
+        :type grid: HexagonGrid
+        :param fill: function giving the color of an Axial coordinate
+        :type fill: callable
+        :param text: function giving the text of an Axial coordinate,
+                     None or an empty string for no text
+        :type text: callable
+        :param font: font of the texts, required if text is given
+        :type font: pygame.font.Font
+        :param text_color: color of the texts
+        :type text_color: pygame.Color or tuple
+        :param outline: color of the border of the hexagons, None for
+                        no border
+        :type outline: pygame.Color or tuple
+        :param background: color of the area outside the hexagons
+        :type background: pygame.Color or tuple
+        :raises: ValueError -- if text is given without a font
+        """
+        if text is not None and font is None:
+            raise ValueError('A font is required to draw texts')
+        self.surface = surface
+        self.grid = grid
+        self.fill = fill
+        self.text = text
+        self.font = font
+        self.text_color = text_color
+        self.outline = outline
+        self.background = background
+        self._sprites = {}
+        self._glyphs = {}
+        self._centers = {}
+        self._drawn = None
+        self._dirty = set()
+
+    def mark_dirty(self, *coords):
+        """Redraws some hexagons on the next frame
+
+        :param coords: the hexagons, ignored if outside the grid
+        :type coords: Axial
+        """
+        self._dirty.update(coords)
+
+    def invalidate(self):
+        """Redraws every hexagon on the next frame"""
+        self._drawn = None
+
+    def move_center(self, new_center):
+        """Moves the grid, see :func:`HexagonGrid.move_center`,
+        and redraws every hexagon on the next frame
+
+        :param new_center: coordinate of the center of the grid
+        :type new_center: Axial
+        """
+        self.grid.move_center(new_center)
+        self.invalidate()
+
+    def draw(self):
+        """Draws the hexagons that changed since the last frame
+
+        Everything is drawn on the first frame, and when the grid was
+        moved or resized since the last one.
+
+        :returns: list of pygame.Rect -- the areas of the surface changed
+        """
+        grid = self.grid
+        state = (grid.center_hex, grid.size, grid.hex_size, grid.hex_format,
+                 grid.xoffset, grid.yoffset)
+        if state != self._drawn:
+            self._drawn = state
+            self._dirty.clear()
+            self._centers = {coord: center
+                             for coord, center, _ in grid.hexagon_list()}
+            self.surface.fill(self.background)
+            for coord, center in self._centers.items():
+                self._draw_hex(coord, center)
+            return [self.surface.get_rect()]
+        rects = []
+        for coord in self._dirty:
+            center = self._centers.get(coord)
+            if center is not None:
+                rects.append(self._draw_hex(coord, center))
+        self._dirty.clear()
+        return rects
+
+    def _draw_hex(self, coord, center):
+        """Blits the sprite and glyph of a hexagon
+
+        :returns: pygame.Rect -- the area changed
+        """
+        sprite, left, top = self._sprite(self.fill(coord))
+        centerx, centery = center
+        rect = self.surface.blit(sprite, (floor(centerx + left),
+                                          floor(centery + top)))
+        text = self.text(coord) if self.text is not None else None
+        if text:
+            glyph = self._glyph(text)
+            self.surface.blit(glyph, glyph.get_rect(center=(round(centerx),
+                                                            round(centery))))
+        return rect
+
+    def _sprite(self, color):
+        """The hexagon sprite of a fill color at the current size
+
+        :returns: tuple -- the sprite, and the offset of its top left
+                  corner from the center of the hexagon
+        """
+        grid = self.grid
+        outline = tuple(self.outline) if self.outline is not None else None
+        key = (tuple(color), outline, grid.hex_size, grid.hex_format)
+        baked = self._sprites.get(key)
+        if baked is None:
+            corners = list(grid.center_to_corners((0, 0)))
+            left = floor(min(x for x, _ in corners))
+            top = floor(min(y for _, y in corners))
+            width = ceil(max(x for x, _ in corners)) - left + 1
+            height = ceil(max(y for _, y in corners)) - top + 1
+            sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+            points = [(x - left, y - top) for x, y in corners]
+            pygame.draw.polygon(sprite, color, points)
+            if outline is not None:
+                pygame.draw.polygon(sprite, outline, points, 1)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+            baked = self._sprites[key] = (sprite, left, top)
+        return baked
+
+    def _glyph(self, text):
+        """The rendered text, rendering it on its first use"""
+        key = (text, tuple(self.text_color))
+        glyph = self._glyphs.get(key)
+        if glyph is None:
+            glyph = self._glyphs[key] = self.font.render(text, True,
+                                                         self.text_color)
+        return glyph
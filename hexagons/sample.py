@@ -3,6 +3,7 @@
 import pygame
 from hexagons.grid import HexagonGrid
 from hexagons.coordinate import Axial
+from hexagons.render import HexRenderer
 import random
 
 
@@ -35,6 +36,8 @@ def main():
             colors[cubecoord] = random_color()
         return colors[cubecoord]
 
+    renderer = HexRenderer(display, g, lambda ax: get_color(ax.to_cube()))
+
     while running:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -45,11 +48,12 @@ def main():
                 if clicked is not None:
                     if clicked == g.center_hex:
                         colors[clicked.to_cube()] = random_color()
+                        renderer.mark_dirty(clicked)
                     else:
-                        g.move_center(clicked)
-        for ax, c, cn in g.hexagon_list():
-            pygame.draw.polygon(display, get_color(ax.to_cube()), cn)
-        pygame.display.flip()
+                        renderer.move_center(clicked)
+        changed = renderer.draw()
+        if changed:
+            pygame.display.update(changed)
 
     pygame.quit()
 
@@ -0,0 +1,368 @@
+"""
+.. module:: shapes
+    :synopsis: Lazy collections of hexagons with closed-form membership
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+A shape never stores its hexagons: membership is tested with a formula,
+and the hexagons are generated in order only when iterated.
+Shapes are combined with ``|`` (union), ``&`` (intersection)
+and ``-`` (difference).
+"""
+
+
+from hexagons.coordinate import Cube
+
+
+def _hull(*ranges):
+    """Smallest range containing every given range"""
+    return (min(r[0] for r in ranges), max(r[1] for r in ranges))
+
+
+def _overlap(*ranges):
+    """Range contained in every given range (possibly empty)"""
+    return (max(r[0] for r in ranges), min(r[1] for r in ranges))
+
+
+class Shape:
+    """A lazy collection of hexagons
+
+    Subclasses define :func:`Shape.contains`, :func:`Shape.bounds`
+    and the iteration order; the size is counted by iterating,
+    unless a subclass knows it in closed form.
+    """
+
+    def contains(self, cube):
+        """Checks if a hexagon is in the shape
+
+        :param cube: the hexagon
+        :type cube: Cube
+        :returns: bool
+        """
+        raise NotImplementedError
+
+    def bounds(self):
+        """Coordinate ranges containing every hexagon of the shape
+
+        :returns: tuple -- the (min, max) of x, of y and of z
+        """
+        raise NotImplementedError
+
+    def translate(self, offset):
+        """The same shape, moved by an offset
+
+        :param offset: vector added to every hexagon
+        :type offset: Cube
+        :returns: Translated
+        """
+        return Translated(self, offset)
+
+    def obstacle_test(self):
+        """Uses the shape as obstacles, see
+        :func:`hexagons.coordinate.obstacle_function`
+
+        :returns: callable -- :func:`Shape.contains`
+        """
+        return self.contains
+
+    def __contains__(self, cube):
+        return self.contains(cube)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    def __or__(self, other):
+        return Union(self, other)
+
+    def __and__(self, other):
+        return Intersection(self, other)
+
+    def __sub__(self, other):
+        return Difference(self, other)
+
+
+class Disk(Shape):
+    """The hexagons at most radius away from center
+
+    Iterates in the order of :func:`Cube.circle_around`.
+    """
+
+    def __init__(self, center, radius):
+        self.center = center
+        self.radius = radius
+
+    def contains(self, cube):
+        return self.center.distance(cube) <= self.radius
+
+    def bounds(self):
+        radius = self.radius
+        return tuple((c - radius, c + radius) for c in self.center)
+
+    def __len__(self):
+        radius = self.radius
+        return 3 * radius * (radius + 1) + 1 if radius >= 0 else 0
+
+    def __iter__(self):
+        return iter(self.center.circle_around(self.radius))
+
+    def __repr__(self):
+        return f'Disk({self.center!r}, {self.radius})'
+
+
+class Ring(Disk):
+    """The hexagons exactly radius away from center
+
+    Same hexagons as :func:`Cube.circumference`,
+    iterates in the order of :func:`Cube.ring`.
+    """
+
+    def contains(self, cube):
+        return self.center.distance(cube) == self.radius
+
+    def __len__(self):
+        return max(6 * self.radius, 1) if self.radius >= 0 else 0
+
+    def __iter__(self):
+        if self.radius < 0:
+            return iter(())
+        return iter(self.center.ring(self.radius))
+
+    def __repr__(self):
+        return f'Ring({self.center!r}, {self.radius})'
+
+
+class Line(Shape):
+    """The hexagons of :func:`Cube.line_to`, in order"""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.length = start.distance(end)
+
+    def contains(self, cube):
+        index = self.start.distance(cube)
+        return (index <= self.length and
+                self.start.line_point(self.end, index) == cube)
+
+    def bounds(self):
+        cells = list(self)
+        return tuple((min(c[i] for c in cells), max(c[i] for c in cells))
+                     for i in range(3))
+
+    def __len__(self):
+        return self.length + 1
+
+    def __iter__(self):
+        return iter(self.start.line_to(self.end))
+
+    def __repr__(self):
+        return f'Line({self.start!r}, {self.end!r})'
+
+
+class Cone(Shape):
+    """The hexagons at most radius away from center, within the 120 degree
+    cone facing one of its neighbors
+
+    Same region as the facing argument of
+    :func:`hexagons.visibility.field_of_view`, without obstacles.
+    Iterates in the order of :func:`Cube.circle_around`.
+    """
+
+    def __init__(self, center, facing, radius):
+        """Creates a new cone
+
+        :param center: the tip of the cone
+        :type center: Cube
+        :param facing: neighbor of center in the middle of the cone
+        :type facing: Cube
+        :param radius: the maximum distance from center
+        :type radius: int
+        :raises: ValueError -- if facing is not a neighbor of center
+        """
+        direction = facing - center
+        if direction not in Cube._neighbor_directions:
+            raise ValueError(f'{facing} is not a neighbor of {center}')
+        self.center = center
+        self.facing = facing
+        self.radius = radius
+        self._positive = direction.index(1)
+        self._negative = direction.index(-1)
+
+    def contains(self, cube):
+        offset = cube - self.center
+        return (offset[self._positive] >= 0 and offset[self._negative] <= 0
+                and self.center.distance(cube) <= self.radius)
+
+    def bounds(self):
+        return Disk(self.center, self.radius).bounds()
+
+    def __len__(self):
+        return (self.radius + 1) ** 2 if self.radius >= 0 else 0
+
+    def __iter__(self):
+        contains = self.contains
+        return (cube for cube in self.center.circle_around(self.radius)
+                if contains(cube))
+
+    def __repr__(self):
+        return f'Cone({self.center!r}, {self.facing!r}, {self.radius})'
+
+
+class Parallelogram(Shape):
+    """The hexagons with origin.x <= x < origin.x + width and
+    origin.z <= z < origin.z + height
+
+    In axial coordinates, the same region as
+    :func:`hexagons.maps.HexMap.parallelogram`, iterated in the same order.
+    """
+
+    def __init__(self, origin, width, height):
+        self.origin = origin
+        self.width = width
+        self.height = height
+
+    def contains(self, cube):
+        dx, dz = cube[0] - self.origin[0], cube[2] - self.origin[2]
+        return 0 <= dx < self.width and 0 <= dz < self.height
+
+    def bounds(self):
+        ox, _, oz = self.origin
+        high_x, high_z = ox + self.width - 1, oz + self.height - 1
+        return ((ox, high_x), (-(high_x + high_z), -(ox + oz)), (oz, high_z))
+
+    def __len__(self):
+        return max(self.width, 0) * max(self.height, 0)
+
+    def __iter__(self):
+        ox, _, oz = self.origin
+        trusted = Cube._trusted
+        for z in range(oz, oz + self.height):
+            for x in range(ox, ox + self.width):
+                yield trusted(x, -(x + z), z)
+
+    def __repr__(self):
+        return f'Parallelogram({self.origin!r}, {self.width}, {self.height})'
+
+
+class Translated(Shape):
+    """A shape moved by an offset"""
+
+    def __init__(self, shape, offset):
+        self.shape = shape
+        self.offset = offset
+
+    def contains(self, cube):
+        return self.shape.contains(cube - self.offset)
+
+    def bounds(self):
+        return tuple((low + d, high + d) for (low, high), d
+                     in zip(self.shape.bounds(), self.offset))
+
+    def __len__(self):
+        return len(self.shape)
+
+    def __iter__(self):
+        offset = self.offset
+        return (cube + offset for cube in self.shape)
+
+    def __repr__(self):
+        return f'Translated({self.shape!r}, {self.offset!r})'
+
+
+class Union(Shape):
+    """The hexagons in any of the shapes
+
+    Iterates each shape in turn, skipping the hexagons already
+    in one of the previous shapes.
+    """
+
+    def __init__(self, *shapes):
+        self.shapes = shapes
+
+    def contains(self, cube):
+        return any(shape.contains(cube) for shape in self.shapes)
+
+    def bounds(self):
+        if not self.shapes:
+            return ((0, -1),) * 3
+        return tuple(map(_hull, *(shape.bounds() for shape in self.shapes)))
+
+    def __iter__(self):
+        shapes = self.shapes
+        for i, shape in enumerate(shapes):
+            previous = shapes[:i]
+            for cube in shape:
+                if not any(other.contains(cube) for other in previous):
+                    yield cube
+
+    def __repr__(self):
+        return f'Union{self.shapes!r}'
+
+
+class Intersection(Shape):
+    """The hexagons in every one of the shapes
+
+    Iterates in the order of the first shape.
+    """
+
+    def __init__(self, first, *others):
+        self.shapes = (first, *others)
+
+    def contains(self, cube):
+        return all(shape.contains(cube) for shape in self.shapes)
+
+    def bounds(self):
+        return tuple(map(_overlap, *(shape.bounds() for shape in self.shapes)))
+
+    def __iter__(self):
+        first, *others = self.shapes
+        return (cube for cube in first
+                if all(other.contains(cube) for other in others))
+
+    def __repr__(self):
+        return f'Intersection{self.shapes!r}'
+
+
+class Difference(Shape):
+    """The hexagons in a shape, but not in another
+
+    Iterates in the order of the first shape.
+    """
+
+    def __init__(self, shape, removed):
+        self.shape = shape
+        self.removed = removed
+
+    def contains(self, cube):
+        return self.shape.contains(cube) and not self.removed.contains(cube)
+
+    def bounds(self):
+        return self.shape.bounds()
+
+    def __iter__(self):
+        removed = self.removed
+        return (cube for cube in self.shape if not removed.contains(cube))
+
+    def __repr__(self):
+        return f'Difference({self.shape!r}, {self.removed!r})'
+
+
+class Arc(Union):
+    """The hexagons of :func:`Cube.arc`
+
+    Iterates the two lines of the arc, from each horizon to the middle.
+    """
+
+    def __init__(self, center, direction, size):
+        self.center = center
+        self.direction = direction
+        self.size = size
+        horizon = (direction - center) * size
+        super().__init__(Line(horizon.rotate_left(center), horizon),
+                         Line(horizon.rotate_right(center), horizon))
+
+    def __repr__(self):
+        return f'Arc({self.center!r}, {self.direction!r}, {self.size})'
@@ -0,0 +1,248 @@
+"""
+.. module:: spatial
+    :synopsis: Spatial index of entities placed on hexagons
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Entities are bucketed by hexagon, and the occupied hexagons are bucketed
+again by coarse super-cells (parallelograms of super_size by super_size
+hexagons). A query walks either the hexagons of its shape or the
+occupied super-cells it overlaps, whichever is fewer, so it never
+looks at every entity.
+"""
+
+
+def _disk_order(cell):
+    """Sort key of the order of :func:`Cube.circle_around`"""
+    return cell[0], cell[1]
+
+
+def _ring_sorted(center, radius, cells):
+    """Hexagons of a ring, in the order of :func:`Cube.ring`
+
+    Only looks at the whole ring when there is more than one hexagon.
+    """
+    if len(cells) < 2:
+        return cells
+    order = {cell: i for i, cell in enumerate(center.ring(radius))}
+    return sorted(cells, key=order.__getitem__)
+
+
+def _distance(a, b):
+    ax, ay, az = a
+    bx, by, bz = b
+    return max(abs(ax - bx), abs(ay - by), abs(az - bz))
+
+
+class SpatialIndex:
+    """Positions of hashable entities on a grid of cube coordinates
+
+    Many entities can share the same hexagon. Results of the queries
+    list the entities hexagon by hexagon, in the order of the shape
+    (as in :func:`Cube.circle_around` or :func:`Cube.ring`), and in
+    insertion order inside a hexagon.
+    """
+
+    def __init__(self, super_size=8):
+        """Creates a new empty index
+
+        :param super_size: hexagons in each side of a super-cell
+        :type super_size: int
+        """
+        self.super_size = super_size
+        self._positions = {}
+        self._cells = {}
+        self._supers = {}
+
+    def insert(self, entity, position):
+        """Places a new entity on a hexagon
+
+        :param entity: the entity
+        :type entity: hashable
+        :param position: the hexagon
+        :type position: Cube
+        :raises: ValueError -- if the entity is already in the index
+        """
+        if entity in self._positions:
+            raise ValueError(f'{entity!r} is already in the index')
+        self._positions[entity] = position
+        cell = self._cells.get(position)
+        if cell is None:
+            cell = self._cells[position] = {}
+            size = self.super_size
+            key = (position[0] // size, position[2] // size)
+            self._supers.setdefault(key, set()).add(position)
+        cell[entity] = None
+
+    def remove(self, entity):
+        """Removes an entity from the index
+
+        :raises: KeyError -- if the entity is not in the index
+        """
+        position = self._positions.pop(entity)
+        cell = self._cells[position]
+        del cell[entity]
+        if not cell:
+            del self._cells[position]
+            size = self.super_size
+            key = (position[0] // size, position[2] // size)
+            occupied = self._supers[key]
+            occupied.discard(position)
+            if not occupied:
+                del self._supers[key]
+
+    def move(self, entity, position):
+        """Moves an entity to another hexagon
+
+        :raises: KeyError -- if the entity is not in the index
+        """
+        if self._positions[entity] != position:
+            self.remove(entity)
+            self.insert(entity, position)
+
+    def position(self, entity):
+        """The hexagon of an entity
+
+        :returns: Cube
+        :raises: KeyError -- if the entity is not in the index
+        """
+        return self._positions[entity]
+
+    def at(self, position):
+        """The entities on a hexagon
+
+        :returns: list -- in insertion order
+        """
+        return list(self._cells.get(position, ()))
+
+    def __contains__(self, entity):
+        return entity in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def _from_cells(self, cells):
+        """The entities on a sequence of hexagons"""
+        buckets = self._cells
+        found = []
+        for cell in cells:
+            bucket = buckets.get(cell)
+            if bucket:
+                found.extend(bucket)
+        return found
+
+    def _occupied_near(self, center, radius):
+        """The occupied hexagons of the super-cells overlapping a disk
+
+        :returns: iterable of tuple -- (hexagon, distance to center),
+                  unordered, for every occupied hexagon within
+                  radius of center
+        """
+        size = self.super_size
+        cx, _, cz = center
+        low_x, high_x = (cx - radius) // size, (cx + radius) // size
+        low_z, high_z = (cz - radius) // size, (cz + radius) // size
+        supers = self._supers
+        if len(supers) < (high_x - low_x + 1) * (high_z - low_z + 1):
+            keys = [key for key in supers
+                    if low_x <= key[0] <= high_x and low_z <= key[1] <= high_z]
+        else:
+            keys = [(kx, kz) for kx in range(low_x, high_x + 1)
+                    for kz in range(low_z, high_z + 1) if (kx, kz) in supers]
+        for key in keys:
+            for cell in supers[key]:
+                distance = _distance(cell, center)
+                if distance <= radius:
+                    yield cell, distance
+
+    def within(self, center, radius):
+        """The entities at most radius away from center
+
+        Same hexagons as :func:`Cube.circle_around`, in the same order.
+
+        :param center: the center of the disk
+        :type center: Cube
+        :param radius: the radius of the disk
+        :type radius: int
+        :returns: list -- the entities
+        """
+        if radius < 0:
+            return []
+        if 3 * radius * (radius + 1) + 1 <= len(self._cells):
+            return self._from_cells(center.circle_around(radius))
+        near = [cell for cell, _ in self._occupied_near(center, radius)]
+        near.sort(key=_disk_order)
+        return self._from_cells(near)
+
+    def ring(self, center, radius):
+        """The entities exactly radius away from center
+
+        Same hexagons as :func:`Cube.circumference`, in the order
+        of :func:`Cube.ring`.
+
+        :param center: the center of the ring
+        :type center: Cube
+        :param radius: the radius of the ring
+        :type radius: int
+        :returns: list -- the entities
+        """
+        if radius < 0:
+            return []
+        if max(6 * radius, 1) <= len(self._cells):
+            return self._from_cells(center.ring(radius))
+        on_ring = [cell for cell, distance in
+                   self._occupied_near(center, radius) if distance == radius]
+        return self._from_cells(_ring_sorted(center, radius, on_ring))
+
+    def arc(self, center, direction, size):
+        """The entities on the hexagons of :func:`Cube.arc`
+
+        :returns: list -- the entities
+        """
+        return self._from_cells(center.arc(direction, size))
+
+    def nearest(self, center, k, max_radius=None):
+        """The k entities closest to center
+
+        Entities at the same distance are in the order of :func:`Cube.ring`,
+        then in insertion order.
+
+        :param center: the reference hexagon
+        :type center: Cube
+        :param k: the amount of entities
+        :type k: int
+        :param max_radius: ignores entities farther than this
+        :type max_radius: int
+        :returns: list -- up to k entities, closest first
+        """
+        found = []
+        radius = visited = 0
+        while len(found) < k and visited < len(self._cells):
+            if max_radius is not None and radius > max_radius:
+                return found
+            found.extend(self._from_cells(center.ring(radius)))
+            visited += max(6 * radius, 1)
+            radius += 1
+        if len(found) >= k:
+            return found[:max(k, 0)]
+        # Walking the rings got more expensive than looking at every
+        # occupied hexagon, so the remaining ones are sorted by distance
+        farther = {}
+        for cell in self._cells:
+            distance = _distance(cell, center)
+            if distance >= radius and (max_radius is None or
+                                       distance <= max_radius):
+                farther.setdefault(distance, []).append(cell)
+        for distance in sorted(farther):
+            if len(found) >= k:
+                break
+            found.extend(self._from_cells(
+                _ring_sorted(center, distance, farther[distance])))
+        return found[:k]
+
+    def __repr__(self):
+        return f'SpatialIndex({len(self._positions)} entities)'
+
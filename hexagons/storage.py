@@ -0,0 +1,336 @@
+"""
+.. module:: storage
+    :synopsis: Memory-mapped binary files of hex maps
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+A file holds one or more named layers (e.g. terrain, elevation, owner)
+of :class:`hexagons.maps.HexMap` with the same shape. Its layout is:
+
+* the 8 bytes of :data:`MAGIC`, then the format version, a reserved field
+  and the header length (little-endian uint16, uint16 and uint32);
+* the header, UTF-8 JSON with the shape, the bounds, the amount of
+  hexagons, and the dtype and offset of each layer;
+* padding up to a multiple of 8 bytes, where the data starts;
+* the raw little-endian column of each layer, at 8-byte aligned offsets
+  from the start of the data;
+* the change log, an append-only sequence of records
+  (layer number as uint16, index as uint64, value in the layer dtype).
+
+Opening a file maps it with :mod:`mmap`, so only the pages actually read
+are loaded. Changes to a few hexagons are saved by appending them to the
+log, which is applied when the file is opened and folded back into the
+columns by :func:`compact`.
+"""
+
+
+import array
+import json
+import mmap
+import struct
+import sys
+from hexagons.maps import HexMap
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+
+MAGIC = b'HEXMAP\r\n'
+VERSION = 1
+
+_PREFIX = struct.Struct('<8sHHI')
+_RECORD = struct.Struct('<HQ')
+_ALIGNMENT = 8
+
+# (kind, itemsize) of a dtype string to the struct/array typecode
+_TYPECODES = {
+    ('i', 1): 'b', ('i', 2): 'h', ('i', 4): 'i', ('i', 8): 'q',
+    ('u', 1): 'B', ('u', 2): 'H', ('u', 4): 'I', ('u', 8): 'Q',
+    ('f', 4): 'f', ('f', 8): 'd',
+}
+_KINDS = {code: kind for (kind, _), code in _TYPECODES.items()}
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _dtype(column):
+    """Little-endian dtype string of a column, like NumPy's '<f8'
+
+    :raises: ValueError -- if the column type cannot be stored
+    """
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        kind, itemsize = column.dtype.kind, column.dtype.itemsize
+    else:
+        code = getattr(column, 'typecode', None) or column.format
+        kind, itemsize = _KINDS.get(code), column.itemsize
+    if (kind, itemsize) not in _TYPECODES:
+        raise ValueError(f'Cannot store columns of {kind}{itemsize}')
+    return f'<{kind}{itemsize}'
+
+
+def _typecode(dtype):
+    """The struct/array typecode of a dtype string
+
+    :raises: ValueError -- for unknown dtypes
+    """
+    try:
+        return _TYPECODES[dtype[1], int(dtype[2:])]
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f'Unknown dtype {dtype!r}') from None
+
+
+def _column_bytes(column, dtype):
+    """The raw little-endian bytes of a column"""
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        return numpy.ascontiguousarray(column, dtype=dtype).tobytes()
+    if sys.byteorder != 'little':  # pragma: no cover - depends on the host
+        column = array.array(_typecode(dtype), column)
+        column.byteswap()
+    return memoryview(column).cast('B')
+
+
+def save(path, layers):
+    """Writes hex maps to a new file, replacing any existing one
+
+    :param path: the file to be written
+    :type path: str or os.PathLike
+    :param layers: maps of the same shape, by layer name
+    :type layers: dict of str to HexMap
+    :raises: ValueError -- if there are no layers, they have different
+             shapes or a dtype that cannot be stored
+    """
+    if not layers:
+        raise ValueError('At least one layer is needed')
+    first = next(iter(layers.values()))
+    descriptions = []
+    offset = 0
+    for name, layer in layers.items():
+        if layer.spec != first.spec:
+            raise ValueError(f'Layer {name!r} has shape {layer.spec}, '
+                             f'expected {first.spec}')
+        dtype = _dtype(layer.data)
+        descriptions.append({'name': name, 'dtype': dtype, 'offset': offset})
+        offset = _align(offset + len(layer) * int(dtype[2:]))
+    header = json.dumps({'spec': first.spec, 'bounds': first.bounds,
+                         'size': len(first), 'layers': descriptions,
+                         'log': offset}).encode()
+    start = _align(_PREFIX.size + len(header))
+    with open(path, 'wb') as stream:
+        stream.write(_PREFIX.pack(MAGIC, VERSION, 0, len(header)))
+        stream.write(header)
+        for description, layer in zip(descriptions, layers.values()):
+            stream.seek(start + description['offset'])
+            stream.write(_column_bytes(layer.data, description['dtype']))
+        stream.truncate(start + offset)
+
+
+def _read_header(stream):
+    """Reads the header of an open file
+
+    :returns: tuple -- the header dict and the offset where data starts
+    :raises: ValueError -- if the file is not a hex map file
+    """
+    prefix = stream.read(_PREFIX.size)
+    if len(prefix) < _PREFIX.size:
+        raise ValueError('Not a hex map file')
+    magic, version, _, length = _PREFIX.unpack(prefix)
+    if magic != MAGIC:
+        raise ValueError('Not a hex map file')
+    if version != VERSION:
+        raise ValueError(f'Unsupported hex map file version {version}')
+    header = json.loads(stream.read(length).decode())
+    header['spec'] = tuple(header['spec'])
+    header['bounds'] = tuple(header['bounds'])
+    return header, _align(_PREFIX.size + length)
+
+
+class MapFile:
+    """Hex map layers mapped from a file, see :func:`open_maps`"""
+
+    def __init__(self, path, mode='r'):
+        """Opens a file written by :func:`save`
+
+        :param path: the file
+        :type path: str or os.PathLike
+        :param mode: 'r' to read, 'a' to also append changes to the log
+                     (the layers can be modified in memory, but the columns
+                     in the file are not), 'r+' to modify the columns
+                     of the file in place
+        :type mode: str
+        :raises: ValueError -- if the file is not a hex map file
+        """
+        if mode not in ('r', 'a', 'r+'):
+            raise ValueError(f'Unknown mode {mode!r}')
+        self.path = path
+        self.mode = mode
+        with open(path, 'rb') as stream:
+            header, self._start = _read_header(stream)
+            self.spec = header['spec']
+            self.bounds = header['bounds']
+            self._size = header['size']
+            self._log = self._start + header['log']
+            stream.seek(0, 2)
+            has_log = stream.tell() > self._log
+        if sys.byteorder != 'little' and numpy is None:  # pragma: no cover
+            raise ValueError('Hex map files need NumPy on big-endian hosts')
+        if mode == 'r+':
+            self._stream = open(path, 'r+b')
+            access = mmap.ACCESS_WRITE
+        else:
+            self._stream = open(path, 'rb')
+            access = (mmap.ACCESS_COPY if mode == 'a' or has_log
+                      else mmap.ACCESS_READ)
+        self._mmap = mmap.mmap(self._stream.fileno(), 0, access=access)
+        self._dtypes = []
+        self._layers = {}
+        for description in header['layers']:
+            self._dtypes.append(description['dtype'])
+            self._layers[description['name']] = self._map_layer(description)
+        self._names = list(self._layers)
+        if has_log:
+            self._replay()
+
+    def _map_layer(self, description):
+        """HexMap whose data is a view of a column of the mapped file"""
+        dtype = description['dtype']
+        itemsize = int(dtype[2:])
+        size = self._size
+        offset = self._start + description['offset']
+        if numpy is not None:
+            data = numpy.frombuffer(self._mmap, dtype=dtype, count=size,
+                                    offset=offset)
+        else:
+            data = memoryview(self._mmap)[offset:offset + size * itemsize]
+            data = data.cast(_typecode(dtype))
+        return HexMap(self.spec, data=data)
+
+    def _replay(self):
+        """Applies the change log to the mapped layers"""
+        records = self._mmap
+        position, end = self._log, len(records)
+        columns = [layer.data for layer in self._layers.values()]
+        formats = [struct.Struct('<' + _typecode(dtype))
+                   for dtype in self._dtypes]
+        while position < end:
+            number, index = _RECORD.unpack_from(records, position)
+            position += _RECORD.size
+            value_format = formats[number]
+            columns[number][index], = value_format.unpack_from(records,
+                                                               position)
+            position += value_format.size
+
+    @property
+    def names(self):
+        """The names of the layers, in the order they were saved"""
+        return list(self._names)
+
+    def layer(self, name):
+        """A layer as a HexMap backed by the file
+
+        :param name: the layer name
+        :type name: str
+        :returns: HexMap -- read-only in mode 'r' (unless the log was
+                  applied, then changes only stay in memory)
+        :raises: KeyError -- for unknown layers
+        """
+        return self._layers[name]
+
+    __getitem__ = layer
+
+    def values(self, name, coords):
+        """Values of a region of a layer, reading only its pages
+
+        :param name: the layer name
+        :type name: str
+        :param coords: the hexagons in the region
+        :type coords: iterable of Axial or Cube
+        :returns: list -- the values, None for hexagons outside the map
+        """
+        layer = self._layers[name]
+        return [layer.get(coord) for coord in coords]
+
+    def append(self, name, changes):
+        """Saves changes of a layer by appending them to the log
+
+        The changes are also applied to the layer in memory.
+
+        :param name: the layer name
+        :type name: str
+        :param changes: the hexagons and their new values
+        :type changes: iterable of (Axial or Cube, value) pairs
+        :raises: KeyError -- if a hexagon is outside the map
+        :raises: ValueError -- if the file is opened in mode 'r'
+        """
+        if self.mode == 'r':
+            raise ValueError("Cannot append to a file opened in mode 'r'")
+        layer = self._layers[name]
+        number = self._names.index(name)
+        value_format = struct.Struct('<' + _typecode(self._dtypes[number]))
+        records = bytearray()
+        for coord, value in changes:
+            index = layer.index(coord)
+            if index is None:
+                raise KeyError(coord)
+            layer.data[index] = value
+            records += _RECORD.pack(number, index)
+            records += value_format.pack(layer.data[index])
+        with open(self.path, 'ab') as stream:
+            stream.write(records)
+
+    def flush(self):
+        """Writes the changes of mode 'r+' to the file"""
+        if self.mode == 'r+':
+            self._mmap.flush()
+
+    def close(self):
+        """Closes the file
+
+        Layers still referenced elsewhere keep their pages mapped
+        until they are garbage collected.
+        """
+        if self._mmap is None:
+            return
+        self.flush()
+        for layer in self._layers.values():
+            if isinstance(layer.data, memoryview):
+                layer.data.release()
+        self._layers = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f'MapFile({self.path!r}, {self.spec}, {self._names})'
+
+
+def open_maps(path, mode='r'):
+    """Opens a file written by :func:`save`, see :class:`MapFile`
+
+    :returns: MapFile
+    """
+    return MapFile(path, mode)
+
+
+def compact(path):
+    """Folds the change log of a file back into its columns
+
+    :param path: the file
+    :type path: str or os.PathLike
+    """
+    with MapFile(path, 'r+') as opened:
+        log = opened._log
+    with open(path, 'r+b') as stream:
+        stream.truncate(log)
@@ -0,0 +1,23 @@
+"""
+Fixtures shared by the test modules
+"""
+
+
+import sys
+import pytest
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def backend(request, monkeypatch):
+    """ Runs the test with NumPy and with the pure Python fallback
+
+    The fallback hides NumPy from every module of the package using it.
+    """
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        for name, module in list(sys.modules.items()):
+            if (name.split('.')[0] == 'hexagons' and module is not None and
+                    getattr(module, 'numpy', None) is not None):
+                monkeypatch.setattr(module, 'numpy', None)
+    return request.param
@@ -0,0 +1,181 @@
+"""
+Test module for batches of coordinates
+"""
+
+
+import array
+import hexagons.arrays as arrays
+import hexagons.coordinate as coord
+import pytest
+
+
+def test_cube_array_roundtrip(backend):
+    cubes = list(coord.Cube.origin.circle_around(2))
+    batch = arrays.CubeArray.from_cubes(cubes)
+    assert len(batch) == len(cubes)
+    assert batch.to_cubes() == cubes
+    assert list(batch) == cubes
+    assert batch[3] == cubes[3]
+    assert batch[2:5].to_cubes() == cubes[2:5]
+
+
+def test_invalid_cube_array(backend):
+    with pytest.raises(ValueError):
+        arrays.CubeArray([0, 1], [0, 2], [0, 3])
+    with pytest.raises(ValueError):
+        arrays.CubeArray([0, 1], [0], [0, -1])
+
+
+def test_cube_array_arithmetic(backend):
+    cubes = list(coord.Cube(1, 2, -3).circle_around(2))
+    other = coord.Cube(-2, 5, -3)
+    batch = arrays.CubeArray.from_cubes(cubes)
+    assert (batch + other).to_cubes() == [c + other for c in cubes]
+    assert (batch - other).to_cubes() == [c - other for c in cubes]
+    assert (-batch).to_cubes() == [-c for c in cubes]
+    assert (batch * 3).to_cubes() == [c * 3 for c in cubes]
+    assert (batch + batch).to_cubes() == [c + c for c in cubes]
+
+
+def test_cube_array_distance(backend):
+    cubes = list(coord.Cube.origin.circle_around(3))
+    target = coord.Cube(-1, 4, -3)
+    batch = arrays.CubeArray.from_cubes(cubes)
+    distances = list(batch.distance(target))
+    assert distances == [c.distance(target) for c in cubes]
+
+
+def test_cube_array_round(backend):
+    cubes = [coord.Cube(0.1, 1.8, -1.9), coord.Cube(0.4, 0.3, -0.7),
+             coord.Cube(-2.6, 1.2, 1.4)]
+    batch = arrays.CubeArray.from_cubes(cubes)
+    assert batch.round().to_cubes() == [c.round() for c in cubes]
+
+
+def test_cube_array_neighbors(backend):
+    cubes = [coord.Cube(0, 0, 0), coord.Cube(3, -1, -2)]
+    batch = arrays.CubeArray.from_cubes(cubes)
+    neighbors = batch.neighbors()
+    assert len(neighbors) == 6
+    for i, cube in enumerate(cubes):
+        assert [n[i] for n in neighbors] == list(cube.neighbors())
+
+
+def test_axial_array_conversions(backend):
+    axials = [coord.Axial(1, -3), coord.Axial(-2, 5), coord.Axial(0, 0)]
+    batch = arrays.AxialArray.from_axials(axials)
+    assert batch.to_axials() == axials
+    assert batch.to_cube().to_cubes() == [a.to_cube() for a in axials]
+    assert batch.to_cube().to_axial().to_axials() == axials
+    assert (batch + coord.Axial(1, 1)).to_axials() == \
+        [a + coord.Axial(1, 1) for a in axials]
+
+
+def test_bulk_pack(backend):
+    cubes = list(coord.Cube(-3, 10, -7).circle_around(3))
+    batch = arrays.CubeArray.from_cubes(cubes)
+    keys = batch.pack()
+    assert list(keys) == [c.pack() for c in cubes]
+    assert arrays.CubeArray.unpack(keys).to_cubes() == cubes
+    assert arrays.AxialArray.unpack(keys).to_axials() == \
+        [c.to_axial() for c in cubes]
+
+
+def test_length_mismatch(backend):
+    three = arrays.CubeArray([0, 1, 2], [0, -1, -2], [0, 0, 0])
+    with pytest.raises(ValueError):
+        three + three[:1]
+    with pytest.raises(ValueError):
+        three - three[:2]
+    with pytest.raises(ValueError):
+        three.distance(three[:2])
+    axials = three.to_axial()
+    with pytest.raises(ValueError):
+        axials + axials[:1]
+    with pytest.raises(ValueError):
+        axials - axials[:2]
+
+
+def test_read_only_columns(backend):
+    batch = arrays.CubeArray([0, 1], [0, -1], [0, 0])
+    column = batch.x
+    if backend == 'numpy':
+        with pytest.raises(ValueError):
+            column[0] = 5
+    else:
+        column[0] = 5
+    assert batch[0] == coord.Cube(0, 0, 0)
+
+
+def test_columns_not_shared(backend):
+    x, y, z = (array.array('q', c) for c in ([0, 1], [0, -1], [0, 0]))
+    cubes = arrays.CubeArray(x, y, z)
+    axials = arrays.AxialArray(x, z)
+    x[1] = 5
+    z[1] = -5
+    assert cubes[1] == coord.Cube(1, -1, 0)
+    assert axials[1] == coord.Axial(1, 0)
+    if backend == 'numpy':
+        q = arrays.numpy.array([2, 3])
+        axials = arrays.AxialArray(q, q)
+        q[0] = 7
+        assert axials[0] == coord.Axial(2, 2)
+
+
+def test_bulk_pack_invalid(backend):
+    floats = arrays.CubeArray([1.0, 0.0], [-1.0, 0.0], [0.0, 0.0])
+    with pytest.raises(ValueError):
+        floats.pack()
+    with pytest.raises(ValueError):
+        arrays.AxialArray.unpack([1, -1])
+
+
+def test_bulk_pack_empty(backend):
+    for batch in (arrays.AxialArray.from_axials([]),
+                  arrays.CubeArray.from_cubes([])):
+        keys = batch.pack()
+        assert len(keys) == 0
+        if backend == 'numpy':
+            assert keys.dtype == arrays.numpy.uint64
+        else:
+            assert keys.typecode == 'Q'
+        assert len(arrays.AxialArray.unpack(keys)) == 0
+
+
+def test_transform_array(backend):
+    transform = coord.Transform.rotation(1, coord.Cube(1, -1, 0)).reflect('y')
+    cubes = list(coord.Cube(2, -1, -1).circle_around(2))
+    batch = arrays.CubeArray.from_cubes(cubes)
+    assert transform.apply_array(batch).to_cubes() == transform.apply(cubes)
+
+
+@pytest.mark.parametrize('layout', coord.OFFSET_LAYOUTS)
+def test_axial_array_offset(backend, layout):
+    axials = [c.to_axial() for c in coord.Cube(3, -1, -2).circle_around(3)]
+    batch = arrays.AxialArray.from_axials(axials)
+    col, row = batch.to_offset(layout)
+    expected = [axial.to_offset(layout) for axial in axials]
+    assert list(zip(col.tolist(), row.tolist())) == [tuple(o) for o in expected]
+    assert arrays.AxialArray.from_offset(col, row, layout).to_axials() == axials
+
+
+@pytest.mark.parametrize('layout', coord.DOUBLED_LAYOUTS)
+def test_axial_array_doubled(backend, layout):
+    axials = [c.to_axial() for c in coord.Cube(3, -1, -2).circle_around(3)]
+    batch = arrays.AxialArray.from_axials(axials)
+    col, row = batch.to_doubled(layout)
+    expected = [axial.to_doubled(layout) for axial in axials]
+    assert list(zip(col.tolist(), row.tolist())) == [tuple(d) for d in expected]
+    assert arrays.AxialArray.from_doubled(col, row, layout).to_axials() == axials
+
+
+def test_invalid_grid_conversions(backend):
+    with pytest.raises(ValueError):
+        arrays.AxialArray([0.5], [1]).to_offset()
+    with pytest.raises(ValueError):
+        arrays.AxialArray([0], [1]).to_doubled('depth')
+    with pytest.raises(ValueError):
+        arrays.AxialArray.from_offset([0, 1], [0])
+    with pytest.raises(ValueError):
+        arrays.AxialArray.from_doubled([0, 1], [0, 0])
+    assert len(arrays.AxialArray.from_offset([], [], 'even-q')) == 0
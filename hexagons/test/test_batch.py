@@ -0,0 +1,95 @@
+"""
+Test module for batches of queries run in worker processes
+"""
+
+
+from math import inf
+from multiprocessing import shared_memory
+import pytest
+from hexagons.arrays import CubeArray
+from hexagons.batch import BatchExecutor
+from hexagons.coordinate import Axial, Cube
+from hexagons.maps import HexMap
+from hexagons.pathfinding import astar
+
+
+def _costs():
+    costs = HexMap.hexagon(8, fill=1)
+    for coord in Axial(2, -1).to_cube().ring(3):
+        costs[coord] = inf
+    costs[Axial(2, -1)] = 2.5
+    costs[Axial(-3, 0)] = 0.5
+    return costs
+
+
+QUERIES = [
+    ('floodfill', Cube(2, 0, -2), 4),
+    ('line', Cube(-6, 3, 3), Cube(6, -3, -3)),
+    ('line', Cube(-1, 0, 1), Cube(-4, 1, 3)),
+    ('range', Cube(5, -5, 0), 4),
+    ('path', Cube(-4, 4, 0), Cube(2, 1, -3)),
+    ('path', Cube.origin, Cube(2, 1, -3)),
+    ('path', Cube.origin, Cube(20, -20, 0)),
+]
+
+
+def _expected(costs):
+    def cost(cube):
+        value = costs.get(cube)
+        return None if value is None or value == inf else value
+
+    def blocked(cube):
+        return cost(cube) is None
+
+    line = []
+    for cube in Cube(-6, 3, 3).line_to(Cube(6, -3, -3)):
+        line.append(cube)
+        if len(line) > 1 and blocked(cube):
+            break
+    return [
+        list(Cube(2, 0, -2).distance_map(4, blocked)),
+        line,
+        list(Cube(-1, 0, 1).line_to(Cube(-4, 1, 3))),
+        [c for c in Cube(5, -5, 0).circle_around(4) if not blocked(c)],
+        astar(Cube(-4, 4, 0), Cube(2, 1, -3), cost, min_step_cost=0.5),
+        astar(Cube.origin, Cube(2, 1, -3), cost, min_step_cost=0.5),
+        None,
+    ]
+
+
+def _unpacked(results):
+    unpacked = []
+    for result in results:
+        if isinstance(result, tuple):
+            keys, total = result
+            result = (CubeArray.unpack(keys).to_cubes(), total)
+        elif result is not None:
+            result = CubeArray.unpack(result).to_cubes()
+        unpacked.append(result)
+    return unpacked
+
+
+def test_in_process():
+    costs = _costs()
+    with BatchExecutor(costs, processes=0) as executor:
+        assert _unpacked(executor.run(QUERIES)) == _expected(costs)
+
+
+def test_process_pool():
+    costs = _costs()
+    with BatchExecutor(costs, processes=2) as executor:
+        assert _unpacked(executor.run(QUERIES * 3, chunksize=2)) == \
+            _expected(costs) * 3
+        name = executor._memory.name
+        costs[Axial(2, 0)] = inf
+        executor.update_map(costs)
+        assert executor.version == 2
+        assert _unpacked(executor.run(QUERIES)) == _expected(costs)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_unknown_query():
+    with BatchExecutor(_costs(), processes=0) as executor:
+        with pytest.raises(ValueError):
+            executor.run([('teleport', Cube.origin, Cube.origin)])
@@ -0,0 +1,57 @@
+"""
+Test module for the benchmark harness
+"""
+
+
+import json
+from hexagons import benchmarks
+
+
+def test_measure():
+    result = benchmarks.measure(lambda: list(range(100)), min_time=0.001)
+    assert result['ops_per_sec'] > 0
+    assert result['allocated_blocks'] >= 1
+    assert result['peak_bytes'] > 0
+
+
+def test_cases_cover_sweeps():
+    names = [name for name, _ in benchmarks.cases()]
+    assert len(names) == len(set(names))
+    for radius in benchmarks.RADII:
+        for path in ('circle_around', 'floodfill', 'line_to', 'circumference'):
+            assert f'{path}[{radius}]' in names
+    for size in benchmarks.GRID_SIZES:
+        assert f'hexagon_list[{size}]' in names
+        assert f'clicked_hex[{size}]' in names
+
+
+def test_run_only():
+    current = benchmarks.run(quick=True, only='cube_add', min_time=0.001)
+    assert list(current['results']) == ['cube_add']
+    assert 'python' in current['meta']
+
+
+def test_compare():
+    baseline = {'results': {'fast': {'ops_per_sec': 100.0},
+                            'slow': {'ops_per_sec': 100.0},
+                            'gone': {'ops_per_sec': 100.0}}}
+    current = {'results': {'fast': {'ops_per_sec': 95.0},
+                           'slow': {'ops_per_sec': 50.0},
+                           'new': {'ops_per_sec': 10.0}}}
+    rows = benchmarks.compare(baseline, current, threshold=0.1)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [
+        ('fast', False), ('slow', True)]
+    assert rows[1][3] == -0.5
+
+
+def test_main_flags_regressions(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(
+        {'results': {'cube_new': {'ops_per_sec': 1e12}}}))
+    output = tmp_path / 'current.json'
+    status = benchmarks.main(['--quick', '--only', 'cube_new',
+                              '--output', str(output),
+                              '--compare', str(baseline)])
+    assert status == 1
+    assert 'REGRESSION' in capsys.readouterr().out
+    assert 'cube_new' in json.loads(output.read_text())['results']
@@ -0,0 +1,95 @@
+"""
+Test module for GPU buffer export
+"""
+
+
+from array import array
+import pytest
+import hexagons.buffers as buffers
+from hexagons.buffers import vertex_buffer, index_buffer, VERTICES_PER_HEX
+from hexagons.coordinate import Axial
+from hexagons.grid import HexagonGrid, Viewport
+
+
+def _grid():
+    return HexagonGrid(600, Axial(0, 0), hex_format='flat', grid_size=2)
+
+
+def test_vertex_buffer_contents():
+    grid = _grid()
+    hexagons = grid.hexagon_list()
+    data = vertex_buffer(grid)
+    assert len(data) == len(hexagons) * VERTICES_PER_HEX * 2
+    assert memoryview(data).format == 'f'
+    for i, (coord, center, corners) in enumerate(hexagons):
+        vertices = data[i * 14:(i + 1) * 14]
+        assert vertices[0:2] == array('f', center)
+        for k, corner in enumerate(corners):
+            assert vertices[2 * k + 2:2 * k + 4] == array('f', corner)
+
+
+def test_vertex_buffer_attributes():
+    grid = _grid()
+    hexagons = grid.hexagon_list()
+    data = vertex_buffer(grid, attributes=lambda a: (a.q, a.r, 0.5))
+    stride = 5
+    assert len(data) == len(hexagons) * VERTICES_PER_HEX * stride
+    for i, (coord, _, _) in enumerate(hexagons):
+        for v in range(VERTICES_PER_HEX):
+            start = (i * VERTICES_PER_HEX + v) * stride
+            assert list(data[start + 2:start + 5]) == [coord.q, coord.r, 0.5]
+
+
+def test_vertex_buffer_in_place():
+    grid = _grid()
+    expected = vertex_buffer(grid)
+    out = bytearray(len(expected) * 4)
+    assert vertex_buffer(grid, out=out) is out
+    assert bytes(out) == expected.tobytes()
+    floats = array('f', bytes(len(out)))
+    vertex_buffer(grid, out=floats)
+    assert floats == expected
+
+
+def test_vertex_buffer_fallback(monkeypatch):
+    def attributes(axial):
+        return (axial.q, axial.r * 0.5)
+
+    grids = [_grid(), Viewport(200, 120, Axial(2, -1), hex_size=20)]
+    expected = [vertex_buffer(grid, attributes) for grid in grids]
+    monkeypatch.setattr(buffers, 'numpy', None)
+    for grid, data in zip(grids, expected):
+        assert vertex_buffer(grid, attributes) == data
+        hexagons = grid.hexagon_list()
+        assert len(data) == len(hexagons) * VERTICES_PER_HEX * 4
+        _, center, corners = hexagons[-1]
+        assert data[-28:-26] == array('f', center)
+        assert data[-4:-2] == array('f', corners[-1])
+
+
+def test_vertex_buffer_wrong_output():
+    grid = _grid()
+    with pytest.raises(ValueError):
+        vertex_buffer(grid, out=bytearray(8))
+    with pytest.raises(ValueError):
+        vertex_buffer(grid, out=array('d', [0] * len(vertex_buffer(grid))))
+    with pytest.raises(ValueError):
+        vertex_buffer(grid, out=bytes(len(vertex_buffer(grid)) * 4))
+
+
+def test_index_buffer_triangles():
+    indexes = index_buffer(2)
+    assert memoryview(indexes).itemsize == 4
+    assert list(indexes[:18]) == [0, 1, 2, 0, 2, 3, 0, 3, 4,
+                                  0, 4, 5, 0, 5, 6, 0, 6, 1]
+    assert list(indexes[18:]) == [i + 7 for i in indexes[:18]]
+
+
+def test_index_buffer_outline():
+    indexes = index_buffer(1, 'outline')
+    assert list(indexes) == [1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 1]
+    out = bytearray(12 * 4)
+    index_buffer(1, 'outline', out=out)
+    assert bytes(out) == indexes.tobytes()
+    with pytest.raises(ValueError):
+        index_buffer(1, 'strips')
@@ -6,6 +6,8 @@ Test module for coordinate methods and conversions
 import hexagons.coordinate as coord
 import pytest
 import itertools
+import pickle
+import sys
 
 
 def test_cube_getters():
@@ -121,6 +123,16 @@ def test_line_order():
     assert hexes_in_line == line
 
 
+
+def test_line_point():
+    """ Each point of a line is as many steps away from its start """
+    for start in coord.Cube(1, -2, 1).circle_around(2):
+        for target in coord.Cube.origin.circle_around(5):
+            line = list(start.line_to(target))
+            for index, point in enumerate(line):
+                assert start.line_point(target, index) == point
+                assert start.distance(point) == index
+
 def test_circle_around():
     center = coord.Cube(0, 0, 0)
     immediate = list(center.neighbors())
@@ -209,3 +221,337 @@ def test_arc():
                     coord.Cube(0, 3, -3)])
     result = set(center.arc(facing_direction, 3))
     assert expected == result
+
+
+def test_cube_immutable():
+    c = coord.Cube(1, 0, -1)
+    with pytest.raises(AttributeError):
+        c.x = 2
+    with pytest.raises(AttributeError):
+        c.w = 2
+
+
+def test_axial_immutable():
+    c = coord.Axial(1, 0)
+    with pytest.raises(AttributeError):
+        c.q = 2
+
+
+def test_cube_arithmetic():
+    a = coord.Cube(1, 2, -3)
+    b = coord.Cube(-2, 0, 2)
+    assert a + b == coord.Cube(-1, 2, -1)
+    assert a - b == coord.Cube(3, 2, -5)
+    assert -a == coord.Cube(-1, -2, 3)
+    assert a * 2 == coord.Cube(2, 4, -6)
+    assert 2 * a == coord.Cube(2, 4, -6)
+    assert type(a + b) is coord.Cube
+
+
+def test_axial_arithmetic():
+    a = coord.Axial(1, 2)
+    b = coord.Axial(-2, 0)
+    assert a + b == coord.Axial(-1, 2)
+    assert a - b == coord.Axial(3, 2)
+    assert -a == coord.Axial(-1, -2)
+    with pytest.raises(TypeError):
+        a * 2
+
+
+def test_pickle_coordinates():
+    import pickle
+    c = coord.Cube(1, 2, -3)
+    a = coord.Axial(4, -1)
+    assert pickle.loads(pickle.dumps(c)) == c
+    assert pickle.loads(pickle.dumps(a)) == a
+    assert type(pickle.loads(pickle.dumps(a))) is coord.Axial
+
+
+def test_pack_roundtrip():
+    limit = 2 ** (coord.PACK_BITS - 1)
+    for q, r in [(0, 0), (1, -1), (-5, 7), (limit - 1, -limit), (-limit, 3)]:
+        key = coord.pack(q, r)
+        assert key >= 0
+        assert coord.unpack(key) == (q, r)
+
+
+def test_pack_unique():
+    cubes = list(coord.Cube.origin.circle_around(5))
+    assert len(set(c.pack() for c in cubes)) == len(cubes)
+
+
+def test_pack_out_of_range():
+    with pytest.raises(ValueError):
+        coord.pack(2 ** coord.PACK_BITS, 0)
+
+
+def test_cube_and_axial_pack():
+    c = coord.Cube(3, 1, -4)
+    assert c.pack() == c.to_axial().pack()
+    assert coord.Cube.unpack(c.pack()) == c
+    assert coord.Axial.unpack(c.pack()) == c.to_axial()
+
+
+def test_cube_not_equal_to_tuple():
+    c = coord.Cube(1, -1, 0)
+    assert c != (1, -1, 0)
+    assert (1, -1, 0) != c
+    assert not c == (1, -1, 0)
+    assert c != coord.Axial(1, 0)
+    with pytest.raises(KeyError):
+        {(1, -1, 0): 't'}[c]
+    assert {c: 't'}[coord.Cube(1, -1, 0)] == 't'
+
+
+def test_axial_not_equal_to_tuple():
+    a = coord.Axial(1, 2)
+    assert a != (1, 2)
+    assert (1, 2) != a
+    with pytest.raises(KeyError):
+        {(1, 2): 't'}[a]
+
+
+def test_coordinates_unordered():
+    with pytest.raises(TypeError):
+        coord.Cube(1, -1, 0) < coord.Cube(0, 0, 0)
+    with pytest.raises(TypeError):
+        coord.Cube(1, -1, 0) >= (0, 0, 0)
+    with pytest.raises(TypeError):
+        (0, 0) < coord.Axial(1, 2)
+    with pytest.raises(TypeError):
+        sorted([coord.Axial(1, 2), coord.Axial(0, 0)])
+
+
+def test_coordinates_tuple_like():
+    c = coord.Cube(3, -1, -2)
+    assert len(c) == 3
+    assert c[0] == c.x and c[1] == c.y and c[2] == c.z
+    a = coord.Axial(3, -2)
+    assert len(a) == 2
+    assert (a[0], a[1]) == (a.q, a.r)
+
+
+def test_pack_rejects_floats():
+    with pytest.raises(ValueError):
+        coord.pack(1.0, 0)
+    with pytest.raises(ValueError):
+        coord.Cube(1.0, -1.0, 0.0).pack()
+
+
+def test_unpack_rejects_invalid_keys():
+    with pytest.raises(ValueError):
+        coord.unpack(2 ** (2 * coord.PACK_BITS))
+    with pytest.raises(ValueError):
+        coord.unpack(-1)
+
+
+def test_distance_map():
+    center = coord.Cube(1, -2, 1)
+    distances = center.distance_map(3)
+    assert set(distances) == set(center.circle_around(3))
+    assert all(d == center.distance(c) for c, d in distances.items())
+
+
+def test_distance_map_obstacles():
+    center = coord.Cube.origin
+    wall = set(c for c in center.circumference(1) if c != coord.Cube(1, -1, 0))
+    distances = center.distance_map(3, wall)
+    assert not wall.intersection(distances)
+    assert coord.Cube(-2, 2, 0) not in distances
+    assert distances[coord.Cube(1, -1, 0)] == 1
+    assert distances[coord.Cube(2, -1, -1)] == 2
+    assert set(distances) == center.floodfill(3, wall.__contains__)
+
+
+def test_obstacle_arguments():
+    wall = {coord.Cube(1, -1, 0), coord.Cube(0, 1, -1)}
+    assert coord.obstacle_function(None) is None
+    assert coord.obstacle_function(wall.__contains__) == wall.__contains__
+    assert coord.obstacle_function(frozenset(wall))(coord.Cube(1, -1, 0))
+    assert coord.obstacle_function({}.keys()) is not None
+    for invalid in ([coord.Cube(1, -1, 0)], {coord.Cube(1, -1, 0): True}):
+        with pytest.raises(TypeError):
+            coord.Cube.origin.distance_map(3, invalid)
+
+
+def test_distance_map_one_lookup_per_cell():
+    center = coord.Cube.origin
+    calls = []
+
+    def obstacle(cube):
+        calls.append(cube)
+        return cube.x == 1
+
+    center.distance_map(4, obstacle)
+    assert len(calls) == len(set(calls))
+
+
+def test_distance_map_early_exit():
+    center = coord.Cube.origin
+    target = coord.Cube(0, 2, -2)
+    distances = center.distance_map(10, target=target)
+    assert distances[target] == 2
+    assert max(distances.values()) == 2
+    assert len(center.distance_map(10, max_cells=5)) == 5
+
+
+def test_line_same_point():
+    c = coord.Cube(2, -1, -1)
+    assert list(c.line_to(c)) == [c]
+
+
+def test_line_symmetric_length():
+    origin = coord.Cube(10, -7, -3)
+    target = coord.Cube(-12, 0, 12)
+    line = list(origin.line_to(target))
+    assert len(line) == origin.distance(target) + 1
+    assert all(a.distance(b) == 1 for a, b in zip(line, line[1:]))
+
+
+def test_ring_order():
+    center = coord.Cube(3, -1, -2)
+    assert list(center.ring(1)) == list(center.neighbors())
+    ring = list(center.ring(3))
+    assert len(ring) == 18
+    assert all(center.distance(c) == 3 for c in ring)
+    assert all(a.distance(b) == 1 for a, b in zip(ring, ring[1:] + ring[:1]))
+
+
+def test_spiral():
+    center = coord.Cube(-1, 0, 1)
+    spiral = list(center.spiral(3))
+    assert spiral[0] == center
+    assert len(spiral) == len(set(spiral))
+    assert set(spiral) == set(center.circle_around(3))
+    distances = [center.distance(c) for c in spiral]
+    assert distances == sorted(distances)
+
+
+def test_spiral_large_radius():
+    radius = coord.SHAPE_CACHE_RADIUS + 100
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(radius)
+    try:
+        spiral = list(coord.Cube.origin.spiral(radius))
+    finally:
+        sys.setrecursionlimit(limit)
+    assert len(spiral) == 3 * radius * (radius + 1) + 1
+    assert spiral[-6 * radius:] == list(coord.Cube.origin.ring(radius))
+
+
+def test_shape_cache_keeps_small_radii():
+    coord._spiral_offsets.cache_clear()
+    coord._ring_offsets.cache_clear()
+    list(coord.Cube.origin.spiral(coord.SHAPE_CACHE_RADIUS + 1))
+    list(coord.Cube.origin.spiral(5))
+    list(coord.Cube.origin.spiral(5))
+    assert coord._spiral_offsets.cache_info().currsize == 1
+    assert coord._spiral_offsets.cache_info().hits == 1
+    assert coord._ring_offsets.cache_info().currsize == 0
+
+
+def test_circle_around_order():
+    center = coord.Cube(1, 1, -2)
+    expected = [center + coord.Cube(x, y, -(x + y))
+                for x in range(-2, 3)
+                for y in range(max(-2, -x - 2), min(2, -x + 2) + 1)]
+    assert list(center.circle_around(2)) == expected
+
+
+def test_rotate_closed_form():
+    center = coord.Cube(2, 0, -2)
+    torotate = coord.Cube(4, -1, -3)
+    assert torotate.rotate_right(center, 7) == torotate.rotate_right(center, 1)
+    assert torotate.rotate_right(center, -1) == torotate.rotate_left(center)
+    assert torotate.rotate_left(center, 600) == torotate
+
+
+def test_reflect():
+    c = coord.Cube(3, -1, -2)
+    assert c.reflect('x') == coord.Cube(3, -2, -1)
+    assert c.reflect('y') == coord.Cube(-2, -1, 3)
+    assert c.reflect('z') == coord.Cube(-1, 3, -2)
+    center = coord.Cube(1, 0, -1)
+    assert c.reflect('x', center) == coord.Cube(3, -1, -2)
+    assert c.reflect('y', center).reflect('y', center) == c
+    with pytest.raises(ValueError):
+        c.reflect('w')
+
+
+def test_transform_composition():
+    center = coord.Cube(2, 0, -2)
+    offset = coord.Cube(1, 2, -3)
+    transform = coord.Transform.rotation(2, center).reflect('z').translate(offset)
+    shape = list(coord.Cube(-1, 1, 0).circle_around(2))
+    expected = [c.rotate_right(center, 2).reflect('z') + offset for c in shape]
+    assert transform.apply(shape) == expected
+    assert [transform(c) for c in shape] == expected
+
+
+def test_transform_identity():
+    rotation = coord.Transform.rotation(1, coord.Cube(1, -1, 0))
+    full_turn = rotation
+    for i in range(5):
+        full_turn = full_turn.then(rotation)
+    assert full_turn == coord.Transform()
+    assert coord.Transform.reflection('x').reflect('x') == coord.Transform()
+
+
+@pytest.mark.parametrize('layout', coord.OFFSET_LAYOUTS)
+def test_offset_roundtrip(layout):
+    for cube in coord.Cube(2, -5, 3).circle_around(4):
+        offset = cube.to_offset(layout)
+        assert isinstance(offset, coord.Offset)
+        assert offset.layout == layout
+        assert offset.to_cube() == cube
+        assert offset.to_axial() == cube.to_axial()
+        assert coord.Offset(offset.col, offset.row, layout) == offset
+
+
+def test_offset_layouts():
+    axial = coord.Axial(-3, 5)
+    assert axial.to_offset('odd-r') == coord.Offset(-1, 5, 'odd-r')
+    assert axial.to_offset('even-r') == coord.Offset(0, 5, 'even-r')
+    assert axial.to_offset('odd-q') == coord.Offset(-3, 3, 'odd-q')
+    assert axial.to_offset('even-q') == coord.Offset(-3, 4, 'even-q')
+    # Neighbors in the same row are one column apart
+    assert coord.Offset(2, 3).to_axial() + coord.Axial(1, 0) == \
+        coord.Offset(3, 3).to_axial()
+    with pytest.raises(ValueError):
+        axial.to_offset('odd-x')
+    with pytest.raises(ValueError):
+        coord.Offset(0, 0, 'odd-x')
+
+
+@pytest.mark.parametrize('layout', coord.DOUBLED_LAYOUTS)
+def test_doubled_roundtrip(layout):
+    for cube in coord.Cube(-1, 4, -3).circle_around(4):
+        doubled = cube.to_doubled(layout)
+        assert isinstance(doubled, coord.Doubled)
+        assert (doubled.col + doubled.row) % 2 == 0
+        assert doubled.to_cube() == cube
+        assert coord.Doubled(*doubled, layout) == doubled
+
+
+def test_doubled_layouts():
+    axial = coord.Axial(2, -1)
+    assert axial.to_doubled('width') == coord.Doubled(3, -1, 'width')
+    assert axial.to_doubled('height') == coord.Doubled(2, 0, 'height')
+    with pytest.raises(ValueError):
+        coord.Doubled(1, 0)
+    with pytest.raises(ValueError):
+        axial.to_doubled('depth')
+
+
+def test_grid_coordinates_behavior():
+    offset = coord.Offset(1, 2, 'even-q')
+    assert offset != coord.Offset(1, 2, 'odd-q')
+    assert offset != (1, 2)
+    assert offset != coord.Doubled(1, 1, 'height') != coord.Axial(1, 1)
+    assert len({offset, coord.Offset(1, 2, 'even-q')}) == 1
+    assert repr(offset) == "Offset(1, 2, 'even-q')"
+    assert pickle.loads(pickle.dumps(offset)) == offset
+    with pytest.raises(TypeError):
+        offset + coord.Offset(1, 1, 'even-q')
+    with pytest.raises(TypeError):
+        offset < coord.Offset(1, 1, 'even-q')
@@ -0,0 +1,81 @@
+"""
+Test module for flow fields
+"""
+
+
+import random
+from math import inf
+import pytest
+from hexagons.coordinate import Axial, Cube
+from hexagons.flowfield import FlowField
+from hexagons.maps import HexMap
+from hexagons.pathfinding import dijkstra
+
+
+def _random_costs(seed, radius=6):
+    rng = random.Random(seed)
+    costs = HexMap.hexagon(radius, Axial(1, -1), dtype='d', fill=1)
+    for coord in costs.coords():
+        costs[coord] = rng.choice([1, 1, 1, 2, 3, inf])
+    return costs, rng
+
+
+def _check(field):
+    """ Each direction leads to a neighbor exactly one step cheaper """
+    costs = field.costs
+    for coord, steps in field.distance.items():
+        following = field.next_step(coord)
+        if following is None:
+            assert steps == 0 or steps == inf
+            continue
+        assert steps == field.distance[following] + costs[following]
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_matches_dijkstra(backend, seed):
+    costs, rng = _random_costs(seed)
+    goals = rng.sample(list(costs.coords()), 3)
+    for goal in goals:
+        costs[goal] = 1
+    field = FlowField(costs, goals)
+    _check(field)
+    cube_costs = {coord.to_cube(): value for coord, value in costs.items()
+                  if value != inf}
+    cube_goals = [goal.to_cube() for goal in goals]
+    for coord in list(costs.coords())[::5]:
+        if costs[coord] == inf:
+            continue
+        found = dijkstra(coord.to_cube(), cube_goals, cube_costs)
+        expected = inf if found is None else found[1]
+        assert field.distance[coord] == expected
+
+
+def test_walk_to_goal(backend):
+    costs = HexMap.parallelogram(10, 10, fill=1)
+    field = FlowField(costs, [Axial(9, 9), Axial(0, 9)])
+    position = Cube(5, -5, 0)
+    walked = 0
+    while field.next_step(position) is not None:
+        position = field.next_step(position)
+        walked += 1
+    assert position in (Cube(9, -18, 9), Cube(0, -9, 9))
+    assert walked == field.distance[Cube(5, -5, 0)] == 9
+    assert field.next_step(Axial(1, 1)) in Axial(1, 1).neighbors()
+    assert field.next_step(Axial(50, 0)) is None
+    assert field.direction[Axial(9, 9)] == -1
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_update(backend, seed):
+    costs, rng = _random_costs(seed)
+    coords = list(costs.coords())
+    goals = rng.sample(coords, 2)
+    field = FlowField(costs, goals)
+    for _ in range(15):
+        changed = rng.sample(coords, rng.randint(1, 4))
+        for coord in changed:
+            costs[coord] = rng.choice([1, 2, 5, inf, -1])
+        field.update(changed)
+        _check(field)
+        fresh = FlowField(costs, goals)
+        assert list(field.distance.data) == list(fresh.distance.data)
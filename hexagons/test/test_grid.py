@@ -0,0 +1,163 @@
+"""
+Test module for hexagonal grids and pixel conversions
+"""
+
+
+import random
+import pytest
+import hexagons.arrays as arrays
+import hexagons.grid as grid_module
+from hexagons.coordinate import Axial, Cube
+from hexagons.grid import HexagonGrid
+
+
+def _reference_hexagons(grid):
+    """ Hexagon list computed one hexagon at a time """
+    result = []
+    for cube in grid.center_hex.to_cube().circle_around(grid.size):
+        coord = cube.to_axial()
+        center = grid.get_center(coord)
+        result.append((coord, center, tuple(grid.center_to_corners(center))))
+    return result
+
+
+def _assert_same_hexagons(hexagons, reference):
+    assert len(hexagons) == len(reference)
+    for (coord, center, corners), (rcoord, rcenter, rcorners) in \
+            zip(hexagons, reference):
+        assert coord == rcoord
+        assert center == pytest.approx(rcenter)
+        for corner, rcorner in zip(corners, rcorners):
+            assert corner == pytest.approx(rcorner)
+
+
+@pytest.mark.parametrize('hex_format', ['flat', 'pointy'])
+def test_hexagon_list(hex_format):
+    grid = HexagonGrid(600, Axial(1, -2), hex_format=hex_format, grid_size=4)
+    _assert_same_hexagons(grid.hexagon_list(), _reference_hexagons(grid))
+
+
+def test_hexagon_list_cached():
+    grid = HexagonGrid(600, Axial(0, 0), grid_size=3)
+    first = grid.hexagon_list()
+    assert grid.hexagon_list() == first
+    first.clear()
+    assert len(grid.hexagon_list()) == 37
+
+
+@pytest.mark.parametrize('hex_format', ['flat', 'pointy'])
+def test_hexagon_list_after_pan(hex_format):
+    grid = HexagonGrid(600, Axial(0, 0), hex_format=hex_format, grid_size=3)
+    grid.hexagon_list()
+    grid.move_center(Axial(2, -1))
+    _assert_same_hexagons(grid.hexagon_list(), _reference_hexagons(grid))
+    assert grid.hexagon_list()[0].axiscoord == Axial(-1, 2)
+
+
+def test_hexagon_list_after_resize():
+    grid = HexagonGrid(600, Axial(0, 0), grid_size=3)
+    grid.hexagon_list()
+    grid.hex_format = 'flat'
+    _assert_same_hexagons(grid.hexagon_list(), _reference_hexagons(grid))
+
+
+@pytest.mark.parametrize('hex_format', ['flat', 'pointy'])
+def test_get_centers(backend, hex_format):
+    grid = HexagonGrid(600, Axial(1, -1), hex_format=hex_format, grid_size=4)
+    axials = [cube.to_axial() for cube in Cube(3, -1, -2).circle_around(5)]
+    xs, ys = grid.get_centers(arrays.AxialArray.from_axials(axials))
+    assert list(zip(xs, ys)) == list(grid.all_centers(axials))
+
+
+@pytest.mark.parametrize('hex_format', ['flat', 'pointy'])
+def test_clicked_hexes(backend, hex_format):
+    grid = HexagonGrid(600, Axial(2, 0), hex_format=hex_format, grid_size=4)
+    rng = random.Random(3)
+    points = [(rng.uniform(-50, 650), rng.uniform(-50, 650))
+              for i in range(500)]
+    points += [center for _, center, _ in grid.hexagon_list()]
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    hexes, inside = grid.clicked_hexes(xs, ys)
+    for point, coord, is_inside in zip(points, hexes, inside):
+        expected = grid.clicked_hex(point)
+        assert bool(is_inside) == (expected is not None)
+        if expected is not None:
+            assert coord == expected
+
+
+def _clipped_area(polygon, width, height):
+    """ Area of a convex polygon inside the rectangle (0, 0, width, height) """
+    edges = [(0, 1, 0), (0, -1, -width), (1, 1, 0), (1, -1, -height)]
+    for axis, sign, bound in edges:
+        clipped = []
+        for i, current in enumerate(polygon):
+            previous = polygon[i - 1]
+            cur_in = sign * current[axis] >= bound
+            prev_in = sign * previous[axis] >= bound
+            if cur_in != prev_in:
+                t = ((bound / sign - previous[axis]) /
+                     (current[axis] - previous[axis]))
+                clipped.append((previous[0] + t * (current[0] - previous[0]),
+                                previous[1] + t * (current[1] - previous[1])))
+            if cur_in:
+                clipped.append(current)
+        polygon = clipped
+    return abs(sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1)
+                   in zip(polygon, polygon[1:] + polygon[:1]))) / 2
+
+
+@pytest.mark.parametrize('hex_format', ['flat', 'pointy'])
+@pytest.mark.parametrize('zoom', [0.35, 1, 2.7])
+def test_viewport_visible_hexes(hex_format, zoom):
+    view = grid_module.Viewport(317, 211, Axial(40, -25), hex_format=hex_format,
+                                hex_size=13.7, zoom=zoom)
+    visible = view.visible_hexes()
+    assert len(set(visible)) == len(visible)
+    expected = {cube.to_axial()
+                for cube in Axial(40, -25).to_cube().circle_around(60)
+                if _clipped_area(list(view.coord_to_corners(cube.to_axial())),
+                                 317, 211) > 1e-6}
+    assert set(visible) == expected
+    assert all(view.inside_boundary(coord) for coord in visible)
+
+
+@pytest.mark.parametrize('hex_format', ['flat', 'pointy'])
+def test_viewport_clicked_hex(hex_format):
+    view = grid_module.Viewport(400, 250, Axial(-7, 3), hex_format=hex_format,
+                                hex_size=9, zoom=1.5)
+    visible = set(view.visible_hexes())
+    rng = random.Random(5)
+    for i in range(500):
+        point = (rng.uniform(-30, 430), rng.uniform(-30, 280))
+        coord = view.clicked_hex(point)
+        if 0 <= point[0] < 400 and 0 <= point[1] < 250:
+            assert coord in visible
+        else:
+            assert coord is None
+    assert view.clicked_hex((200, 125)) == Axial(-7, 3)
+
+
+def test_viewport_contains():
+    def contains(coord):
+        return 0 <= coord.q < 50 and 0 <= coord.r < 50
+
+    view = grid_module.Viewport(300, 300, Axial(0, 0), hex_size=10,
+                                contains=contains)
+    visible = view.visible_hexes()
+    assert visible and all(map(contains, visible))
+    assert view.clicked_hex((150, 150)) == Axial(0, 0)
+    assert view.clicked_hex((100, 100)) is None
+
+
+def test_viewport_hexagon_list():
+    view = grid_module.Viewport(500, 300, Axial(3, 3), hex_size=12)
+    hexagons = view.hexagon_list()
+    assert [h.axiscoord for h in hexagons] == view.visible_hexes()
+    for coord, center, corners in hexagons:
+        assert center == pytest.approx(view.get_center(coord))
+        for corner, expected in zip(corners, view.coord_to_corners(coord)):
+            assert corner == pytest.approx(expected)
+    view.zoom = 0.5
+    assert len(view.hexagon_list()) > len(hexagons)
+    view.move_center(Axial(1000, -1000))
+    assert view.get_center(Axial(1000, -1000)) == pytest.approx((250, 150))
@@ -0,0 +1,116 @@
+"""
+Test module for the opt-in instrumentation
+"""
+
+
+import os
+import subprocess
+import sys
+import pytest
+from hexagons import batch, instrument, pathfinding
+from hexagons.coordinate import Axial, Cube
+from hexagons.grid import HexagonGrid
+from hexagons.maps import HexMap
+
+
+@pytest.fixture
+def disabled():
+    """ Starts disabled, then goes back to the previous state """
+    was_enabled = instrument.enabled()
+    instrument.disable()
+    instrument.reset()
+    yield
+    instrument.disable()
+    instrument.reset()
+    if was_enabled:
+        instrument.enable()
+
+
+@pytest.fixture
+def enabled(disabled):
+    instrument.enable()
+
+
+def test_disabled_leaves_originals(disabled):
+    new, trusted = Cube.__dict__['__new__'], Cube.__dict__['_trusted']
+    astar, floodfill = pathfinding.astar, Cube.floodfill
+    instrument.enable()
+    assert instrument.enabled()
+    assert pathfinding.astar is not astar
+    assert batch.astar is pathfinding.astar
+    instrument.disable()
+    assert not instrument.enabled()
+    assert Cube.__dict__['__new__'] is new
+    assert Cube.__dict__['_trusted'] is trusted
+    assert pathfinding.astar is astar and batch.astar is astar
+    assert Cube.floodfill is floodfill
+
+
+def test_constructions(enabled):
+    Cube(1, -1, 0)
+    with pytest.raises(ValueError):
+        Cube(1, 1, 1)
+    Cube(1, -1, 0) + Cube(0, 1, -1)
+    Axial(2, 3)
+    counters = instrument.snapshot()['counters']
+    assert counters['Cube.validations'] == 4
+    assert counters['Cube.validation_failures'] == 1
+    assert counters['Cube.constructions'] == 4
+    assert counters['Cube.trusted_constructions'] == 1
+    assert counters['Axial.constructions'] == 1
+
+
+def test_hexagon_list_cache(enabled):
+    grid = HexagonGrid(400, Axial(0, 0), grid_size=3)
+    grid.hexagon_list()
+    grid.hexagon_list()
+    grid.move_center(Axial(1, 0))
+    grid.hexagon_list()
+    counters = instrument.snapshot()['counters']
+    assert counters['HexagonGrid.hexagon_list.misses'] == 2
+    assert counters['HexagonGrid.hexagon_list.hits'] == 1
+
+
+def test_obstacle_callbacks(enabled):
+    walls = set(Cube.origin.ring(2))
+    asked = []
+
+    def obstacle(cube):
+        asked.append(cube)
+        return cube in walls
+
+    expected = Cube.origin.floodfill(4, walls)
+    assert Cube.origin.floodfill(4, obstacle) == expected
+    counters = instrument.snapshot()['counters']
+    assert counters['Cube.distance_map.obstacle'] == 2 * len(asked)
+    assert counters['obstacle_callbacks'] == 2 * len(asked)
+
+
+def test_bitmap_obstacles(enabled):
+    bitmap = HexMap.hexagon(4, dtype='b')
+    for wall in Cube.origin.ring(2):
+        bitmap[wall] = 1
+    assert Cube.origin.floodfill(4, bitmap) == set(Cube.origin.circle_around(1))
+    assert instrument.snapshot()['counters']['obstacle_callbacks'] == 18
+
+
+def test_timers(enabled):
+    pathfinding.astar(Cube.origin, Cube(3, -3, 0))
+    batch.astar(Cube.origin, Cube(3, -3, 0), impassable=lambda cube: False)
+    snapshot = instrument.snapshot()
+    assert snapshot['enabled']
+    assert snapshot['timers']['astar']['calls'] == 2
+    assert snapshot['timers']['astar']['seconds'] > 0
+    assert snapshot['counters']['astar.impassable'] > 0
+    instrument.reset()
+    assert instrument.snapshot()['timers'] == {}
+
+
+def test_environment_variable():
+    environment = dict(os.environ, HEXAGONS_INSTRUMENT='1')
+    code = ('import hexagons.instrument as i; '
+            'from hexagons.coordinate import Cube; Cube(0, 0, 0); '
+            'print(i.enabled(), i.snapshot()["counters"]["Cube.validations"])')
+    output = subprocess.run([sys.executable, '-c', code], env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['True', '1']
@@ -0,0 +1,166 @@
+"""
+Test module for dense per-hexagon maps
+"""
+
+
+import pytest
+import hexagons.maps as maps
+from hexagons.arrays import AxialArray
+from hexagons.coordinate import Axial, Cube, Offset, OFFSET_LAYOUTS
+from hexagons.maps import HexMap
+
+
+SHAPES = [
+    lambda: HexMap.hexagon(3, Axial(2, -5)),
+    lambda: HexMap.parallelogram(4, 3, Axial(-1, 2)),
+    lambda: HexMap.rectangle(5, 4, 'odd-r'),
+    lambda: HexMap.rectangle(5, 4, 'even-r'),
+    lambda: HexMap.rectangle(4, 5, 'odd-q'),
+    lambda: HexMap.rectangle(4, 5, 'even-q'),
+]
+
+
+@pytest.mark.parametrize('make', SHAPES)
+def test_index_roundtrip(backend, make):
+    hexmap = make()
+    coords = list(hexmap.coords())
+    assert len(coords) == len(hexmap) == len(set(coords))
+    for index, coord in enumerate(coords):
+        assert hexmap.index(coord) == index
+        assert hexmap.index(coord.to_cube()) == index
+        assert hexmap.coord(index) == coord
+    assert hexmap.bounds == (min(c.q for c in coords), min(c.r for c in coords),
+                             max(c.q for c in coords), max(c.r for c in coords))
+    with pytest.raises(IndexError):
+        hexmap.coord(len(hexmap))
+
+
+@pytest.mark.parametrize('make', SHAPES)
+def test_outside(backend, make):
+    hexmap = make()
+    coords = set(hexmap.coords())
+    around = {cube.to_axial() for cube in Cube.origin.circle_around(12)}
+    for coord in around - coords:
+        assert coord not in hexmap
+        assert hexmap.get(coord, 'x') == 'x'
+        with pytest.raises(KeyError):
+            hexmap[coord] = 1
+    batch = AxialArray.from_axials(list(around))
+    expected = [hexmap.index(c) for c in batch]
+    assert list(hexmap.indexes(batch)) == [-1 if i is None else i
+                                           for i in expected]
+
+
+def test_hexagon_shape(backend):
+    hexmap = HexMap.hexagon(4, Axial(1, 1))
+    expected = {c.to_axial() for c in Axial(1, 1).to_cube().circle_around(4)}
+    assert set(hexmap) == expected
+    assert hexmap.spec == ('hexagon', 4, 1, 1)
+
+
+def test_rectangle_shape(backend):
+    hexmap = HexMap.rectangle(3, 2, 'odd-r')
+    assert list(hexmap.coords()) == [Axial(0, 0), Axial(1, 0), Axial(2, 0),
+                                     Axial(0, 1), Axial(1, 1), Axial(2, 1)]
+    hexmap = HexMap.rectangle(2, 2, 'even-q')
+    assert list(hexmap.coords()) == [Axial(0, 0), Axial(1, -1),
+                                     Axial(0, 1), Axial(1, 0)]
+    with pytest.raises(ValueError):
+        HexMap.rectangle(2, 2, 'odd-x')
+
+
+@pytest.mark.parametrize('layout', OFFSET_LAYOUTS)
+def test_rectangle_offset_order(backend, layout):
+    hexmap = HexMap.rectangle(5, 4, layout)
+    for index, axial in enumerate(hexmap.coords()):
+        offset = axial.to_offset(layout)
+        assert index == offset.row * 5 + offset.col
+        assert hexmap.index(offset) == index
+        assert hexmap.index(offset.to_cube().to_doubled()) == index
+    assert Offset(5, 0, layout) not in hexmap
+
+
+def test_bitmap_obstacles(backend):
+    bitmap = HexMap.hexagon(5, dtype='b')
+    walls = set(Cube.origin.ring(2)) - {Cube(2, -2, 0)}
+    for cube in walls:
+        bitmap[cube] = 1
+    expected = Cube.origin.distance_map(4, walls)
+    assert Cube.origin.distance_map(4, bitmap) == expected
+    outside = Cube.origin.distance_map(9, bitmap)
+    assert all(cube in bitmap for cube in outside)
+    chunked = maps.ChunkedMap(chunk_size=4, dtype='b')
+    for cube in walls:
+        chunked[cube] = 1
+    assert Cube.origin.distance_map(4, chunked) == expected
+
+
+def test_values(backend):
+    hexmap = HexMap.hexagon(2, dtype='b', fill=1)
+    assert all(v == 1 for _, v in hexmap.items())
+    hexmap[Axial(1, 0)] = 5
+    hexmap[Cube(0, 2, -2)] = 5
+    assert hexmap[Axial(0, -2)] == 5
+    assert hexmap.where(5) == [Axial(0, -2), Axial(1, 0)]
+    assert hexmap.where(lambda v: v > 1) == [Axial(0, -2), Axial(1, 0)]
+    copy = hexmap.copy()
+    hexmap.fill(0)
+    assert hexmap.where(0) == list(hexmap.coords())
+    assert copy[Axial(1, 0)] == 5
+    copy.fill(7, [Axial(0, 0), Cube(1, -1, 0)])
+    assert dict(copy.items())[Axial(1, 0)] == 7
+    assert set(copy.where(7)) == {Axial(0, 0), Axial(1, 0)}
+
+
+def test_spec_roundtrip(backend):
+    for make in SHAPES:
+        hexmap = make()
+        assert list(HexMap(hexmap.spec, dtype='i')) == list(hexmap)
+
+
+def test_chunked_map(backend):
+    world = maps.ChunkedMap(chunk_size=8, dtype='i', fill=-1)
+    assert world[Cube(100, -300, 200)] == -1
+    assert world.resident_chunks() == []
+    world[Axial(-1, -1)] = 3
+    world[Cube(20, -45, 25)] = 4
+    assert world[Axial(-1, -1)] == 3
+    assert world.get(Axial(20, 25)) == 4
+    assert world[Axial(0, 0)] == -1
+    assert world.resident_chunks() == [(-1, -1), (2, 3)]
+    assert world.chunk_key(Cube(-9, 1, 8)) == (-2, 1)
+
+
+def test_chunked_map_regions(backend):
+    world = maps.ChunkedMap(chunk_size=4, dtype='i')
+    disk = list(Cube(3, -1, -2).circle_around(5))
+    world.fill(2, disk)
+    assert world.values(disk) == [2] * len(disk)
+    around = list(Cube(3, -1, -2).circle_around(7))
+    values = world.values(around)
+    assert sum(values) == 2 * len(disk)
+    written = {coord for coord, value in world.items() if value == 2}
+    assert written == {cube.to_axial() for cube in disk}
+
+
+def test_chunked_map_eviction(backend):
+    saved = {}
+    world = maps.ChunkedMap(chunk_size=4, dtype='i', max_chunks=2,
+                            spill=saved.__setitem__,
+                            load=lambda key: saved.pop(key, None))
+    for i in range(5):
+        world[Axial(4 * i, 0)] = i + 1
+    assert len(world.resident_chunks()) == 2
+    assert set(saved) == {(0, 0), (1, 0), (2, 0)}
+    assert [world[Axial(4 * i, 0)] for i in range(5)] == [1, 2, 3, 4, 5]
+    assert len(world.resident_chunks()) == 2
+    world.evict((4, 0))
+    assert (4, 0) in saved
+    with pytest.raises(ValueError):
+        maps.ChunkedMap(max_chunks=0)
+    single = maps.ChunkedMap(chunk_size=4, dtype='i', max_chunks=1,
+                             spill=saved.__setitem__,
+                             load=lambda key: saved.pop(key, None))
+    single[Axial(40, 0)] = 7
+    single[Axial(44, 0)] = 8
+    assert (single[Axial(40, 0)], single[Axial(44, 0)]) == (7, 8)
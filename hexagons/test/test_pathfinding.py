@@ -0,0 +1,112 @@
+"""
+Test module for path finding
+"""
+
+
+import pytest
+from hexagons.coordinate import Cube
+from hexagons.pathfinding import astar, dijkstra
+
+
+def _is_path(path):
+    return all(a.distance(b) == 1 for a, b in zip(path, path[1:]))
+
+
+def test_astar_straight():
+    start = Cube(0, 0, 0)
+    goal = Cube(3, -1, -2)
+    path, cost = astar(start, goal)
+    assert cost == start.distance(goal)
+    assert path[0] == start and path[-1] == goal
+    assert len(path) == cost + 1
+    assert _is_path(path)
+
+
+def test_astar_same_cell():
+    start = Cube(1, 1, -2)
+    assert astar(start, start) == ([start], 0)
+
+
+def test_astar_around_wall():
+    start = Cube.origin
+    goal = Cube(3, 0, -3)
+    wall = set(Cube(2, 0, -2).circumference(0)) | \
+        set(c for c in Cube(2, 0, -2).circle_around(2) if c.x == 2)
+    path, cost = astar(start, goal, impassable=wall.__contains__)
+    assert cost > start.distance(goal)
+    assert not wall.intersection(path)
+    assert _is_path(path)
+
+
+def test_astar_unreachable():
+    start = Cube.origin
+    goal = Cube(5, -5, 0)
+    walls = set(goal.neighbors())
+    assert astar(start, goal, impassable=walls.__contains__,
+                 max_cost=20) is None
+
+
+def test_astar_budget():
+    start = Cube.origin
+    goal = Cube(4, -4, 0)
+    assert astar(start, goal, max_cost=3) is None
+    assert astar(start, goal, max_cost=4)[1] == 4
+    walls = set(goal.neighbors())
+    assert astar(start, goal, impassable=walls.__contains__,
+                 max_nodes=50) is None
+
+
+def test_astar_weighted():
+    start = Cube.origin
+    goal = Cube(2, 0, -2)
+    swamp = Cube(1, 0, -1)
+    path, cost = astar(start, goal,
+                       cost=lambda c: 10 if c == swamp else 1)
+    assert swamp not in path
+    assert cost == 3
+
+
+def test_astar_cost_mapping():
+    start = Cube.origin
+    goal = Cube(2, -2, 0)
+    costs = {c: 1 for c in start.circle_around(3)}
+    costs[Cube(1, -1, 0)] = 5
+    del costs[Cube(2, -1, -1)]
+    path, cost = astar(start, goal, cost=costs)
+    assert cost == 3
+    assert Cube(1, -1, 0) not in path
+    assert Cube(2, -1, -1) not in path
+
+
+def test_dijkstra_nearest_goal():
+    start = Cube.origin
+    goals = [Cube(4, -4, 0), Cube(-2, 0, 2), Cube(0, 3, -3)]
+    path, cost = dijkstra(start, goals)
+    assert path[-1] == Cube(-2, 0, 2)
+    assert cost == 2
+    assert _is_path(path)
+
+
+def test_dijkstra_no_goals():
+    assert dijkstra(Cube.origin, []) is None
+
+
+def test_astar_exact_node_budget():
+    start = Cube.origin
+    goal = Cube(3, -3, 0)
+    assert astar(start, goal, max_nodes=3) == \
+        ([start, Cube(1, -1, 0), Cube(2, -2, 0), goal], 3)
+    assert astar(start, goal, max_nodes=2) is None
+    assert astar(start, start, max_nodes=0) == ([start], 0)
+
+
+def test_step_cost_below_minimum():
+    start = Cube.origin
+    goal = Cube(2, -2, 0)
+    with pytest.raises(ValueError):
+        astar(start, goal, cost=lambda c: 0.5)
+    assert astar(start, goal, cost=lambda c: 0.5, min_step_cost=0.5) == \
+        ([start, Cube(1, -1, 0), goal], 1.0)
+    with pytest.raises(ValueError):
+        dijkstra(start, [goal], cost=lambda c: -1)
+    assert dijkstra(start, [goal], cost=lambda c: 0)[1] == 0
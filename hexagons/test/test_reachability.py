@@ -0,0 +1,96 @@
+"""
+Test module for incremental reachability
+"""
+
+
+import random
+import pytest
+from hexagons.coordinate import Cube
+from hexagons.maps import HexMap
+from hexagons.reachability import Reachability
+
+
+def _check(reach, obstacles):
+    expected = reach.origin.distance_map(reach.budget, obstacles)
+    assert reach.distances() == expected
+    assert reach.reachable() == reach.origin.floodfill(reach.budget, obstacles)
+
+
+def test_initial():
+    obstacles = {Cube(1, -1, 0), Cube(1, 0, -1), Cube(0, 1, -1)}
+    reach = Reachability(Cube.origin, 4, obstacles)
+    _check(reach, obstacles)
+    assert reach.distance(Cube(2, -1, -1)) == 4
+    assert reach.distance(Cube(1, -1, 0)) is None
+    assert Cube(1, -1, 0) not in reach
+    assert len(Reachability(Cube.origin, 0)) == 1
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_changes(seed):
+    rng = random.Random(seed)
+    area = list(Cube.origin.circle_around(9))
+    obstacles = set(rng.sample(area, 60))
+    reach = Reachability(Cube(1, -1, 0), 6, obstacles)
+    _check(reach, obstacles)
+    for _ in range(40):
+        before = reach.distances()
+        changes = rng.sample(area, rng.randint(1, 6))
+        obstacles.symmetric_difference_update(changes)
+        changed = reach.changed(changes)
+        _check(reach, obstacles)
+        after = reach.distances()
+        assert changed == {cube for cube in set(before) | set(after)
+                           if before.get(cube) != after.get(cube)}
+
+
+def test_move_origin():
+    rng = random.Random(7)
+    obstacles = set(rng.sample(list(Cube.origin.circle_around(10)), 80))
+    reach = Reachability(Cube.origin, 5, obstacles)
+    position = Cube.origin
+    for _ in range(20):
+        before = reach.distances()
+        position = rng.choice(list(position.neighbors()))
+        changed = reach.move_origin(position)
+        _check(reach, obstacles)
+        after = reach.distances()
+        assert changed == {cube for cube in set(before) | set(after)
+                           if before.get(cube) != after.get(cube)}
+
+
+def test_local_work():
+    """ Changes away from most shortest paths touch few hexagons """
+    asked = []
+
+    def blocked(cube):
+        asked.append(cube)
+        return cube in walls
+
+    walls = {Cube(x, -x - 3, 3) for x in range(-3, 4)}
+    reach = Reachability(Cube.origin, 12, blocked)
+    del asked[:]
+    walls.add(Cube(6, -10, 4))
+    changed = reach.changed([Cube(6, -10, 4)])
+    assert reach.distances() == Cube.origin.distance_map(12, walls)
+    assert asked == [Cube(6, -10, 4)]
+    assert len(changed) < 10
+    walls.discard(Cube(0, -3, 3))
+    changed = reach.changed([Cube(0, -3, 3)])
+    assert reach.distances() == Cube.origin.distance_map(12, walls)
+    assert len(changed) < len(reach) / 4
+    assert len(asked) < 6 * len(changed) + 2
+
+
+def test_bitmap_obstacles():
+    bitmap = HexMap.hexagon(8, dtype='b')
+    walls = {Cube(x, -x - 3, 3) for x in range(-3, 4)}
+    for wall in walls:
+        bitmap[wall] = 1
+    reach = Reachability(Cube.origin, 6, bitmap)
+    assert reach.distances() == Cube.origin.distance_map(6, bitmap)
+    bitmap[Cube(0, -3, 3)] = 0
+    reach.changed([Cube(0, -3, 3)])
+    assert reach.distances() == Cube.origin.distance_map(6, bitmap)
+    with pytest.raises(TypeError):
+        Reachability(Cube.origin, 6, list(walls))
@@ -0,0 +1,108 @@
+"""
+Test module for the pygame renderer, using the dummy video driver
+"""
+
+
+import os
+import pytest
+from hexagons.coordinate import Axial
+from hexagons.grid import HexagonGrid
+
+pygame = pytest.importorskip('pygame')
+render = pytest.importorskip('hexagons.render')
+
+RED = (255, 0, 0, 255)
+BLUE = (0, 0, 255, 255)
+BACKGROUND = (0, 0, 0, 255)
+
+
+@pytest.fixture
+def display():
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.font.init()
+    yield pygame.display.set_mode((200, 200))
+    pygame.quit()
+
+
+@pytest.fixture
+def scene(display):
+    grid = HexagonGrid(200, Axial(0, 0), grid_size=2)
+    colors = {}
+
+    def fill(coord):
+        return colors.get(coord, RED)
+
+    return render.HexRenderer(display, grid, fill), grid, colors
+
+
+def _pixel(renderer, coord):
+    x, y = renderer.grid.get_center(coord)
+    return tuple(renderer.surface.get_at((int(x), int(y))))
+
+
+def test_first_frame_draws_everything(scene):
+    renderer, grid, _ = scene
+    assert renderer.draw() == [renderer.surface.get_rect()]
+    for coord, _, _ in grid.hexagon_list():
+        assert _pixel(renderer, coord) == RED
+    assert tuple(renderer.surface.get_at((0, 0))) == BACKGROUND
+    assert renderer.draw() == []
+
+
+def test_dirty_hexes_only(scene):
+    renderer, grid, colors = scene
+    renderer.draw()
+    changed, kept = Axial(1, 0), Axial(-1, 0)
+    colors[changed] = colors[kept] = BLUE
+    renderer.mark_dirty(changed, Axial(10, 10))
+    rects = renderer.draw()
+    assert len(rects) == 1
+    x, y = grid.get_center(changed)
+    assert rects[0].collidepoint(x, y)
+    assert _pixel(renderer, changed) == BLUE
+    assert _pixel(renderer, kept) == RED
+    for neighbor in changed.neighbors():
+        if grid.inside_boundary(neighbor):
+            assert _pixel(renderer, neighbor) == RED
+
+
+def test_move_center_redraws_everything(scene):
+    renderer, grid, colors = scene
+    renderer.draw()
+    colors[Axial(1, 0)] = BLUE
+    renderer.move_center(Axial(1, 0))
+    assert renderer.draw() == [renderer.surface.get_rect()]
+    assert _pixel(renderer, Axial(1, 0)) == BLUE
+    assert tuple(renderer.surface.get_at((100, 100))) == BLUE
+    grid.move_center(Axial(0, 0))
+    assert renderer.draw() == [renderer.surface.get_rect()]
+
+
+def test_glyphs(display):
+    grid = HexagonGrid(200, Axial(0, 0), grid_size=2)
+    font = pygame.font.Font(None, 20)
+    texts = {Axial(0, 0): 'a'}
+    renderer = render.HexRenderer(display, grid, lambda coord: RED,
+                                  text=texts.get, font=font,
+                                  text_color=BLUE)
+    renderer.draw()
+    x, y = grid.get_center(Axial(0, 0))
+    area = pygame.Rect(int(x) - 8, int(y) - 8, 16, 16)
+    pixels = {tuple(display.get_at(point)) for point in
+              ((px, py) for px in range(area.left, area.right)
+               for py in range(area.top, area.bottom))}
+    assert BLUE in pixels
+    del texts[Axial(0, 0)]
+    renderer.mark_dirty(Axial(0, 0))
+    renderer.draw()
+    pixels = {tuple(display.get_at(point)) for point in
+              ((px, py) for px in range(area.left, area.right)
+               for py in range(area.top, area.bottom))}
+    assert pixels == {RED}
+
+
+def test_text_needs_font(display):
+    grid = HexagonGrid(200, Axial(0, 0), grid_size=2)
+    with pytest.raises(ValueError):
+        render.HexRenderer(display, grid, lambda coord: RED, text=str)
@@ -0,0 +1,95 @@
+"""
+Test module for lazy shapes
+"""
+
+
+import pytest
+from hexagons.coordinate import Cube
+from hexagons.shapes import (Arc, Cone, Difference, Disk, Intersection, Line,
+                             Parallelogram, Ring, Translated, Union)
+from hexagons.visibility import field_of_view
+
+
+AROUND = list(Cube(1, -3, 2).circle_around(12))
+
+
+def _check(shape, expected):
+    """ Compares a shape with the list of hexagons it should have """
+    cells = list(shape)
+    assert cells == expected
+    assert len(shape) == len(expected)
+    expected = set(expected)
+    for cube in AROUND:
+        assert (cube in shape) == (cube in expected)
+    for axis, (low, high) in enumerate(shape.bounds()):
+        assert all(low <= cube[axis] <= high for cube in expected)
+
+
+@pytest.mark.parametrize('radius', [-1, 0, 1, 4])
+def test_disk_and_ring(radius):
+    center = Cube(2, -1, -1)
+    _check(Disk(center, radius), list(center.circle_around(radius)))
+    ring = list(center.ring(radius)) if radius >= 0 else []
+    _check(Ring(center, radius), ring)
+    if radius >= 0:
+        assert set(Ring(center, radius)) == center.circumference(radius)
+
+
+def test_line():
+    start = Cube(1, -3, 2)
+    for end in AROUND[::7]:
+        _check(Line(start, end), list(start.line_to(end)))
+
+
+def test_arc():
+    center = Cube.origin
+    arc = Arc(center, Cube(1, -1, 0), 3)
+    assert set(arc) == center.arc(Cube(1, -1, 0), 3)
+    for cube in AROUND:
+        assert (cube in arc) == (cube in center.arc(Cube(1, -1, 0), 3))
+
+
+def test_cone():
+    center = Cube(1, 0, -1)
+    for facing in center.neighbors():
+        cone = Cone(center, facing, 5)
+        visible = field_of_view(center, 5, set(), facing=facing)
+        _check(cone, [c for c in center.circle_around(5) if c in visible])
+    with pytest.raises(ValueError):
+        Cone(center, Cube(5, -5, 0), 3)
+
+
+def test_parallelogram():
+    shape = Parallelogram(Cube(-2, 1, 1), 4, 3)
+    expected = [Cube(x, -(x + z), z) for z in range(1, 4)
+                for x in range(-2, 2)]
+    _check(shape, expected)
+
+
+def test_translated():
+    shape = Disk(Cube.origin, 2).translate(Cube(3, -1, -2))
+    assert isinstance(shape, Translated)
+    _check(shape, list(Cube(3, -1, -2).circle_around(2)))
+
+
+def test_algebra():
+    a = Disk(Cube.origin, 3)
+    b = Disk(Cube(3, -3, 0), 2)
+    c = Ring(Cube(0, 1, -1), 2)
+    _check(a | b, list(a) + [cube for cube in b if cube not in set(a)])
+    _check(a & b, [cube for cube in a if cube in set(b)])
+    _check(a - b, [cube for cube in a if cube not in set(b)])
+    union = Union(a, b, c)
+    _check(union, list(a | b) + [cube for cube in c
+                                 if cube not in set(a) | set(b)])
+    box = Parallelogram(Cube(-1, 1, 0), 3, 3)
+    _check(box & union, [cube for cube in box if cube in set(union)])
+    assert isinstance(a - b, Difference)
+    assert isinstance(Intersection(a, b, c), Intersection)
+    _check(Union(), [])
+
+
+def test_shape_as_obstacles():
+    wall = Ring(Cube.origin, 2) - Disk(Cube(2, -2, 0), 0)
+    expected = Cube.origin.distance_map(4, set(wall))
+    assert Cube.origin.distance_map(4, wall) == expected
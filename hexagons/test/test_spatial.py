@@ -0,0 +1,86 @@
+"""
+Test module for the spatial index of entities
+"""
+
+
+import random
+import pytest
+from hexagons.coordinate import Cube
+from hexagons.spatial import SpatialIndex
+
+
+def _random_index(count, spread, seed):
+    rng = random.Random(seed)
+    index = SpatialIndex(super_size=4)
+    cells = list(Cube.origin.circle_around(spread))
+    for entity in range(count):
+        index.insert(entity, rng.choice(cells))
+    return index
+
+
+def _brute_force(index, cells):
+    """ Entities on the cells, looking at every entity """
+    by_cell = {}
+    for entity in index:
+        by_cell.setdefault(index.position(entity), []).append(entity)
+    return [entity for cell in cells for entity in by_cell.get(cell, ())]
+
+
+@pytest.mark.parametrize('count', [5, 40, 400])
+def test_within(count):
+    index = _random_index(count, 12, count)
+    for center in [Cube.origin, Cube(5, -9, 4), Cube(-20, 10, 10)]:
+        for radius in [0, 1, 3, 8, 30]:
+            expected = _brute_force(index, center.circle_around(radius))
+            assert index.within(center, radius) == expected
+
+
+@pytest.mark.parametrize('count', [5, 40, 400])
+def test_ring(count):
+    index = _random_index(count, 12, count)
+    for center in [Cube.origin, Cube(5, -9, 4)]:
+        for radius in [0, 1, 4, 15]:
+            expected = _brute_force(index, center.ring(radius))
+            assert index.ring(center, radius) == expected
+            assert set(index.ring(center, radius)) == set(
+                _brute_force(index, center.circumference(radius)))
+
+
+def test_arc():
+    index = _random_index(200, 6, 1)
+    arc = Cube.origin.arc(Cube(1, -1, 0), 3)
+    assert set(index.arc(Cube.origin, Cube(1, -1, 0), 3)) == set(
+        _brute_force(index, arc))
+
+
+@pytest.mark.parametrize('count', [3, 40, 400])
+def test_nearest(count):
+    index = _random_index(count, 15, count)
+    center = Cube(2, 1, -3)
+    spiral = list(center.spiral(40))
+    ordered = _brute_force(index, spiral)
+    for k in [0, 1, 5, 50, 1000]:
+        assert index.nearest(center, k) == ordered[:k]
+    within = _brute_force(index, center.spiral(4))
+    assert index.nearest(center, 1000, max_radius=4) == within
+
+
+def test_insert_move_remove():
+    index = SpatialIndex()
+    index.insert('a', Cube(1, -1, 0))
+    index.insert('b', Cube(1, -1, 0))
+    index.insert('c', Cube(30, -60, 30))
+    with pytest.raises(ValueError):
+        index.insert('a', Cube.origin)
+    assert index.at(Cube(1, -1, 0)) == ['a', 'b']
+    index.move('a', Cube(29, -59, 30))
+    assert index.position('a') == Cube(29, -59, 30)
+    assert index.within(Cube(30, -60, 30), 1) == ['a', 'c']
+    index.remove('c')
+    assert 'c' not in index and len(index) == 2
+    assert index.within(Cube(30, -60, 30), 1) == ['a']
+    with pytest.raises(KeyError):
+        index.remove('c')
+    index.remove('a')
+    index.remove('b')
+    assert index.within(Cube.origin, 100) == []
@@ -0,0 +1,90 @@
+"""
+Test module for memory-mapped hex map files
+"""
+
+
+import pytest
+import hexagons.maps as maps
+import hexagons.storage as storage
+from hexagons.coordinate import Axial, Cube
+from hexagons.maps import HexMap
+
+
+def _layers():
+    terrain = HexMap.hexagon(6, Axial(3, -2), dtype='B')
+    elevation = HexMap.hexagon(6, Axial(3, -2), dtype='d')
+    owner = HexMap.hexagon(6, Axial(3, -2), dtype='i', fill=-1)
+    for index, coord in enumerate(terrain.coords()):
+        terrain[coord] = index % 7
+        elevation[coord] = index / 4
+    owner[Axial(3, -2)] = 12
+    return {'terrain': terrain, 'elevation': elevation, 'owner': owner}
+
+
+def test_roundtrip(backend, tmp_path):
+    path = tmp_path / 'world.hex'
+    layers = _layers()
+    storage.save(path, layers)
+    with storage.open_maps(path) as opened:
+        assert opened.names == ['terrain', 'elevation', 'owner']
+        assert opened.spec == ('hexagon', 6, 3, -2)
+        assert opened.bounds == (-3, -8, 9, 4)
+        for name, layer in layers.items():
+            assert list(opened[name].items()) == list(layer.items())
+        disk = list(Cube(3, -1, -2).circle_around(2))
+        assert opened.values('owner', disk) == [layers['owner'].get(c)
+                                                for c in disk]
+        assert opened.values('terrain', [Axial(100, 0)]) == [None]
+
+
+def test_read_only(backend, tmp_path):
+    path = tmp_path / 'world.hex'
+    storage.save(path, _layers())
+    with storage.open_maps(path) as opened:
+        with pytest.raises((TypeError, ValueError)):
+            opened['terrain'][Axial(3, -2)] = 1
+        with pytest.raises(ValueError):
+            opened.append('terrain', [(Axial(3, -2), 1)])
+
+
+def test_change_log(backend, tmp_path):
+    path = tmp_path / 'world.hex'
+    storage.save(path, _layers())
+    size = path.stat().st_size
+    with storage.open_maps(path, 'a') as opened:
+        opened.append('owner', [(Axial(4, -2), 5), (Cube(3, 0, -3), 6)])
+        opened.append('elevation', [(Axial(4, -2), 2.5)])
+        assert opened['owner'][Axial(4, -2)] == 5
+        with pytest.raises(KeyError):
+            opened.append('owner', [(Axial(50, 0), 1)])
+    assert path.stat().st_size > size
+    with storage.open_maps(path) as opened:
+        assert opened['owner'][Axial(4, -2)] == 5
+        assert opened['owner'][Axial(3, -3)] == 6
+        assert opened['elevation'][Axial(4, -2)] == 2.5
+        assert opened['owner'][Axial(3, -2)] == 12
+    storage.compact(path)
+    assert path.stat().st_size == size
+    with storage.open_maps(path) as opened:
+        assert opened['owner'][Axial(3, -3)] == 6
+        assert opened['elevation'][Axial(4, -2)] == 2.5
+
+
+def test_write_in_place(backend, tmp_path):
+    path = tmp_path / 'world.hex'
+    storage.save(path, _layers())
+    with storage.open_maps(path, 'r+') as opened:
+        opened['terrain'].fill(3)
+    with storage.open_maps(path) as opened:
+        assert set(opened['terrain'].data) == {3}
+
+
+def test_invalid_files(backend, tmp_path):
+    path = tmp_path / 'bad.hex'
+    path.write_bytes(b'not a map file at all')
+    with pytest.raises(ValueError):
+        storage.open_maps(path)
+    with pytest.raises(ValueError):
+        storage.save(path, {})
+    with pytest.raises(ValueError):
+        storage.save(path, {'a': HexMap.hexagon(1), 'b': HexMap.hexagon(2)})
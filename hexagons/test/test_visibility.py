@@ -0,0 +1,102 @@
+"""
+Test module for field of view
+"""
+
+
+import random
+import pytest
+from hexagons.coordinate import Cube
+from hexagons.maps import HexMap
+from hexagons.visibility import field_of_view, ray_fan
+
+
+def test_open_field():
+    center = Cube(2, -1, -1)
+    assert field_of_view(center, 4, set()) == set(center.circle_around(4))
+
+
+def test_wall_casts_shadow():
+    center = Cube.origin
+    wall = Cube(1, -1, 0)
+    visible = field_of_view(center, 3, {wall})
+    assert wall in visible
+    assert Cube(2, -2, 0) not in visible
+    assert Cube(3, -3, 0) not in visible
+    assert Cube(-3, 3, 0) in visible
+
+
+def test_callable_opaque():
+    center = Cube.origin
+    walls = {Cube(1, -1, 0), Cube(0, 1, -1)}
+    assert field_of_view(center, 3, walls.__contains__) == \
+        field_of_view(center, 3, walls)
+
+
+def test_bitmap_opaque():
+    walls = {Cube(1, -1, 0), Cube(0, 1, -1), Cube(-2, 0, 2)}
+    bitmap = HexMap.hexagon(5, dtype='b')
+    for wall in walls:
+        bitmap[wall] = 1
+    assert field_of_view(Cube.origin, 4, bitmap) == \
+        field_of_view(Cube.origin, 4, walls)
+    targets = list(Cube.origin.ring(4))
+    assert ray_fan(Cube.origin, targets, bitmap) == \
+        ray_fan(Cube.origin, targets, walls)
+    with pytest.raises(TypeError):
+        field_of_view(Cube.origin, 4, list(walls))
+
+
+def test_symmetry():
+    rng = random.Random(7)
+    cells = list(Cube.origin.circle_around(5))
+    walls = set(rng.sample(cells, 12))
+    floors = [c for c in cells if c not in walls]
+    views = {c: field_of_view(c, 10, walls) for c in floors}
+    for a in floors:
+        for b in floors:
+            assert (b in views[a]) == (a in views[b])
+
+
+def test_facing_cone():
+    center = Cube.origin
+    facing = Cube(1, 0, -1)
+    visible = field_of_view(center, 3, set(), facing=facing)
+    ring = set(c for c in visible if center.distance(c) == 3)
+    assert ring == center.arc(facing, 3)
+    assert Cube(-1, 0, 1) not in visible
+
+
+def test_facing_not_neighbor():
+    with pytest.raises(ValueError):
+        field_of_view(Cube.origin, 3, set(), facing=Cube(2, 0, -2))
+
+
+def test_ray_fan_lines():
+    origin = Cube(1, -2, 1)
+    targets = list(origin.circumference(4))
+    lines = ray_fan(origin, targets)
+    assert set(lines) == set(targets)
+    assert all(lines[t] == list(origin.line_to(t)) for t in targets)
+
+
+def test_ray_fan_blocked():
+    origin = Cube.origin
+    wall = Cube(1, -1, 0)
+    calls = []
+
+    def opaque(cube):
+        calls.append(cube)
+        return cube == wall
+
+    lines = ray_fan(origin, origin.circumference(3), opaque)
+    assert lines[Cube(3, -3, 0)] == [origin, wall]
+    assert lines[Cube(-3, 3, 0)][-1] == Cube(-3, 3, 0)
+    assert len(calls) == len(set(calls))
+
+
+def test_ray_fan_collinear_targets():
+    origin = Cube(3, -7, 4)
+    step = Cube(2, -1, -1)
+    targets = [origin + step * k for k in range(1, 12)]
+    lines = ray_fan(origin, targets)
+    assert all(lines[t] == list(origin.line_to(t)) for t in targets)
@@ -0,0 +1,134 @@
+"""
+.. module:: visibility
+    :synopsis: Field of view on hexagonal grids
+
+.. moduleauthor:: Diorge Brognara <diorge.bs@gmail.com>
+
+Symmetric shadowcasting, adapted from Albert Ford's square-grid version
+(https://www.albertford.com/shadowcasting) to the six sextants of a hexagon.
+"""
+
+
+from hexagons.coordinate import Cube, obstacle_function
+
+
+def _cone_sextants(origin, facing):
+    """The two sextants of the 120 degree cone facing a neighbor
+
+    Same region as :func:`Cube.arc`
+
+    :returns: tuple of int -- indexes of the sextants
+    """
+    try:
+        index = Cube._neighbor_directions.index(facing - origin)
+    except ValueError:
+        raise ValueError(f'{facing} is not a neighbor of {origin}') from None
+    return ((index - 1) % 6, index)
+
+
+def _scan_sextant(origin, sextant, radius, is_opaque, visible):
+    """Shadowcasts a single sextant, adding the visible cells
+
+    The cell at column col of row depth is
+    origin + depth * corner + col * step, with 0 <= col <= depth.
+    Slopes are kept as exact fractions (numerator, denominator)
+    along the row, 0 at the first corner and 1 at the second.
+    """
+    directions = Cube._neighbor_directions
+    trusted = Cube._trusted
+    ox, oy, oz = origin
+    ax, ay, az = directions[sextant]
+    bx, by, bz = directions[(sextant + 2) % 6]
+    rows = [(1, 0, 1, 1, 1)]
+
+    while rows:
+        depth, start_num, start_den, end_num, end_den = rows.pop()
+        if depth > radius:
+            continue
+        min_col = (2 * depth * start_num + start_den) // (2 * start_den)
+        max_col = -((end_den - 2 * depth * end_num) // (2 * end_den))
+        cx, cy, cz = ox + depth * ax, oy + depth * ay, oz + depth * az
+        previous = None
+        for col in range(min_col, max_col + 1):
+            cell = trusted(cx + col * bx, cy + col * by, cz + col * bz)
+            opaque = is_opaque(cell)
+            if opaque or (col * start_den >= depth * start_num and
+                          col * end_den <= depth * end_num):
+                visible.add(cell)
+            if previous and not opaque:
+                start_num, start_den = 2 * col - 1, 2 * depth
+            elif previous is False and opaque:
+                rows.append((depth + 1, start_num, start_den,
+                             2 * col - 1, 2 * depth))
+            previous = opaque
+        if previous is False:
+            rows.append((depth + 1, start_num, start_den, end_num, end_den))
+
+
+def field_of_view(origin, radius, opaque, facing=None):
+    """The collection of hexagons visible from a point
+
+    Opaque hexagons block the vision behind them, but are visible
+    themselves. Visibility is symmetric: if a sees b, b sees a
+    (as long as neither is opaque). The work is proportional
+    to the visible area, not to the radius cubed.
+
+    :param origin: point of view
+    :type origin: Cube
+    :param radius: maximum distance of the visible hexagons
+    :type radius: int
+    :param opaque: function returning True for opaque coordinates,
+                   a set of opaque coordinates or a bitmap, see
+                   :func:`hexagons.coordinate.obstacle_function`
+    :type opaque: callable, set or bitmap
+    :param facing: limits the vision to the 120 degree cone facing
+                   this neighbor of origin, like :func:`Cube.arc`
+    :type facing: Cube
+    :returns: set of Cube -- the visible hexagons, origin included
+    """
+    is_opaque = obstacle_function(opaque)
+    sextants = range(6) if facing is None else _cone_sextants(origin, facing)
+    visible = {origin}
+    for sextant in sextants:
+        _scan_sextant(origin, sextant, radius, is_opaque, visible)
+    return visible
+
+
+def ray_fan(origin, targets, opaque=None):
+    """Lines from one origin to many targets
+
+    Each line is the same as :func:`Cube.line_to`. When opaque is given,
+    a line stops at its first opaque hexagon (included), so the result
+    tells which targets are in the line of fire.
+    Opacity is looked up once per distinct hexagon of the whole fan, and
+    a line is not generated past the point where it is blocked.
+    The lines themselves are not shared: because of rounding, the line
+    to a target is not always the start of the line to a farther target
+    in the same direction.
+
+    :param origin: start of every line, never considered opaque
+    :type origin: Cube
+    :param targets: end of each line
+    :type targets: iterable of Cube
+    :param opaque: function returning True for opaque coordinates,
+                   a set of opaque coordinates or a bitmap, see
+                   :func:`hexagons.coordinate.obstacle_function`
+    :type opaque: callable, set or bitmap
+    :returns: dict -- maps each target to the list of Cube in its line
+    """
+    opaque = obstacle_function(opaque)
+    known = {origin: False}
+    lines = {}
+    for target in targets:
+        line = []
+        for cell in origin.line_to(target):
+            line.append(cell)
+            if opaque is None:
+                continue
+            blocked = known.get(cell)
+            if blocked is None:
+                blocked = known[cell] = opaque(cell)
+            if blocked:
+                break
+        lines[target] = line
+    return lines
@@ -26,5 +26,5 @@ setup(
     tests_require=['pytest'],
     cmdclass={'test': PyTest},
     test_suite='hexagons.test',
-    extras_require={'testing': ['pytest']}
+    extras_require={'testing': ['pytest'], 'numpy': ['numpy']}
 )